@@ -0,0 +1,111 @@
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from supervisions.sharded_user_store import migrate_to_shards  # noqa: E402
+from supervisions.supervision_requests import SupervisionRequestStore  # noqa: E402
+from supervisions.unit_of_work import UnitOfWork  # noqa: E402
+from supervisions.user_store import StoredUser, UserStore, open_user_store  # noqa: E402
+
+PATHS = ("store", "unit-of-work")
+
+
+def _seed(users_file: Path, users: int) -> None:
+    data = {
+        f"user{index:05d}": {
+            "password": "secret",
+            "role": "regular",
+            "category": "student",
+            "full_name": None,
+            "lattes_link": None,
+            "email": None,
+            "sipap_number": None,
+            "enroll_number": None,
+            "telephone_number": None,
+            "advisor_1": None,
+            "advisor_2": None,
+        }
+        for index in range(users)
+    }
+    UserStore(users_file)._write_raw(data)
+
+
+def _worker(
+    users_file: Path, path: str, worker: int, workers: int, users: int, updates: int
+) -> None:
+    store = open_user_store(users_file)
+    request_store = SupervisionRequestStore(users_file.with_name("supervision_requests.json"))
+    targets = [f"user{index:05d}" for index in range(worker, users, workers)]
+    for round_number in range(updates):
+        username = targets[round_number % len(targets)]
+        current = store.get(username)
+        full_name = f"worker {worker} round {round_number}"
+        if path == "unit-of-work":
+            with UnitOfWork(user_store=store, request_store=request_store) as unit_of_work:
+                unit_of_work.update_profile(current, {"full_name": full_name})
+            continue
+        store.save(
+            StoredUser(
+                username=username,
+                password=current.password,
+                role=current.role,
+                category=current.category,
+                full_name=full_name,
+            )
+        )
+
+
+def _run(
+    layout: str, path: str, workers: int, users: int, updates: int, shards: int
+) -> tuple[float, int]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        users_file = Path(temp_dir) / "users.json"
+        _seed(users_file, users)
+        if layout == "sharded":
+            migrate_to_shards(users_file, shards)
+        processes = [
+            multiprocessing.Process(
+                target=_worker, args=(users_file, path, worker, workers, users, updates)
+            )
+            for worker in range(workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        updated = sum(1 for user in open_user_store(users_file).iter_all() if user.full_name)
+    return elapsed, updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Concurrent profile updates: JSON vs sharded, direct saves vs units of work"
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=64)
+    args = parser.parse_args()
+
+    expected = min(args.users, args.workers * args.updates)
+    for path in PATHS:
+        for layout in ("json", "sharded"):
+            elapsed, updated = _run(
+                layout, path, args.workers, args.users, args.updates, args.shards
+            )
+            total = args.workers * args.updates
+            print(
+                f"{path:12} {layout:8} {total} saves in {elapsed:.2f}s "
+                f"({total / elapsed:.0f} saves/s), updated {updated}/{expected}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+def _seed(directory: Path, users: int, requests: int) -> None:
+    from supervisions.supervision_requests import SupervisionRequestStore
+    from supervisions.user_store import UserStore
+
+    data: dict[str, dict[str, str | None]] = {
+        "admin": {"password": "secret", "role": "admin", "category": None}
+    }
+    for index in range(users):
+        data[f"user{index:06d}"] = {
+            "password": "secret",
+            "role": "regular",
+            "category": "professor" if index % 20 == 0 else "student",
+            "full_name": f"User {index}",
+            "email": f"user{index:06d}@example.com",
+            "enroll_number": f"{index:08d}",
+        }
+    UserStore(directory / "users.json")._write_raw(data)
+    SupervisionRequestStore(directory / "supervision_requests.json")._write_raw(
+        [
+            {
+                "id": request_id,
+                "student_username": f"user{request_id % users:06d}",
+                "student_name": f"User {request_id % users}",
+                "professor_name": f"User {request_id % users // 20 * 20}",
+                "slot": "advisor_1",
+                "status": "pending",
+            }
+            for request_id in range(1, requests + 1)
+        ]
+    )
+
+
+def _memory(pid: int) -> tuple[int, int]:
+    fields: dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as file_handle:
+        for line in file_handle:
+            name, _, rest = line.partition(":")
+            parts = rest.split()
+            if len(parts) == 2 and parts[1] == "kB":
+                fields[name] = int(parts[0])
+    return fields["Private_Clean"] + fields["Private_Dirty"], fields["Pss"]
+
+
+def _worker(rounds: int, ready, done) -> None:
+    from supervisions.web import app
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update({"username": "admin", "role": "admin"})
+    for _ in range(rounds):
+        for path in ("/dashboard", "/api/v1/users?limit=50", "/api/v1/users/search?q=user00"):
+            if client.get(path).status_code != 200:
+                raise RuntimeError(f"Unexpected status for {path}")
+    ready.put(multiprocessing.current_process().pid)
+    done.wait()
+
+
+def _server(mode: str, directory: Path, workers: int, rounds: int, results) -> None:
+    from supervisions.supervision_requests import SupervisionRequestStore
+    from supervisions.user_store import UserStore
+
+    with patch.object(
+        UserStore, "default_file_path", return_value=directory / "users.json"
+    ), patch.object(
+        SupervisionRequestStore,
+        "default_file_path",
+        return_value=directory / "supervision_requests.json",
+    ):
+        if mode == "preload":
+            from supervisions.preload import preload
+            from supervisions.web import app
+
+            preload(app)
+        context = multiprocessing.get_context("fork")
+        ready = context.Queue()
+        done = context.Event()
+        processes = [
+            context.Process(target=_worker, args=(rounds, ready, done)) for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        pids = [ready.get() for _ in processes]
+        samples = [_memory(pid) for pid in pids]
+        done.set()
+        for process in processes:
+            process.join()
+    results.put(samples)
+
+
+def _run(mode: str, directory: Path, workers: int, rounds: int) -> str:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    server = context.Process(target=_server, args=(mode, directory, workers, rounds, results))
+    server.start()
+    samples = results.get()
+    server.join()
+    uss = sum(sample[0] for sample in samples) / len(samples) / 1024
+    pss = sum(sample[1] for sample in samples) / len(samples) / 1024
+    total = sum(sample[1] for sample in samples) / 1024
+    return (
+        f"{mode:8}  per worker USS {uss:7.1f} MiB  PSS {pss:7.1f} MiB  "
+        f"total PSS {total:8.1f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-worker memory of forked web workers with and without preloading"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        raise SystemExit("This benchmark reads /proc/<pid>/smaps_rollup and needs Linux")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        _seed(directory, args.users, args.requests)
+        print(f"{args.workers} workers, {args.users} users, {args.requests} requests")
+        for mode in ("cold", "preload"):
+            print(_run(mode, directory, args.workers, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from supervisions.sqlite_request_store import migrate_to_sqlite  # noqa: E402
+from supervisions.supervision_requests import SupervisionRequestStore  # noqa: E402
+from supervisions.user_store import UserStore  # noqa: E402
+from supervisions.web import app  # noqa: E402
+
+
+def _professor(index: int) -> str:
+    return f"Professor {index:03d}"
+
+
+def _seed(directory: Path, professors: int, requests: int) -> None:
+    users: dict[str, dict[str, str | None]] = {
+        "admin": {"password": "secret", "role": "admin", "category": None}
+    }
+    for index in range(professors):
+        users[f"prof{index:03d}"] = {
+            "password": "secret",
+            "role": "regular",
+            "category": "professor",
+            "full_name": _professor(index),
+        }
+    UserStore(directory / "users.json")._write_raw(users)
+    SupervisionRequestStore(directory / "supervision_requests.json")._write_raw(
+        [
+            {
+                "id": request_id,
+                "student_username": f"student{request_id:06d}",
+                "student_name": f"Student {request_id}",
+                "professor_name": _professor(request_id % professors),
+                "slot": "advisor_1",
+                "status": "pending",
+            }
+            for request_id in range(1, requests + 1)
+        ]
+    )
+
+
+def _worker(
+    worker: int, workers: int, professors: int, requests: int, seconds: float, results
+) -> None:
+    admin = app.test_client()
+    with admin.session_transaction() as session:
+        session.update({"username": "admin", "role": "admin"})
+    clients = {}
+    for index in range(worker, professors, workers):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session.update(
+                {"username": f"prof{index:03d}", "role": "regular", "category": "professor"}
+            )
+        clients[index] = client
+    pending = [
+        request_id
+        for request_id in range(1, requests + 1)
+        if request_id % professors in clients
+    ]
+
+    reads: list[float] = []
+    writes: list[float] = []
+    deadline = time.perf_counter() + seconds
+    operation = 0
+    while time.perf_counter() < deadline:
+        operation += 1
+        start = time.perf_counter()
+        if operation % 5 == 0 and pending:
+            request_id = pending.pop()
+            response = clients[request_id % professors].post(
+                "/supervision-requests/decision",
+                data={"request_id": str(request_id), "decision": "rejected"},
+            )
+            writes.append(time.perf_counter() - start)
+        else:
+            professor = _professor(operation * workers % professors)
+            response = admin.get(
+                f"/api/v1/supervision-requests?status=pending&professor={professor}&limit=20"
+            )
+            reads.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"Unexpected status {response.status_code}")
+    results.put((reads, writes))
+
+
+def _run(backend: str, workers: int, professors: int, requests: int, seconds: float) -> str:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        _seed(directory, professors, requests)
+        if backend == "sqlite":
+            migrate_to_sqlite(directory / "supervision_requests.json")
+        with patch.object(
+            UserStore, "default_file_path", return_value=directory / "users.json"
+        ), patch.object(
+            SupervisionRequestStore,
+            "default_file_path",
+            return_value=directory / "supervision_requests.json",
+        ):
+            context = multiprocessing.get_context("fork")
+            results = context.Queue()
+            processes = [
+                context.Process(
+                    target=_worker,
+                    args=(worker, workers, professors, requests, seconds, results),
+                )
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            collected = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+    reads = [sample for worker_reads, _ in collected for sample in worker_reads]
+    writes = [sample for _, worker_writes in collected for sample in worker_writes]
+    return (
+        f"{backend:6}  {(len(reads) + len(writes)) / seconds:8.1f} req/s  "
+        f"read p50 {statistics.median(reads) * 1000:7.2f} ms  "
+        f"p95 {statistics.quantiles(reads, n=20)[-1] * 1000:7.2f} ms  "
+        f"decide p50 {statistics.median(writes) * 1000:7.2f} ms  "
+        f"p95 {statistics.quantiles(writes, n=20)[-1] * 1000:7.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Supervision request store throughput under concurrent Flask workers"
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--professors", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, {args.requests} requests, {args.seconds:.0f} s per backend")
+    for backend in ("json", "sqlite"):
+        print(_run(backend, args.workers, args.professors, args.requests, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from supervisions.response_compression import available_encodings  # noqa: E402
+from supervisions.supervision_requests import SupervisionRequestStore  # noqa: E402
+from supervisions.user_store import UserStore  # noqa: E402
+from supervisions.web import app  # noqa: E402
+
+
+def _seed(users_file: Path, users: int) -> None:
+    professors = max(users // 20, 1)
+    data: dict[str, dict[str, str | None]] = {
+        "admin": {"password": "secret", "role": "admin", "category": None}
+    }
+    for index in range(professors):
+        data[f"prof{index:05d}"] = {
+            "password": "secret",
+            "role": "regular",
+            "category": "professor",
+            "full_name": f"Professor {index:05d}",
+        }
+    for index in range(users - professors):
+        data[f"student{index:06d}"] = {
+            "password": "secret",
+            "role": "regular",
+            "category": "student",
+            "full_name": f"Student {index:06d}",
+            "advisor_1": f"Professor {index % professors:05d}",
+        }
+    UserStore(users_file)._write_raw(data)
+
+
+def _measure(client, path: str, encoding: str | None, rounds: int) -> tuple[int, float]:
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    samples = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        size = len(response.data)
+        samples.append(time.perf_counter() - start)
+    return size, statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Response size and latency with compression")
+    parser.add_argument("--users", default="1000,10000")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    middleware = app.wsgi_app
+    settings = [(None, 0)] + [
+        (encoding, level) for encoding in available_encodings() for level in (1, 6, 9)
+    ]
+    for users in (int(value) for value in args.users.split(",")):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir)
+            _seed(directory / "users.json", users)
+            with patch.object(
+                UserStore, "default_file_path", return_value=directory / "users.json"
+            ), patch.object(
+                SupervisionRequestStore,
+                "default_file_path",
+                return_value=directory / "supervision_requests.json",
+            ):
+                client = app.test_client()
+                with client.session_transaction() as session:
+                    session.update({"username": "admin", "role": "admin"})
+                for path in ("/", "/dashboard"):
+                    client.get(path)
+                    for encoding, level in settings:
+                        middleware.level = level or middleware.level
+                        size, latency = _measure(client, path, encoding, args.rounds)
+                        label = "identity" if encoding is None else f"{encoding}-{level}"
+                        print(
+                            f"{users:6} users  {path:11} {label:9} "
+                            f"{size / 1024:9.1f} KiB  {latency:8.2f} ms"
+                        )
+    middleware.level = 6
+
+
+if __name__ == "__main__":
+    main()
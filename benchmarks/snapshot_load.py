@@ -0,0 +1,79 @@
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from supervisions.storage import read_data_file, write_data_files  # noqa: E402
+
+
+def _users(count: int) -> dict[str, dict[str, str | None]]:
+    return {
+        f"user{index:06d}": {
+            "password": f"user{index:06d}123",
+            "role": "admin" if index % 500 == 0 else "regular",
+            "category": "professor" if index % 20 == 0 else "student",
+            "full_name": f"User Number {index}",
+            "lattes_link": None,
+            "email": f"user{index}@example.edu",
+            "sipap_number": None,
+            "enroll_number": str(2000000 + index),
+            "telephone_number": None,
+            "advisor_1": f"User Number {index - index % 20}" if index % 3 else None,
+            "advisor_2": None,
+        }
+        for index in range(count)
+    }
+
+
+def _requests(count: int) -> list[dict[str, object]]:
+    return [
+        {
+            "id": index + 1,
+            "student_username": f"user{index:06d}",
+            "student_name": f"User Number {index}",
+            "professor_name": f"User Number {index - index % 20}",
+            "slot": "advisor_1" if index % 2 else "advisor_2",
+            "status": ("pending", "accepted", "rejected")[index % 3],
+        }
+        for index in range(count)
+    ]
+
+
+def _time_load(path: Path, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_data_file(path, None)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON vs binary snapshot load time and size")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    datasets = {"users": _users(args.users), "supervision_requests": _requests(args.requests)}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        for name, data in datasets.items():
+            json_path = directory / f"{name}.json"
+            snapshot_path = directory / f"{name}.snap"
+            write_data_files({json_path: data, snapshot_path: data})
+            assert read_data_file(snapshot_path, None) == read_data_file(json_path, None)
+            for path in (json_path, snapshot_path):
+                size = path.stat().st_size / 1024 / 1024
+                print(
+                    f"{path.name:26} {size:7.2f} MiB  "
+                    f"load {_time_load(path, args.repeat):7.1f} ms (median of {args.repeat})"
+                )
+
+
+if __name__ == "__main__":
+    main()
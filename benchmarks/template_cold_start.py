@@ -0,0 +1,70 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_PROBE = """
+import time
+start = time.perf_counter()
+from supervisions.web import app
+imported = time.perf_counter()
+client = app.test_client()
+with client.session_transaction() as session:
+    session["username"] = "admin"
+    session["role"] = "admin"
+    session["category"] = ""
+client.get("/dashboard")
+done = time.perf_counter()
+print(imported - start, done - imported, done - start)
+"""
+
+
+def _measure(env: dict[str, str]) -> tuple[float, float, float]:
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    startup, first_response, total = completed.stdout.split()
+    return float(startup), float(first_response), float(total)
+
+
+def _report(label: str, samples: list[tuple[float, float, float]]) -> None:
+    startup, first_response, total = (
+        statistics.median(column) * 1000 for column in zip(*samples)
+    )
+    print(
+        f"{label:<22} startup {startup:7.1f} ms  first response {first_response:6.1f} ms  "
+        f"total {total:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start time to first dashboard response")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    source = Path(__file__).resolve().parents[1] / "src"
+    sys.path.insert(0, str(source))
+    from supervisions.templating import default_bytecode_cache_dir
+
+    cache_dir = default_bytecode_cache_dir()
+    env = dict(os.environ, PYTHONPATH=str(source))
+
+    cold = []
+    for _ in range(args.runs):
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cold.append(_measure(env))
+    warm = [_measure(env) for _ in range(args.runs)]
+
+    _report("empty bytecode cache", cold)
+    _report("warm bytecode cache", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from supervisions.user_store import UserStore, _snapshots  # noqa: E402
+
+
+def _users(count: int) -> dict[str, dict[str, str | None]]:
+    return {
+        f"user{index:06d}": {
+            "password": f"user{index:06d}123",
+            "role": "regular",
+            "category": "student",
+            "full_name": f"User Number {index}",
+            "email": f"user{index}@example.edu",
+            "advisor_1": None,
+            "advisor_2": None,
+        }
+        for index in range(count)
+    }
+
+
+def _median_ms(store: UserStore, usernames: list[str], cold: bool) -> float:
+    samples = []
+    for username in usernames:
+        if cold:
+            _snapshots.clear()
+        start = time.perf_counter()
+        store.get(username)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Single-user lookup cost by dataset size")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            users_file = Path(temp_dir) / "users.json"
+            store = UserStore(users_file)
+            store._write_raw(_users(size))
+            usernames = [f"user{index * size // args.lookups:06d}" for index in range(args.lookups)]
+            indexed = _median_ms(store, usernames, cold=True)
+            users_file.with_name("users.json.idx").unlink()
+            parsed = _median_ms(store, usernames, cold=True)
+            print(f"{size:7} users  offset index {indexed:8.3f} ms  full parse {parsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
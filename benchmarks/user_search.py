@@ -0,0 +1,76 @@
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from supervisions import user_search  # noqa: E402
+from supervisions.user_search import UserSearchIndex  # noqa: E402
+from supervisions.user_store import StoredUser, UserStore  # noqa: E402
+
+_FIRST = ("Ana", "João", "Márcia", "Luís", "Beatriz", "Otávio", "Cecília", "Renato")
+_LAST = ("Conceição", "Araújo", "Gonçalves", "Pereira", "Simões", "Lima", "Brandão", "Souza")
+
+
+def _users(count: int) -> dict[str, dict[str, str | None]]:
+    return {
+        f"user{index:06d}": {
+            "password": f"user{index:06d}123",
+            "role": "regular",
+            "category": "student",
+            "full_name": f"{_FIRST[index % 8]} {_LAST[index // 8 % 8]} {index}",
+            "email": f"user{index}@example.edu",
+            "enroll_number": f"{2000000 + index}",
+            "advisor_1": None,
+            "advisor_2": None,
+        }
+        for index in range(count)
+    }
+
+
+def _median_ms(index: UserSearchIndex, queries: list[str], rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="User search index build, load and query cost")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    queries = ["joao", "concei", "marcia simoes", "user0421", "2099", "brandao 9999"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = UserStore(Path(temp_dir) / "users.json")
+        store._write_raw(_users(args.users))
+
+        start = time.perf_counter()
+        index = UserSearchIndex(store)
+        index.refresh()
+        print(f"build from store      {time.perf_counter() - start:8.3f} s")
+
+        user_search._indexes.clear()
+        start = time.perf_counter()
+        index.refresh()
+        print(f"load from checkpoint  {time.perf_counter() - start:8.3f} s")
+
+        print(f"query median          {_median_ms(index, queries, args.rounds):8.3f} ms")
+        for position in range(100):
+            username = f"user{position:06d}"
+            store.save(StoredUser(**{**_users(1)["user000000"], "username": username}))
+        start = time.perf_counter()
+        index.refresh()
+        print(f"apply 100 saves       {(time.perf_counter() - start) * 1000:8.3f} ms")
+        print(f"query after saves     {_median_ms(index, queries, args.rounds):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
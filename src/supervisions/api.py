@@ -0,0 +1,242 @@
+import hashlib
+from dataclasses import asdict, fields
+from typing import Callable
+
+from flask import Blueprint, Response, jsonify, request, session
+
+from supervisions.supervision_requests import SupervisionRequest, open_request_store
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_control import User, can, parse_role
+from supervisions.user_search import UserSearchIndex
+from supervisions.user_store import StoredUser, open_user_store
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+USER_FIELDS = (
+    "username",
+    "role",
+    "category",
+    "full_name",
+    "lattes_link",
+    "email",
+    "sipap_number",
+    "enroll_number",
+    "telephone_number",
+    "advisor_1",
+    "advisor_2",
+)
+PUBLIC_STUDENT_FIELDS = ("username", "full_name")
+REQUEST_FIELDS = tuple(field.name for field in fields(SupervisionRequest))
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@api.errorhandler(ApiError)
+def _api_error(error: ApiError):
+    return jsonify({"error": str(error)}), error.status
+
+
+def _require(permission: str) -> User:
+    username = session.get("username")
+    role = session.get("role")
+    if not username or not role:
+        raise ApiError("Authentication required", 401)
+    actor = User(username=username, role=parse_role(role))
+    if not can(actor, permission):
+        raise ApiError(
+            f"User '{actor.username}' with role '{actor.role.value}' cannot '{permission}'", 403
+        )
+    return actor
+
+
+def _projection(allowed: tuple[str, ...]) -> tuple[str, ...]:
+    raw = request.args.get("fields", "").strip()
+    if not raw:
+        return allowed
+    selected = tuple(name.strip() for name in raw.split(",") if name.strip())
+    unknown = [name for name in selected if name not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}", 400)
+    return selected
+
+
+def _limit() -> int:
+    raw = request.args.get("limit", "").strip()
+    if not raw:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError as error:
+        raise ApiError("limit must be an integer", 400) from error
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ApiError(f"limit must be between 1 and {MAX_PAGE_SIZE}", 400)
+    return limit
+
+
+def _optional_arg(name: str) -> str | None:
+    value = request.args.get(name, "").strip()
+    return value or None
+
+
+def _conditional(version: str, build: Callable[[], dict[str, object]]) -> Response:
+    digest = hashlib.sha1(f"{request.full_path}|{version}".encode("utf-8")).hexdigest()
+    if request.if_none_match.contains_weak(digest):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(digest)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _user_item(user: StoredUser, projection: tuple[str, ...]) -> dict[str, object]:
+    return {name: getattr(user, name) for name in projection}
+
+
+def _request_item(
+    supervision_request: SupervisionRequest, projection: tuple[str, ...]
+) -> dict[str, object]:
+    data = asdict(supervision_request)
+    return {name: data[name] for name in projection}
+
+
+def _user_page(users: list[StoredUser], limit: int, projection: tuple[str, ...]) -> dict[str, object]:
+    has_more = len(users) > limit
+    users = users[:limit]
+    return {
+        "items": [_user_item(user, projection) for user in users],
+        "next_after": users[-1].username if has_more else None,
+    }
+
+
+@api.get("/users")
+def list_users():
+    _require("reports:view")
+    projection = _projection(USER_FIELDS)
+    limit = _limit()
+    store = open_user_store()
+
+    def build() -> dict[str, object]:
+        users = store.page(
+            after=_optional_arg("after"),
+            limit=limit + 1,
+            role=_optional_arg("role"),
+            category=_optional_arg("category"),
+            advisor=_optional_arg("advisor"),
+        )
+        return _user_page(users, limit, projection)
+
+    return _conditional(store.version(), build)
+
+
+@api.get("/users/search")
+def search_users():
+    _require("reports:view")
+    projection = _projection(USER_FIELDS)
+    limit = _limit()
+    query = request.args.get("q", "").strip()
+    if not query:
+        raise ApiError("q is required", 400)
+    store = open_user_store()
+    items = []
+    for username in UserSearchIndex(store).search(query, limit=limit):
+        user = store.get(username)
+        if user is not None:
+            items.append(_user_item(user, projection))
+    return jsonify({"items": items})
+
+
+@api.get("/professors/<username>/students")
+def list_professor_students(username: str):
+    actor = _require("profile:view")
+    projection = _projection(
+        USER_FIELDS if can(actor, "reports:view") else PUBLIC_STUDENT_FIELDS
+    )
+    limit = _limit()
+    store = open_user_store()
+    professor = store.get(username)
+    if professor is None or professor.role != "regular" or professor.category != "professor":
+        raise ApiError(f"Professor '{username}' not found", 404)
+    professor_name = (professor.full_name or "").strip() or professor.username
+
+    def build() -> dict[str, object]:
+        users = store.page(
+            after=_optional_arg("after"),
+            limit=limit + 1,
+            role="regular",
+            category="student",
+            advisor=professor_name,
+        )
+        page = _user_page(users, limit, projection)
+        page["professor"] = {"username": professor.username, "name": professor_name}
+        return page
+
+    return _conditional(f"{store.version()}|{','.join(projection)}", build)
+
+
+@api.get("/supervision-requests")
+def list_supervision_requests():
+    _require("reports:view")
+    projection = _projection(REQUEST_FIELDS)
+    limit = _limit()
+    raw_after = _optional_arg("after")
+    try:
+        after = int(raw_after) if raw_after is not None else None
+    except ValueError as error:
+        raise ApiError("after must be an integer request id", 400) from error
+    store = open_request_store()
+
+    def build() -> dict[str, object]:
+        requests = store.page(
+            after=after,
+            limit=limit + 1,
+            status=_optional_arg("status"),
+            professor_name=_optional_arg("professor"),
+            student_username=_optional_arg("student"),
+        )
+        has_more = len(requests) > limit
+        requests = requests[:limit]
+        return {
+            "items": [_request_item(item, projection) for item in requests],
+            "next_after": requests[-1].id if has_more else None,
+        }
+
+    return _conditional(store.version(), build)
+
+
+@api.patch("/profile")
+def patch_profile():
+    actor = _require("profile:view")
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise ApiError("Request body must be a JSON object", 400)
+    submitted: dict[str, str | None] = {}
+    for name, value in body.items():
+        if value is not None and not isinstance(value, str):
+            raise ApiError(f"{name} must be a string or null", 400)
+        submitted[name] = (value or "").strip() or None
+
+    store = open_user_store()
+    user = store.get(actor.username)
+    if user is None:
+        raise ApiError(f"User '{actor.username}' not found", 404)
+    try:
+        with UnitOfWork(user_store=store) as unit_of_work:
+            update = unit_of_work.update_profile(user, submitted)
+    except PermissionError as error:
+        raise ApiError(str(error), 403) from error
+    except ValueError as error:
+        raise ApiError(str(error), 400) from error
+    return jsonify(
+        {
+            "changed": update.changed,
+            "requested": [_request_item(item, REQUEST_FIELDS) for item in update.requested],
+        }
+    )
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+from typing import Iterator
+
+from flask import Flask, Response, abort, request, send_from_directory, url_for
+
+from supervisions.storage import read_data_file, write_data_files
+
+ASSET_SOURCE_DIR = Path(__file__).resolve().parent / "assets"
+MANIFEST_NAME = "manifest.json"
+COMPRESSED_SUFFIXES = {".css", ".js", ".svg", ".txt"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def default_build_dir() -> Path:
+    project_root = Path(__file__).resolve().parents[2]
+    return project_root / "data" / "static"
+
+
+def build_assets(
+    source_dir: Path = ASSET_SOURCE_DIR, build_dir: Path | None = None
+) -> dict[str, str]:
+    build_dir = build_dir or default_build_dir()
+    manifest: dict[str, str] = {}
+    for source, name, content in _read_sources(source_dir):
+        fingerprinted = _fingerprinted(source, name, content)
+        manifest[name] = fingerprinted
+        target = build_dir / fingerprinted
+        if not target.exists():
+            _write_bytes(target, content)
+        compressed = target.with_name(f"{target.name}.gz")
+        if source.suffix in COMPRESSED_SUFFIXES and not compressed.exists():
+            _write_bytes(compressed, gzip.compress(content, compresslevel=9, mtime=0))
+    if read_data_file(build_dir / MANIFEST_NAME, None) != manifest:
+        write_data_files({build_dir / MANIFEST_NAME: manifest})
+    return manifest
+
+
+def configure_assets(app: Flask, build_dir: Path | None = None) -> dict[str, str]:
+    directory = build_dir or default_build_dir()
+    manifest: dict[str, str] = {}
+    files: dict[str, str] = {}
+    for source, name, content in _read_sources(ASSET_SOURCE_DIR):
+        manifest[name] = _fingerprinted(source, name, content)
+        files[manifest[name]] = name
+
+    def asset_url(name: str) -> str:
+        return url_for("static", filename=manifest[name])
+
+    def serve_asset(filename: str) -> Response:
+        name = files.get(filename)
+        if name is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0]
+        compressed = f"{filename}.gz"
+        if not (directory / filename).is_file():
+            response = send_from_directory(ASSET_SOURCE_DIR, name, mimetype=mimetype)
+        elif "gzip" in request.accept_encodings and (directory / compressed).is_file():
+            response = send_from_directory(directory, compressed, mimetype=mimetype)
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = send_from_directory(directory, filename, mimetype=mimetype)
+        response.headers["Cache-Control"] = IMMUTABLE
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.add_url_rule("/static/<path:filename>", endpoint="static", view_func=serve_asset)
+    app.extensions["asset_manifest"] = manifest
+    app.extensions["asset_build_dir"] = directory
+    app.jinja_env.globals["asset_url"] = asset_url
+    return manifest
+
+
+def publish_assets(app: Flask) -> bool:
+    try:
+        build_assets(build_dir=app.extensions["asset_build_dir"])
+    except OSError:
+        return False
+    return True
+
+
+def _read_sources(source_dir: Path) -> Iterator[tuple[Path, str, bytes]]:
+    for source in sorted(path for path in source_dir.rglob("*") if path.is_file()):
+        yield source, source.relative_to(source_dir).as_posix(), source.read_bytes()
+
+
+def _fingerprinted(source: Path, name: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return Path(name).with_name(f"{source.stem}.{digest}{source.suffix}").as_posix()
+
+
+def _write_bytes(target: Path, content: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f".{target.name}.{os.urandom(16).hex()}.tmp")
+    with temporary.open("wb") as file_handle:
+        file_handle.write(content)
+    os.replace(temporary, target)
@@ -0,0 +1,290 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, ContextManager, Iterator
+
+from supervisions.storage import file_lock, read_data_file, write_data_files
+
+USER_CREATE = "user.create"
+USER_DELETE = "user.delete"
+REQUEST_DECIDE = "request.decide"
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+DEFAULT_BATCH_SIZE = 512
+
+_AUDIT_DIR_NAME = "audit"
+_CURRENT_NAME = "current.jsonl"
+_MANIFEST_NAME = "segments.json"
+_LOCK_NAME = ".audit.lock"
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    ts: float
+    actor: str
+    action: str
+    target: str
+    details: dict[str, object] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Segment:
+    name: str
+    start: float
+    end: float
+    count: int
+    actors: list[str]
+    actions: list[str]
+
+    def may_contain(
+        self,
+        actor: str | None,
+        action: str | None,
+        since: float | None,
+        until: float | None,
+    ) -> bool:
+        return (
+            (actor is None or actor in self.actors)
+            and (action is None or action in self.actions)
+            and (since is None or self.end >= since)
+            and (until is None or self.start < until)
+        )
+
+
+class AuditLog:
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE_SECONDS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self._directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self._queue: queue.Queue[AuditRecord | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def record(self, actor: str, action: str, target: str, **details: object) -> AuditRecord:
+        entry = AuditRecord(
+            ts=time.time(), actor=actor, action=action, target=target, details=details
+        )
+        self._ensure_writer()
+        self._queue.put(entry)
+        return entry
+
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def rotate(self) -> Segment | None:
+        with self._lock():
+            return self._rotate()
+
+    def segments(self) -> list[Segment]:
+        manifest = read_data_file(self._directory / _MANIFEST_NAME, [])
+        return [Segment(**item) for item in manifest]
+
+    def query(
+        self,
+        actor: str | None = None,
+        action: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> Iterator[AuditRecord]:
+        for segment in self.segments():
+            if not segment.may_contain(actor, action, since, until):
+                continue
+            try:
+                with gzip.open(self._directory / segment.name, "rt", encoding="utf-8") as lines:
+                    yield from _matching(lines, actor, action, since, until)
+            except FileNotFoundError:
+                continue
+        try:
+            with (self._directory / _CURRENT_NAME).open("r", encoding="utf-8") as lines:
+                yield from _matching(lines, actor, action, since, until)
+        except FileNotFoundError:
+            return
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write_batches, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _write_batches(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [entry for entry in batch if entry is not None]
+            try:
+                if entries:
+                    self._append(entries)
+            except OSError:
+                logging.getLogger(__name__).exception(
+                    "dropped %d audit record(s) in %s", len(entries), self._directory
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(entries) < len(batch):
+                return
+
+    def _append(self, entries: list[AuditRecord]) -> None:
+        payload = "".join(_encode(entry) for entry in entries).encode("utf-8")
+        current = self._directory / _CURRENT_NAME
+        with self._lock():
+            if self._due(current, entries[0].ts):
+                self._rotate()
+            with current.open("ab") as file_handle:
+                file_handle.write(payload)
+                file_handle.flush()
+                os.fsync(file_handle.fileno())
+
+    def _due(self, current: Path, now: float) -> bool:
+        try:
+            size = current.stat().st_size
+        except FileNotFoundError:
+            return False
+        if size >= self.max_bytes:
+            return True
+        with current.open("r", encoding="utf-8") as file_handle:
+            first = file_handle.readline()
+        return bool(first) and now - json.loads(first)["ts"] >= self.max_age
+
+    def _rotate(self) -> Segment | None:
+        current = self._directory / _CURRENT_NAME
+        if not current.exists() or current.stat().st_size == 0:
+            return None
+        segments = self.segments()
+        name = f"segment-{len(segments) + 1:06d}.jsonl.gz"
+        start = end = None
+        count = 0
+        actors: set[str] = set()
+        actions: set[str] = set()
+        temporary = self._directory / f".{name}.tmp"
+        with current.open("rb") as source, temporary.open("wb") as file_handle:
+            with gzip.GzipFile(fileobj=file_handle, mode="wb") as target:
+                for line in source:
+                    target.write(line)
+                    entry = json.loads(line)
+                    start = entry["ts"] if start is None else min(start, entry["ts"])
+                    end = entry["ts"] if end is None else max(end, entry["ts"])
+                    actors.add(entry["actor"])
+                    actions.add(entry["action"])
+                    count += 1
+            file_handle.flush()
+            os.fsync(file_handle.fileno())
+        os.replace(temporary, self._directory / name)
+        segment = Segment(
+            name=name,
+            start=start or 0.0,
+            end=end or 0.0,
+            count=count,
+            actors=sorted(actors),
+            actions=sorted(actions),
+        )
+        write_data_files(
+            {
+                self._directory / _MANIFEST_NAME: [asdict(item) for item in segments]
+                + [asdict(segment)]
+            }
+        )
+        current.unlink()
+        return segment
+
+    def _lock(self) -> ContextManager[None]:
+        return file_lock(self._directory / _LOCK_NAME)
+
+    def _after_fork(self) -> None:
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+
+def _encode(entry: AuditRecord) -> str:
+    return json.dumps(asdict(entry), sort_keys=True, separators=(",", ":")) + "\n"
+
+
+def _matching(
+    lines: IO[str],
+    actor: str | None,
+    action: str | None,
+    since: float | None,
+    until: float | None,
+) -> Iterator[AuditRecord]:
+    for line in lines:
+        if not line.endswith("\n"):
+            return
+        entry = AuditRecord(**json.loads(line))
+        if actor is not None and entry.actor != actor:
+            continue
+        if action is not None and entry.action != action:
+            continue
+        if since is not None and entry.ts < since:
+            continue
+        if until is not None and entry.ts >= until:
+            continue
+        yield entry
+
+
+_logs: dict[Path, AuditLog] = {}
+_logs_lock = threading.Lock()
+
+
+def audit_log_for(directory: Path) -> AuditLog:
+    audit_directory = (directory / _AUDIT_DIR_NAME).resolve()
+    with _logs_lock:
+        log = _logs.get(audit_directory)
+        if log is None:
+            log = _logs[audit_directory] = AuditLog(audit_directory)
+            atexit.register(log.close)
+        return log
+
+
+def close_audit_logs() -> None:
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        log.close()
+
+
+def _reset_after_fork() -> None:
+    global _logs_lock
+    _logs_lock = threading.Lock()
+    for log in _logs.values():
+        log._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,9 +1,9 @@
 from supervisions.user_control import Role, User, parse_regular_category, parse_role
-from supervisions.user_store import UserStore
+from supervisions.user_store import open_user_store
 
 
 def authenticate(username: str, password: str) -> User | None:
-    store = UserStore()
+    store = open_user_store()
     stored = store.get(username)
 
     if stored is None:
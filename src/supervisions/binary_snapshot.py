@@ -0,0 +1,139 @@
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+MAGIC = b"SVSNAP01"
+
+_HEADER = struct.Struct("<8sIIIIII")
+_ALIGNMENT = 8
+_MAPPING = 0
+_LIST = 1
+_STRING = 0
+_INTEGER = 1
+_NULL_INTEGER = -(2**63)
+_SEPARATOR = "\x00"
+_SEPARATED = 1
+
+
+def encode(data: object) -> bytes:
+    if isinstance(data, dict):
+        kind = _MAPPING
+        keys = sorted(data)
+        records = [data[key] for key in keys]
+    elif isinstance(data, list):
+        kind = _LIST
+        keys = []
+        records = data
+    else:
+        raise TypeError(f"Cannot snapshot {type(data).__name__}")
+
+    strings: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = len(strings) + 1
+            strings[value] = index
+        return index
+
+    names = sorted({name for record in records for name in record})
+    descriptors = array("I")
+    columns: list[array] = []
+    for name in names:
+        values = [record.get(name) for record in records]
+        descriptors.append(intern(name))
+        if any(isinstance(value, bool) for value in values):
+            raise TypeError(f"Unsupported value in column '{name}'")
+        if all(value is None or isinstance(value, str) for value in values):
+            descriptors.append(_STRING)
+            columns.append(array("I", [0 if value is None else intern(value) for value in values]))
+        elif all(value is None or isinstance(value, int) for value in values):
+            descriptors.append(_INTEGER)
+            columns.append(
+                array("q", [_NULL_INTEGER if value is None else value for value in values])
+            )
+        else:
+            raise TypeError(f"Unsupported value in column '{name}'")
+    key_column = array("I", [intern(key) for key in keys])
+
+    if any(_SEPARATOR in value for value in strings):
+        flags = 0
+        offsets = array("I", [0])
+        for value in strings:
+            offsets.append(offsets[-1] + len(value))
+        text = "".join(strings).encode("utf-8")
+    else:
+        flags = _SEPARATED
+        offsets = array("I")
+        text = _SEPARATOR.join(strings).encode("utf-8")
+
+    header = _HEADER.pack(MAGIC, kind, flags, len(records), len(names), len(strings), len(text))
+    parts = [header, _array_bytes(descriptors), _array_bytes(offsets), text]
+    parts.append(_array_bytes(key_column))
+    parts.extend(_array_bytes(column) for column in columns)
+    return b"".join(part + bytes(-len(part) % _ALIGNMENT) for part in parts)
+
+
+def decode(path: Path) -> object:
+    with path.open("rb") as file_handle:
+        with mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _decode(mapped)
+
+
+def _decode(buffer: mmap.mmap) -> object:
+    magic, kind, flags, rows, column_count, string_count, text_size = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a supervisions snapshot")
+    position = _HEADER.size + (-_HEADER.size % _ALIGNMENT)
+
+    def read(typecode: str, count: int) -> array:
+        nonlocal position
+        values = array(typecode)
+        size = values.itemsize * count
+        values.frombytes(buffer[position : position + size])
+        if sys.byteorder == "big":
+            values.byteswap()
+        position += size + (-size % _ALIGNMENT)
+        return values
+
+    descriptors = read("I", column_count * 2)
+    offsets = read("I", 0 if flags & _SEPARATED else string_count + 1)
+    text = buffer[position : position + text_size].decode("utf-8")
+    position += text_size + (-text_size % _ALIGNMENT)
+    table: list[str | None] = [None]
+    if not flags & _SEPARATED:
+        table.extend(map(text.__getitem__, map(slice, offsets[:-1], offsets[1:])))
+    elif string_count:
+        table.extend(text.split(_SEPARATOR))
+
+    key_column = read("I", rows if kind == _MAPPING else 0)
+    names: list[str | None] = []
+    columns: list[list[object]] = []
+    for index in range(column_count):
+        names.append(table[descriptors[2 * index]])
+        if descriptors[2 * index + 1] == _STRING:
+            columns.append(list(map(table.__getitem__, read("I", rows))))
+        else:
+            values = read("q", rows)
+            columns.append(
+                [None if value == _NULL_INTEGER else value for value in values]
+                if _NULL_INTEGER in values
+                else values.tolist()
+            )
+
+    if columns:
+        records = [dict(zip(names, row)) for row in zip(*columns)]
+    else:
+        records = [{} for _ in range(rows)]
+    if kind == _MAPPING:
+        return dict(zip((table[index] for index in key_column), records))
+    return records
+
+
+def _array_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
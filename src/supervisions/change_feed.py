@@ -0,0 +1,316 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+USER_CREATED = "user.created"
+USER_UPDATED = "user.updated"
+USER_DELETED = "user.deleted"
+REQUEST_CREATED = "request.created"
+REQUEST_DECIDED = "request.decided"
+
+_LOG_FILE_NAME = "changes.log"
+_LOG_STAT_INTERVAL = 1.0
+_READ_CHUNK = 64 * 1024
+SEGMENT_BYTES = 4 * 1024 * 1024
+RETAINED_SEGMENTS = 8
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    seq: int
+    kind: str
+    key: str
+    data: dict[str, object]
+    timestamp: float
+
+
+Change = tuple[str, str, dict[str, object]]
+Subscriber = Callable[[ChangeEvent], None]
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        log_path: Path,
+        segment_bytes: int = SEGMENT_BYTES,
+        retained_segments: int = RETAINED_SEGMENTS,
+    ) -> None:
+        self._log_path = log_path
+        self.segment_bytes = segment_bytes
+        self.retained_segments = retained_segments
+        self._lock = threading.Lock()
+        self._published = threading.Condition()
+        self._generation = 0
+        self._subscribers: list[Subscriber] = []
+        self._last_seq = 0
+        self._scanned_offset = 0
+        self._scanned_inode: int | None = None
+
+    @property
+    def log_path(self) -> Path:
+        return self._log_path
+
+    def last_seq(self) -> int:
+        with self._lock:
+            if self._log_path.exists():
+                with self._log_path.open("rb") as file_handle:
+                    self._scan(file_handle)
+            return self._last_seq
+
+    def publish(self, changes: list[Change]) -> list[ChangeEvent]:
+        if not changes:
+            return []
+        with self._lock:
+            self._log_path.parent.mkdir(parents=True, exist_ok=True)
+            events = None
+            while events is None:
+                events = self._append(changes)
+            subscribers = list(self._subscribers)
+
+        with self._published:
+            self._generation += 1
+            self._published.notify_all()
+
+        for event in events:
+            for subscriber in subscribers:
+                try:
+                    subscriber(event)
+                except Exception:
+                    logging.getLogger(__name__).exception(
+                        "Change feed subscriber failed for event %s", event.seq
+                    )
+        return events
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    def segments(self) -> list[Path]:
+        prefix = f"{self._log_path.name}."
+        return sorted(
+            path
+            for path in self._log_path.parent.glob(f"{prefix}*")
+            if path.name[len(prefix) :].isdigit()
+        )
+
+    def events_since(self, seq: int, limit: int | None = None) -> list[ChangeEvent]:
+        events: list[ChangeEvent] = []
+        with ExitStack() as handles:
+            active = _open(self._log_path, handles)
+            segments = self.segments()
+            firsts = [int(path.suffix[1:]) for path in segments]
+            start = max(bisect.bisect_right(firsts, seq + 1) - 1, 0)
+            sources = [_open(path, handles) for path in segments[start:]] + [active]
+            for index, file_handle in enumerate(sources):
+                if file_handle is None:
+                    continue
+                if index == 0:
+                    file_handle.seek(_offset_after(file_handle, seq))
+                for line in file_handle:
+                    if not line.endswith(b"\n"):
+                        break
+                    event = _decode(line)
+                    if event.seq <= seq:
+                        continue
+                    events.append(event)
+                    seq = event.seq
+                    if limit is not None and len(events) >= limit:
+                        return events
+        return events
+
+    def wait(self, seq: int, timeout: float) -> list[ChangeEvent]:
+        deadline = time.monotonic() + timeout
+        with self._published:
+            generation = self._generation
+        events = self.events_since(seq)
+        while not events:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            with self._published:
+                self._published.wait_for(
+                    lambda: self._generation != generation,
+                    timeout=min(remaining, _LOG_STAT_INTERVAL),
+                )
+                published = self._generation != generation
+                generation = self._generation
+            if published or self._log_grew():
+                events = self.events_since(seq)
+        return events
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._published = threading.Condition()
+
+    def _log_grew(self) -> bool:
+        try:
+            stat = self._log_path.stat()
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_size) != (self._scanned_inode, self._scanned_offset)
+
+    def _append(self, changes: list[Change]) -> list[ChangeEvent] | None:
+        with self._log_path.open("a+b") as file_handle:
+            if fcntl is not None:
+                fcntl.flock(file_handle.fileno(), fcntl.LOCK_EX)
+            try:
+                if not _is_current(file_handle, self._log_path):
+                    return None
+                self._scan(file_handle)
+                timestamp = time.time()
+                events = [
+                    ChangeEvent(
+                        seq=self._last_seq + index,
+                        kind=kind,
+                        key=key,
+                        data=data,
+                        timestamp=timestamp,
+                    )
+                    for index, (kind, key, data) in enumerate(changes, start=1)
+                ]
+                file_handle.seek(0, 2)
+                file_handle.write(b"".join(_encode(event) for event in events))
+                file_handle.flush()
+                self._scan(file_handle)
+                if self._scanned_offset >= self.segment_bytes:
+                    self._rotate(file_handle)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file_handle.fileno(), fcntl.LOCK_UN)
+        return events
+
+    def _rotate(self, file_handle) -> None:
+        file_handle.seek(0)
+        first = json.loads(file_handle.readline())["seq"]
+        os.replace(self._log_path, self._log_path.with_name(f"{self._log_path.name}.{first:012d}"))
+        self._log_path.touch()
+        for path in self.segments()[: -self.retained_segments or None]:
+            path.unlink(missing_ok=True)
+
+    def _scan(self, file_handle) -> None:
+        stat = os.fstat(file_handle.fileno())
+        if (stat.st_ino, stat.st_size) == (self._scanned_inode, self._scanned_offset):
+            return
+        end, seq = _last_line(file_handle, stat.st_size)
+        if seq is None:
+            segments = self.segments()
+            if segments:
+                with segments[-1].open("rb") as segment:
+                    seq = _last_line(segment, os.fstat(segment.fileno()).st_size)[1]
+        self._scanned_inode = stat.st_ino
+        self._scanned_offset = end
+        self._last_seq = seq or 0
+
+
+def _open(path: Path, handles: ExitStack) -> BinaryIO | None:
+    try:
+        return handles.enter_context(path.open("rb"))
+    except FileNotFoundError:
+        return None
+
+
+def _is_current(file_handle, path: Path) -> bool:
+    try:
+        return os.fstat(file_handle.fileno()).st_ino == path.stat().st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _last_line(file_handle, size: int) -> tuple[int, int | None]:
+    position = size
+    buffer = b""
+    while position > 0:
+        start = max(position - _READ_CHUNK, 0)
+        file_handle.seek(start)
+        buffer = file_handle.read(position - start) + buffer
+        position = start
+        last = buffer.rfind(b"\n")
+        if last < 0:
+            continue
+        first = buffer.rfind(b"\n", 0, last)
+        if first < 0 and position > 0:
+            continue
+        return position + last + 1, json.loads(buffer[first + 1 : last + 1])["seq"]
+    return 0, None
+
+
+def _offset_after(file_handle, seq: int) -> int:
+    low = 0
+    high = os.fstat(file_handle.fileno()).st_size
+    while high - low > _READ_CHUNK:
+        middle = (low + high) // 2
+        file_handle.seek(middle)
+        file_handle.readline()
+        start = file_handle.tell()
+        line = file_handle.readline()
+        if line.endswith(b"\n") and json.loads(line)["seq"] <= seq:
+            low = start + len(line)
+        else:
+            high = middle
+    return low
+
+
+def _encode(event: ChangeEvent) -> bytes:
+    payload = {
+        "seq": event.seq,
+        "kind": event.kind,
+        "key": event.key,
+        "data": event.data,
+        "ts": event.timestamp,
+    }
+    return (json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n").encode("utf-8")
+
+
+def _decode(line: bytes) -> ChangeEvent:
+    payload = json.loads(line)
+    return ChangeEvent(
+        seq=payload["seq"],
+        kind=payload["kind"],
+        key=payload["key"],
+        data=payload["data"],
+        timestamp=payload["ts"],
+    )
+
+
+_feeds: dict[Path, ChangeFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def feed_for(directory: Path) -> ChangeFeed:
+    log_path = (directory / _LOG_FILE_NAME).resolve()
+    with _feeds_lock:
+        feed = _feeds.get(log_path)
+        if feed is None:
+            feed = ChangeFeed(log_path)
+            _feeds[log_path] = feed
+        return feed
+
+
+def _reset_after_fork() -> None:
+    global _feeds_lock
+    _feeds_lock = threading.Lock()
+    for feed in _feeds.values():
+        feed._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
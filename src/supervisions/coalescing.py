@@ -0,0 +1,54 @@
+import threading
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlightCache(Generic[T]):
+    def __init__(self, serve_stale: bool = True) -> None:
+        self.serve_stale = serve_stale
+        self._entries: dict[Hashable, tuple[Hashable, T]] = {}
+        self._flights: dict[tuple[Hashable, Hashable], _Flight[T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], T]) -> T:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            flight = self._flights.get((key, version))
+            if flight is not None and entry is not None and self.serve_stale:
+                return entry[1]
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[(key, version)] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = build()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._entries[key] = (version, flight.value)
+                del self._flights[(key, version)]
+            flight.done.set()
+        return flight.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,295 @@
+import argparse
+from dataclasses import replace
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+from supervisions.audit import REQUEST_DECIDE, USER_CREATE, USER_DELETE, close_audit_logs
+from supervisions.storage import SNAPSHOT_SUFFIX, convert_data_file, write_data_files
+from supervisions.supervision_requests import SQLITE_SUFFIX, SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_control import User, UserRegistry, parse_role, require_permission
+from supervisions.user_store import UserStore, sharded_directory
+
+
+def format_user(user: User) -> str:
+    return f"{user.username}:{user.role.value}:{user.category.value if user.category else '-'}"
+
+
+def run_commands(commands: list[tuple[str, argparse.Namespace]]) -> list[str]:
+    outputs: list[str] = []
+    with UnitOfWork() as unit_of_work:
+        registry = UserRegistry(store=unit_of_work.users)
+        for label, args in commands:
+            try:
+                outputs.append(_execute(unit_of_work, registry, args))
+            except (PermissionError, ValueError) as error:
+                if not label:
+                    raise
+                raise type(error)(f"{label}: {error}") from error
+    close_audit_logs()
+    return outputs
+
+
+def _execute(unit_of_work: UnitOfWork, registry: UserRegistry, args: argparse.Namespace) -> str:
+    actor = User(username=args.username, role=parse_role(args.role))
+
+    if args.command == "create":
+        password = args.new_password or f"{args.new_username}123"
+        created = registry.create_user(
+            actor=actor,
+            username=args.new_username,
+            role=args.new_role,
+            password=password,
+            category=args.new_category,
+        )
+        unit_of_work.audit(
+            actor.username,
+            USER_CREATE,
+            created.username,
+            role=created.role.value,
+            category=created.category.value if created.category else None,
+        )
+        output = f"created={format_user(created)} password={password}"
+        if args.list_users:
+            users = ", ".join(format_user(user) for user in registry.list_users())
+            output += f" users=[{users}]"
+        return output
+
+    if args.command == "delete":
+        if not registry.delete_user(actor=actor, username=args.target_username):
+            raise ValueError(f"User '{args.target_username}' not found")
+        unit_of_work.audit(actor.username, USER_DELETE, args.target_username)
+        return f"deleted={args.target_username}"
+
+    if args.command == "list":
+        return "\n".join(format_user(user) for user in registry.list_users())
+
+    if args.command == "set-advisor":
+        require_permission(actor, "supervisions:manage")
+        student = unit_of_work.users.get(args.student)
+        if student is None or student.role != "regular" or student.category != "student":
+            raise ValueError(f"Student '{args.student}' not found")
+        unit_of_work.users.save(replace(student, **{args.slot: args.professor_name}))
+        return f"{args.slot}={args.professor_name or '-'} student={student.username}"
+
+    if args.command == "requests" and args.requests_command == "list":
+        require_permission(actor, "reports:view")
+        requests = unit_of_work.requests.page(
+            limit=None,
+            status=args.status,
+            professor_name=args.professor,
+            student_username=args.student,
+        )
+        return "\n".join(
+            f"{request.id} {request.status} {request.student_username} -> "
+            f"{request.professor_name} ({request.slot})"
+            for request in requests
+        )
+
+    if args.command == "requests" and args.requests_command == "decide":
+        require_permission(actor, "supervisions:manage")
+        pending = unit_of_work.requests.get(args.request_id)
+        decided = None
+        unit_of_work.advisor_capacity = args.capacity
+        if pending is not None:
+            decided = unit_of_work.decide_supervision_request(
+                request_id=pending.id,
+                professor_name=pending.professor_name,
+                decision=args.decision,
+            )
+        if decided is None:
+            raise ValueError(f"Pending request {args.request_id} not found")
+        unit_of_work.audit(
+            actor.username,
+            REQUEST_DECIDE,
+            str(decided.id),
+            decision=args.decision,
+            student=decided.student_username,
+        )
+        return f"request={decided.id} status={decided.status}"
+
+    if args.command == "counters":
+        require_permission(actor, "supervisions:manage")
+        from supervisions.professor_counters import ProfessorCounters
+
+        counters = ProfessorCounters()
+        if args.counters_command == "show":
+            return "\n".join(
+                f"{name}: advisees={count.advisees} pending={count.pending}"
+                for name, count in sorted(counters.refresh().items())
+            )
+        drifts = counters.repair()
+        lines = [
+            f"drift {drift.professor_name}: "
+            f"advisees {drift.stored.advisees}->{drift.actual.advisees} "
+            f"pending {drift.stored.pending}->{drift.actual.pending}"
+            for drift in drifts
+        ]
+        lines.append(f"counters rebuilt drifted={len(drifts)}")
+        return "\n".join(lines)
+
+    if args.command == "reports":
+        require_permission(actor, "reports:view")
+        return _format_report(args.period, args.workers, args.chunk_size)
+
+    if args.command == "audit":
+        require_permission(actor, "supervisions:manage")
+        return _audit_query(args)
+
+    if args.command == "notify":
+        require_permission(actor, "supervisions:manage")
+        return _notify(args)
+
+    if args.command == "storage":
+        require_permission(actor, "supervisions:manage")
+        if unit_of_work.users.dirty or unit_of_work.requests.dirty:
+            raise ValueError(f"storage {args.storage_command} must run on its own")
+        if args.storage_command == "export":
+            return _export(unit_of_work, Path(args.directory))
+        return _migrate(args.layout, args.shards)
+
+    raise ValueError(f"Unknown command '{args.command}'")
+
+
+def _audit_query(args: argparse.Namespace) -> str:
+    from supervisions.audit import audit_log_for
+
+    records = audit_log_for(UserStore.default_file_path().parent).query(
+        actor=args.actor,
+        action=args.action,
+        since=_timestamp(args.since),
+        until=_timestamp(args.until),
+    )
+    return "\n".join(
+        " ".join(
+            [
+                datetime.fromtimestamp(record.ts, timezone.utc).isoformat(timespec="seconds"),
+                record.actor,
+                record.action,
+                record.target,
+                *(f"{key}={value}" for key, value in sorted(record.details.items())),
+            ]
+        )
+        for record in islice(records, args.limit)
+    )
+
+
+def _timestamp(raw: str | None) -> float | None:
+    if raw is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(raw)
+    except ValueError as error:
+        raise ValueError(f"Invalid date or time '{raw}'") from error
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _notify(args: argparse.Namespace) -> str:
+    from supervisions.outbox import JsonlSink, NotificationWorker, SmtpSink, outbox_for
+
+    directory = UserStore.default_file_path().parent
+    sink = (
+        SmtpSink(host=args.smtp_host, port=args.smtp_port, sender=args.sender)
+        if args.sink == "smtp"
+        else JsonlSink(Path(args.path) if args.path else directory / "notifications.jsonl")
+    )
+    worker = NotificationWorker(
+        outbox_for(directory),
+        sink,
+        batch_size=args.batch_size,
+        max_attempts=args.max_attempts,
+    )
+    if not args.once:
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            pass
+        return "notify stopped"
+    report = worker.run_once()
+    return (
+        f"delivered={report.delivered} skipped={report.skipped} "
+        f"retried={report.retried} dead={report.dead}"
+    )
+
+
+def _export(unit_of_work: UnitOfWork, directory: Path) -> str:
+    users = unit_of_work.users._read_raw()
+    requests = unit_of_work.requests._read_raw()
+    write_data_files(
+        {directory / "users.json": users, directory / "supervision_requests.json": requests}
+    )
+    return f"exported users={len(users)} requests={len(requests)} directory={directory}"
+
+
+def _migrate(layout: str, shards: int) -> str:
+    from supervisions.sharded_user_store import migrate_to_json, migrate_to_shards
+    from supervisions.sqlite_request_store import migrate_to_json as requests_to_json
+    from supervisions.sqlite_request_store import migrate_to_sqlite
+
+    users_file = UserStore.default_file_path()
+    requests_file = SupervisionRequestStore.default_file_path()
+    json_files = [users_file, requests_file]
+    sharded = sharded_directory(users_file).is_dir()
+    users_snapshot = users_file.with_suffix(SNAPSHOT_SUFFIX)
+    requests_sqlite = requests_file.with_suffix(SQLITE_SUFFIX)
+
+    if layout == "sqlite":
+        migrated = migrate_to_sqlite(requests_file)
+        return f"layout=sqlite requests={migrated}"
+
+    if layout == "sharded":
+        if users_snapshot.exists():
+            raise ValueError("Migrate the user snapshot to json before sharding")
+        migrated = migrate_to_shards(users_file, shards)
+        return f"layout=sharded shards={shards} users={migrated}"
+
+    if layout == "snapshot":
+        if sharded:
+            raise ValueError("Migrate the sharded user store to json before snapshotting")
+        if requests_sqlite.exists():
+            raise ValueError("Migrate the SQLite request store to json before snapshotting")
+        converted = [
+            path.name
+            for path in json_files
+            if convert_data_file(path, path.with_suffix(SNAPSHOT_SUFFIX))
+        ]
+        return f"layout=snapshot files=[{', '.join(converted)}]"
+
+    converted = []
+    if sharded:
+        migrate_to_json(users_file)
+        converted.append(sharded_directory(users_file).name)
+    if requests_sqlite.exists():
+        requests_to_json(requests_file)
+        converted.append(requests_sqlite.name)
+    converted.extend(
+        path.name
+        for path in json_files
+        if convert_data_file(path.with_suffix(SNAPSHOT_SUFFIX), path)
+    )
+    return f"layout=json files=[{', '.join(converted)}]"
+
+
+def _format_report(period: str, workers: int, chunk_size: int) -> str:
+    from supervisions.reports import supervision_report
+
+    report = supervision_report(period=period, workers=workers, chunk_size=chunk_size)
+    lines = ["advisor load (advisees, pending):"]
+    lines.extend(
+        f"  {load.professor_name}: {load.advisees}, {load.pending}" for load in report.advisor_load
+    )
+    lines.append(f"requests per {period} (created, accepted, rejected):")
+    lines.extend(
+        f"  {counts.period}: {counts.created}, {counts.accepted}, {counts.rejected}"
+        for counts in report.requests_per_period
+    )
+    lines.append("acceptance rates:")
+    lines.extend(
+        f"  {rate.professor_name}: {rate.accepted}/{rate.accepted + rate.rejected}"
+        for rate in report.acceptance_rates
+    )
+    lines.append(f"students without advisors: {', '.join(report.students_without_advisors) or '-'}")
+    return "\n".join(lines)
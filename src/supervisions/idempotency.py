@@ -0,0 +1,122 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Generic, Hashable, TypeVar
+
+from flask import Flask, Response, current_app, request, session
+from markupsafe import Markup
+
+T = TypeVar("T")
+
+DEFAULT_CAPACITY = 10_000
+DEFAULT_TTL_SECONDS = 600.0
+FIELD_NAME = "idempotency_key"
+
+RecordedResponse = tuple[bytes, int, list[tuple[str, str]]]
+
+
+def new_key() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class _Submission(Generic[T]):
+    def __init__(self, expires: float) -> None:
+        self.expires = expires
+        self.done = threading.Event()
+        self.value: T | None = None
+        self.error: BaseException | None = None
+
+
+class IdempotencyCache(Generic[T]):
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Submission[T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict(self._clock())
+            return len(self._entries)
+
+    def run(self, key: Hashable, action: Callable[[], T]) -> T:
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            submission = self._entries.get(key)
+            leader = submission is None
+            if submission is None:
+                submission = self._entries[key] = _Submission(now + self.ttl)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+
+        if not leader:
+            submission.done.wait()
+            if submission.error is not None:
+                raise submission.error
+            return submission.value
+
+        try:
+            submission.value = action()
+        except BaseException as error:
+            submission.error = error
+            with self._lock:
+                if self._entries.get(key) is submission:
+                    del self._entries[key]
+            raise
+        finally:
+            submission.done.set()
+        return submission.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, submission = next(iter(self._entries.items()))
+            if submission.expires > now:
+                return
+            del self._entries[key]
+
+
+def configure_idempotency(
+    app: Flask, capacity: int = DEFAULT_CAPACITY, ttl: float = DEFAULT_TTL_SECONDS
+) -> IdempotencyCache[RecordedResponse]:
+    submissions: IdempotencyCache[RecordedResponse] = IdempotencyCache(capacity, ttl)
+    app.extensions["idempotency"] = submissions
+
+    def idempotency_field() -> Markup:
+        return Markup('<input type="hidden" name="{}" value="{}" />').format(FIELD_NAME, new_key())
+
+    app.jinja_env.globals["idempotency_field"] = idempotency_field
+    return submissions
+
+
+def idempotent(view: Callable[..., object]) -> Callable[..., Response | object]:
+    @wraps(view)
+    def wrapper(*args: object, **kwargs: object) -> Response | object:
+        key = request.form.get(FIELD_NAME, "").strip()
+        username = session.get("username")
+        if not key or not username:
+            return view(*args, **kwargs)
+
+        def record() -> RecordedResponse:
+            response = current_app.make_response(view(*args, **kwargs))
+            return response.get_data(), response.status_code, list(response.headers.items())
+
+        submissions: IdempotencyCache[RecordedResponse] = current_app.extensions["idempotency"]
+        body, status, headers = submissions.run((username, request.path, key), record)
+        return Response(body, status=status, headers=headers)
+
+    return wrapper
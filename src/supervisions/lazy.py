@@ -0,0 +1,51 @@
+from typing import Any, Callable, Generic, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_UNSET: Any = object()
+
+
+class Lazy(Generic[T]):
+    __slots__ = ("_load", "_value")
+
+    def __init__(self, load: Callable[[], T]) -> None:
+        self._load = load
+        self._value: T = _UNSET
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _UNSET
+
+    def resolve(self) -> T:
+        if self._value is _UNSET:
+            self._value = self._load()
+        return self._value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __bool__(self) -> bool:
+        return bool(self.resolve())
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.resolve())
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.resolve()[key]
+
+    def __contains__(self, item: object) -> bool:
+        return item in self.resolve()
+
+    def __eq__(self, other: object) -> bool:
+        return self.resolve() == other
+
+    __hash__ = None
+
+    def __str__(self) -> str:
+        return str(self.resolve())
+
+    def __repr__(self) -> str:
+        return f"Lazy({self.resolve()!r})" if self.loaded else "Lazy(<not loaded>)"
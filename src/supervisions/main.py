@@ -1,4 +1,7 @@
 import argparse
+import shlex
+import sys
+from typing import TextIO
 
 from supervisions.user_control import User, UserRegistry, list_permissions, parse_role
 
@@ -20,6 +23,7 @@ def execute_user_creation(
     new_role: str,
     new_password: str | None = None,
     new_category: str | None = None,
+    list_users: bool = True,
 ) -> str:
     actor = User(username=actor_username, role=parse_role(actor_role))
     registry = UserRegistry()
@@ -31,18 +35,33 @@ def execute_user_creation(
         password=created_password,
         category=new_category,
     )
-    users = ", ".join(
-        f"{user.username}:{user.role.value}:{user.category.value if user.category else '-'}"
-        for user in registry.list_users()
+    from supervisions.audit import USER_CREATE, audit_log_for
+    from supervisions.user_store import UserStore
+
+    audit_log = audit_log_for(UserStore.default_file_path().parent)
+    audit_log.record(
+        actor.username,
+        USER_CREATE,
+        created.username,
+        role=created.role.value,
+        category=created.category.value if created.category else None,
     )
+    audit_log.flush()
     created_category = created.category.value if created.category else "-"
-    return (
+    summary = (
         f"created={created.username}:{created.role.value}:{created_category} "
-        f"password={created_password} users=[{users}]"
+        f"password={created_password}"
     )
+    if not list_users:
+        return summary
+    users = ", ".join(
+        f"{user.username}:{user.role.value}:{user.category.value if user.category else '-'}"
+        for user in registry.list_users()
+    )
+    return f"{summary} users=[{users}]"
 
 
-def main() -> None:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Supervisions role demo")
     parser.add_argument(
         "--role",
@@ -74,7 +93,146 @@ def main() -> None:
         default="student",
         help="Regular user category: professor or student (used when create-role=regular)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--no-list",
+        action="store_true",
+        help="Do not list every user after --create-user",
+    )
+    parser.add_argument(
+        "--script",
+        default="",
+        help="File with one subcommand per line, applied with a single commit",
+    )
+
+    subcommands = parser.add_subparsers(dest="command", metavar="command")
+
+    create = subcommands.add_parser("create", help="Create a user (admin only)")
+    create.add_argument("new_username", metavar="username")
+    create.add_argument("--role", dest="new_role", default="regular", help="admin or regular")
+    create.add_argument(
+        "--category", dest="new_category", default="student", help="professor or student"
+    )
+    create.add_argument(
+        "--password", dest="new_password", default="", help="Default: <username>123"
+    )
+    create.add_argument(
+        "--list", dest="list_users", action="store_true", help="List every user afterwards"
+    )
+
+    delete = subcommands.add_parser("delete", help="Delete a user (admin only)")
+    delete.add_argument("target_username", metavar="username")
+
+    subcommands.add_parser("list", help="List every user")
+
+    set_advisor = subcommands.add_parser("set-advisor", help="Set or clear a student's advisor")
+    set_advisor.add_argument("student")
+    set_advisor.add_argument("slot", choices=["advisor_1", "advisor_2"])
+    set_advisor.add_argument("professor_name", nargs="?", default=None)
+
+    requests = subcommands.add_parser("requests", help="Supervision requests")
+    requests_commands = requests.add_subparsers(
+        dest="requests_command", metavar="action", required=True
+    )
+    requests_list = requests_commands.add_parser("list", help="List supervision requests")
+    requests_list.add_argument("--status", default=None)
+    requests_list.add_argument("--professor", default=None)
+    requests_list.add_argument("--student", default=None)
+    requests_decide = requests_commands.add_parser("decide", help="Accept or reject a request")
+    requests_decide.add_argument("request_id", type=int)
+    requests_decide.add_argument("decision", choices=["accepted", "rejected"])
+    requests_decide.add_argument(
+        "--capacity", type=int, default=None, help="Refuse to exceed this many advisees"
+    )
+
+    counters = subcommands.add_parser("counters", help="Per-professor advisee counters")
+    counters_commands = counters.add_subparsers(
+        dest="counters_command", metavar="action", required=True
+    )
+    counters_commands.add_parser("show", help="Print advisees and pending requests")
+    counters_commands.add_parser("repair", help="Rebuild the counters and report drift")
+
+    reports = subcommands.add_parser("reports", help="Supervision statistics")
+    reports.add_argument("--period", choices=["day", "week", "month"], default="month")
+    reports.add_argument(
+        "--workers", type=int, default=0, help="Fan chunks out to this many processes"
+    )
+    reports.add_argument("--chunk-size", type=int, default=5000)
+
+    notify = subcommands.add_parser("notify", help="Deliver queued supervision notifications")
+    notify.add_argument("--sink", choices=["jsonl", "smtp"], default="jsonl")
+    notify.add_argument(
+        "--path", default="", help="JSONL sink file (default: data/notifications.jsonl)"
+    )
+    notify.add_argument("--smtp-host", default="localhost")
+    notify.add_argument("--smtp-port", type=int, default=25)
+    notify.add_argument("--sender", default="supervisions@localhost")
+    notify.add_argument("--batch-size", type=int, default=50)
+    notify.add_argument("--max-attempts", type=int, default=5)
+    notify.add_argument("--once", action="store_true", help="Deliver one batch and exit")
+
+    audit = subcommands.add_parser("audit", help="Query the audit log")
+    audit.add_argument("--actor", default=None)
+    audit.add_argument("--action", default=None, help="user.create, user.delete, request.decide")
+    audit.add_argument("--since", default=None, help="ISO date or time, inclusive (UTC)")
+    audit.add_argument("--until", default=None, help="ISO date or time, exclusive (UTC)")
+    audit.add_argument("--limit", type=int, default=None)
+
+    storage = subcommands.add_parser("storage", help="User store layout")
+    storage_commands = storage.add_subparsers(
+        dest="storage_command", metavar="action", required=True
+    )
+    storage_migrate = storage_commands.add_parser(
+        "migrate", help="Convert the stores between JSON, shards, binary snapshots and SQLite"
+    )
+    storage_migrate.add_argument(
+        "--layout", choices=["sharded", "snapshot", "sqlite", "json"], required=True
+    )
+    storage_migrate.add_argument("--shards", type=int, default=64)
+    storage_export = storage_commands.add_parser(
+        "export", help="Write both stores as JSON into a directory"
+    )
+    storage_export.add_argument("directory")
+    return parser
+
+
+def _read_script(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> list[tuple[str, argparse.Namespace]]:
+    actor = ["--role", args.role, "--username", args.username]
+    commands: list[tuple[str, argparse.Namespace]] = []
+    with open(args.script, "r", encoding="utf-8") as file_handle:
+        for number, line in enumerate(file_handle, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            label = f"{args.script}:{number}"
+            try:
+                parsed = parser.parse_args(actor + shlex.split(line))
+            except SystemExit as error:
+                raise ValueError(f"{label}: invalid command") from error
+            if not parsed.command:
+                raise ValueError(f"{label}: expected a subcommand")
+            commands.append((label, parsed))
+    return commands
+
+
+def run(argv: list[str]) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.script or args.command:
+        from supervisions.commands import run_commands
+
+        try:
+            commands = _read_script(parser, args) if args.script else [("", args)]
+            outputs = run_commands(commands)
+        except (OSError, PermissionError, ValueError) as error:
+            print(f"error: {error}")
+            return 1
+        for output in outputs:
+            if output:
+                print(output)
+        return 0
 
     if args.create_user:
         try:
@@ -86,14 +244,44 @@ def main() -> None:
                     new_role=args.create_role,
                     new_password=args.create_password or None,
                     new_category=args.create_category,
+                    list_users=not args.no_list,
                 )
             )
         except (PermissionError, ValueError) as error:
             print(f"error: {error}")
-            raise SystemExit(1) from error
-        return
+            return 1
+        return 0
 
     print(get_message(role=args.role, username=args.username))
+    return 0
+
+
+def run_shell(lines: TextIO) -> int:
+    status = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            line_status = run(shlex.split(line))
+        except SystemExit as error:
+            line_status = error.code if isinstance(error.code, int) else 1
+        except ValueError as error:
+            print(f"error: {error}")
+            line_status = 1
+        sys.stdout.flush()
+        status = status or line_status
+    return status
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = sys.argv[1:] if argv is None else argv
+    if arguments[:1] == ["shell"]:
+        status = run_shell(sys.stdin)
+    else:
+        status = run(arguments)
+    if status:
+        raise SystemExit(status)
 
 
 if __name__ == "__main__":
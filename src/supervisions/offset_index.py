@@ -0,0 +1,105 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+INDEX_SUFFIX = ".idx"
+MAGIC = b"SVIDX001"
+
+_HEADER = struct.Struct("<8sqqqI")
+_ENTRY = struct.Struct("<QIII")
+
+
+class IndexUnavailable(LookupError):
+    pass
+
+
+class IndexedMapping:
+    def __init__(self, data: dict[str, object]) -> None:
+        self.data = data
+        self._entries: list[tuple[bytes, int, int]] = []
+
+    def encode(self) -> bytes:
+        if not self.data:
+            self._entries = []
+            return b"{}"
+        parts = ["{\n"]
+        position = 2
+        entries: list[tuple[bytes, int, int]] = []
+        for key in sorted(self.data):
+            if entries:
+                parts.append(",\n")
+                position += 2
+            prefix = f"  {json.dumps(key)}: "
+            record = json.dumps(self.data[key], indent=2, sort_keys=True).replace("\n", "\n  ")
+            position += len(prefix)
+            entries.append((key.encode("utf-8"), position, len(record)))
+            parts.append(prefix)
+            parts.append(record)
+            position += len(record)
+        parts.append("\n}")
+        self._entries = entries
+        return "".join(parts).encode("ascii")
+
+    def index(self, signature: tuple[int, int, int]) -> bytes:
+        names = bytearray()
+        entries = bytearray()
+        for name, start, length in self._entries:
+            entries += _ENTRY.pack(start, length, len(names), len(name))
+            names += name
+        header = _HEADER.pack(MAGIC, *signature, len(self._entries))
+        return header + bytes(entries) + bytes(names)
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}{INDEX_SUFFIX}")
+
+
+def write_index(path: Path, payload: bytes) -> None:
+    target = index_path(path)
+    temporary = target.with_name(f".{target.name}.{os.urandom(16).hex()}.tmp")
+    with temporary.open("wb") as file_handle:
+        file_handle.write(payload)
+    os.replace(temporary, target)
+
+
+def read_indexed_record(path: Path, key: str) -> dict[str, object] | None:
+    try:
+        index_handle = index_path(path).open("rb")
+    except FileNotFoundError as error:
+        raise IndexUnavailable(str(path)) from error
+    with index_handle, path.open("rb") as data_handle:
+        stat = os.fstat(data_handle.fileno())
+        with mmap.mmap(index_handle.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            magic, mtime_ns, size, inode, count = _HEADER.unpack_from(index)
+            if magic != MAGIC or (mtime_ns, size, inode) != (
+                stat.st_mtime_ns,
+                stat.st_size,
+                stat.st_ino,
+            ):
+                raise IndexUnavailable(str(path))
+            located = _search(index, count, key.encode("utf-8"))
+        if located is None:
+            return None
+        start, length = located
+        with mmap.mmap(data_handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return json.loads(data[start : start + length])
+
+
+def _search(index: mmap.mmap, count: int, name: bytes) -> tuple[int, int] | None:
+    names_start = _HEADER.size + count * _ENTRY.size
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        start, length, name_offset, name_length = _ENTRY.unpack_from(
+            index, _HEADER.size + middle * _ENTRY.size
+        )
+        candidate = index[names_start + name_offset : names_start + name_offset + name_length]
+        if candidate == name:
+            return start, length
+        if candidate < name:
+            low = middle + 1
+        else:
+            high = middle
+    return None
@@ -0,0 +1,301 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, ContextManager, Protocol
+
+from supervisions.change_feed import REQUEST_CREATED, REQUEST_DECIDED
+from supervisions.storage import file_lock, read_data_file, write_data_files
+from supervisions.supervision_requests import SupervisionRequest
+from supervisions.user_store import UserStore, open_user_store
+
+PENDING = "pending"
+DEAD = "dead"
+
+_OUTBOX_FILE_NAME = "outbox.json"
+
+
+@dataclass(frozen=True)
+class Notification:
+    id: str
+    kind: str
+    request: dict[str, object]
+    created_at: float
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_error: str | None = None
+    status: str = PENDING
+
+
+@dataclass(frozen=True)
+class Message:
+    to: str
+    subject: str
+    body: str
+
+
+def new_notification(kind: str, request: SupervisionRequest) -> Notification:
+    return Notification(
+        id=uuid.uuid4().hex, kind=kind, request=asdict(request), created_at=time.time()
+    )
+
+
+class Outbox:
+    def __init__(self, file_path: Path) -> None:
+        self._file_path = file_path
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    def lock(self) -> ContextManager[None]:
+        return file_lock(self._file_path.with_name(f"{self._file_path.name}.lock"))
+
+    def all(self) -> list[Notification]:
+        return [Notification(**item) for item in self._read_raw()]
+
+    def due(self, now: float, limit: int) -> list[Notification]:
+        due: list[Notification] = []
+        for notification in self.all():
+            if notification.status == PENDING and notification.next_attempt_at <= now:
+                due.append(notification)
+                if len(due) >= limit:
+                    break
+        return due
+
+    def add(self, notifications: list[Notification]) -> None:
+        with self.lock():
+            self._write_raw(self._read_raw() + [asdict(item) for item in notifications])
+
+    def settle(self, delivered: set[str], retried: dict[str, Notification]) -> None:
+        with self.lock():
+            data = [
+                asdict(retried[item["id"]]) if item["id"] in retried else item
+                for item in self._read_raw()
+                if item["id"] not in delivered
+            ]
+            self._write_raw(data)
+
+    def _read_raw(self) -> list[dict[str, object]]:
+        return read_data_file(self._file_path, [])
+
+    def _write_raw(self, data: list[dict[str, object]]) -> None:
+        write_data_files({self._file_path: data})
+
+
+def outbox_for(directory: Path) -> Outbox:
+    return Outbox(directory / _OUTBOX_FILE_NAME)
+
+
+class Sink(Protocol):
+    def send(self, messages: list[Message]) -> list[str | None]: ...
+
+
+class JsonlSink:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def send(self, messages: list[Message]) -> list[str | None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as file_handle:
+            for message in messages:
+                file_handle.write(json.dumps(asdict(message), sort_keys=True) + "\n")
+            file_handle.flush()
+            os.fsync(file_handle.fileno())
+        return [None] * len(messages)
+
+
+class SmtpSink:
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        sender: str = "supervisions@localhost",
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, messages: list[Message]) -> list[str | None]:
+        import smtplib
+        from email.message import EmailMessage
+
+        errors: list[str | None] = []
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            for message in messages:
+                email = EmailMessage()
+                email["From"] = self.sender
+                email["To"] = message.to
+                email["Subject"] = message.subject
+                email.set_content(message.body)
+                try:
+                    smtp.send_message(email)
+                except smtplib.SMTPException as error:
+                    errors.append(str(error) or type(error).__name__)
+                else:
+                    errors.append(None)
+        return errors
+
+
+@dataclass(frozen=True)
+class DeliveryReport:
+    delivered: int = 0
+    skipped: int = 0
+    retried: int = 0
+    dead: int = 0
+
+    @property
+    def attempted(self) -> int:
+        return self.delivered + self.skipped + self.retried + self.dead
+
+
+class NotificationWorker:
+    def __init__(
+        self,
+        outbox: Outbox,
+        sink: Sink,
+        users: UserStore | None = None,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.outbox = outbox
+        self.sink = sink
+        self.users = users or open_user_store()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> DeliveryReport:
+        now = self._clock()
+        batch = self.outbox.due(now, self.batch_size)
+        if not batch:
+            return DeliveryReport()
+
+        recipients = _Recipients(self.users)
+        addressed: list[tuple[Notification, Message]] = []
+        delivered: set[str] = set()
+        for notification in batch:
+            message = _message(notification, recipients)
+            if message is None:
+                delivered.add(notification.id)
+            else:
+                addressed.append((notification, message))
+        skipped = len(delivered)
+
+        try:
+            errors = self.sink.send([message for _, message in addressed]) if addressed else []
+        except OSError as error:
+            errors = [str(error) or type(error).__name__] * len(addressed)
+
+        retried: dict[str, Notification] = {}
+        for (notification, _), error in zip(addressed, errors):
+            if error is None:
+                delivered.add(notification.id)
+            else:
+                retried[notification.id] = self._failed(notification, error, now)
+        self.outbox.settle(delivered, retried)
+        dead = sum(1 for notification in retried.values() if notification.status == DEAD)
+        return DeliveryReport(
+            delivered=len(delivered) - skipped,
+            skipped=skipped,
+            retried=len(retried) - dead,
+            dead=dead,
+        )
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                report = self.run_once()
+            except OSError:
+                logging.getLogger(__name__).exception("notification delivery failed")
+                report = DeliveryReport()
+            if report.attempted < self.batch_size:
+                self._stopped.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, name="notification-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _failed(self, notification: Notification, error: str, now: float) -> Notification:
+        attempts = notification.attempts + 1
+        if attempts >= self.max_attempts:
+            return replace(notification, attempts=attempts, last_error=error, status=DEAD)
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return replace(
+            notification, attempts=attempts, last_error=error, next_attempt_at=now + delay
+        )
+
+
+class _Recipients:
+    def __init__(self, users: UserStore) -> None:
+        self._users = users
+        self._professors: dict[str, str] | None = None
+
+    def professor(self, full_name: str) -> str | None:
+        if self._professors is None:
+            self._professors = {
+                stored.full_name.strip(): stored.email
+                for stored in self._users.iter_all()
+                if stored.role == "regular"
+                and stored.category == "professor"
+                and stored.full_name
+                and stored.email
+            }
+        return self._professors.get(full_name.strip())
+
+    def user(self, username: str) -> str | None:
+        stored = self._users.get(username)
+        return stored.email if stored is not None else None
+
+
+def _message(notification: Notification, recipients: _Recipients) -> Message | None:
+    request = SupervisionRequest(**notification.request)
+    slot = request.slot.replace("_", " ")
+    if notification.kind == REQUEST_CREATED:
+        to = recipients.professor(request.professor_name)
+        subject = f"New supervision request from {request.student_name}"
+        body = (
+            f"{request.student_name} ({request.student_username}) asked you to be their "
+            f"{slot}. Open your dashboard to accept or reject request {request.id}."
+        )
+    elif notification.kind == REQUEST_DECIDED:
+        to = recipients.user(request.student_username)
+        subject = f"Supervision request {request.status}"
+        body = f"{request.professor_name} {request.status} your request for {slot}."
+    else:
+        return None
+    return None if to is None else Message(to=to, subject=subject, body=body)
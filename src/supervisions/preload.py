@@ -0,0 +1,41 @@
+import gc
+from dataclasses import dataclass
+
+from flask import Flask
+
+from supervisions.assets import publish_assets
+from supervisions.professor_counters import ProfessorCounters
+from supervisions.sqlite_request_store import close_connections
+from supervisions.supervision_requests import open_request_store
+from supervisions.templating import warm_templates
+from supervisions.user_search import UserSearchIndex
+from supervisions.user_store import open_user_store
+
+
+@dataclass(frozen=True)
+class PreloadReport:
+    users: int
+    requests: int
+    templates: int
+    frozen: int
+
+
+def preload(app: Flask) -> PreloadReport:
+    user_store = open_user_store()
+    request_store = open_request_store()
+    users = user_store.all()
+    requests = request_store.all()
+    user_store.unique_index()
+    UserSearchIndex(user_store).refresh()
+    ProfessorCounters(user_store, request_store).refresh()
+    publish_assets(app)
+    templates = warm_templates(app)
+    close_connections()
+    gc.collect()
+    gc.freeze()
+    return PreloadReport(
+        users=len(users),
+        requests=len(requests),
+        templates=len(templates),
+        frozen=gc.get_freeze_count(),
+    )
@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ContextManager
+
+from supervisions.change_feed import (
+    REQUEST_CREATED,
+    REQUEST_DECIDED,
+    USER_CREATED,
+    USER_DELETED,
+    USER_UPDATED,
+    ChangeEvent,
+    feed_for,
+)
+from supervisions.storage import (
+    SnapshotCache,
+    file_lock,
+    file_signature,
+    read_data_file,
+    write_data_files,
+)
+from supervisions.supervision_requests import SupervisionRequestStore, open_request_store
+from supervisions.user_store import UserStore, open_user_store
+
+COUNTERS_FILE_NAME = "professor_counters.json"
+_EVENT_BATCH = 1000
+
+
+@dataclass(frozen=True)
+class ProfessorCount:
+    advisees: int = 0
+    pending: int = 0
+
+
+@dataclass(frozen=True)
+class CounterDrift:
+    professor_name: str
+    stored: ProfessorCount
+    actual: ProfessorCount
+
+
+Counts = dict[str, ProfessorCount]
+
+_snapshots: SnapshotCache[tuple[int, Counts]] = SnapshotCache()
+
+
+class ProfessorCounters:
+    def __init__(
+        self,
+        user_store: UserStore | None = None,
+        request_store: SupervisionRequestStore | None = None,
+    ) -> None:
+        self._users = user_store or open_user_store()
+        self._requests = request_store or open_request_store()
+        directory = self._requests.file_path.parent
+        self._file_path = directory / COUNTERS_FILE_NAME
+        self._feed = feed_for(directory)
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    def get(self, professor_name: str) -> ProfessorCount:
+        return self.refresh().get(professor_name, ProfessorCount())
+
+    def refresh(self) -> Counts:
+        cached = _snapshots.peek(self._file_path)
+        if cached is not None and cached[0] == self._feed.last_seq():
+            return cached[1]
+        with self._lock():
+            seq, counts, changed = self._caught_up()
+            if changed:
+                self._write(seq, counts)
+            else:
+                _snapshots.put(self._file_path, file_signature(self._file_path), (seq, counts))
+        return counts
+
+    def repair(self) -> list[CounterDrift]:
+        with self._lock():
+            _, stored, _ = self._caught_up()
+            seq, actual = self._rebuild()
+            self._write(seq, actual)
+        drifts = []
+        for name in sorted(set(stored) | set(actual)):
+            before = stored.get(name, ProfessorCount())
+            after = actual.get(name, ProfessorCount())
+            if before != after:
+                drifts.append(CounterDrift(professor_name=name, stored=before, actual=after))
+        return drifts
+
+    def _lock(self) -> ContextManager[None]:
+        return file_lock(self._file_path.with_name(f"{self._file_path.name}.lock"))
+
+    def _caught_up(self) -> tuple[int, Counts, bool]:
+        persisted = read_data_file(self._file_path, None)
+        last_seq = self._feed.last_seq()
+        if persisted is None or persisted["seq"] > last_seq:
+            return (*self._rebuild(), True)
+        seq = persisted["seq"]
+        counts = {
+            name: [values["advisees"], values["pending"]]
+            for name, values in persisted["professors"].items()
+        }
+        while seq < last_seq:
+            events = self._feed.events_since(seq, limit=_EVENT_BATCH)
+            if not events:
+                break
+            if events[0].seq != seq + 1:
+                return (*self._rebuild(), True)
+            for event in events:
+                _apply(counts, event)
+            seq = events[-1].seq
+        return seq, _frozen(counts), seq != persisted["seq"]
+
+    def _rebuild(self) -> tuple[int, Counts]:
+        seq = self._feed.last_seq()
+        counts: dict[str, list[int]] = {}
+        for user in self._users.iter_all():
+            if user.role == "regular" and user.category == "professor":
+                counts.setdefault((user.full_name or "").strip() or user.username, [0, 0])
+            for advisor in _advisors(user.role, user.category, user.advisor_1, user.advisor_2):
+                counts.setdefault(advisor, [0, 0])[0] += 1
+        for request in self._requests.page(limit=None, status="pending"):
+            counts.setdefault(request.professor_name, [0, 0])[1] += 1
+        return seq, _frozen(counts)
+
+    def _write(self, seq: int, counts: Counts) -> None:
+        data = {
+            "seq": seq,
+            "professors": {
+                name: {"advisees": count.advisees, "pending": count.pending}
+                for name, count in counts.items()
+            },
+        }
+        signatures = write_data_files({self._file_path: data})
+        _snapshots.put(self._file_path, signatures[self._file_path], (seq, counts))
+
+
+def _advisors(
+    role: object, category: object, advisor_1: object, advisor_2: object
+) -> set[str]:
+    if role != "regular" or category != "student":
+        return set()
+    return {advisor for advisor in (advisor_1, advisor_2) if isinstance(advisor, str) and advisor}
+
+
+def _record_advisors(record: dict[str, object]) -> set[str]:
+    return _advisors(
+        record.get("role"), record.get("category"), record.get("advisor_1"), record.get("advisor_2")
+    )
+
+
+def _apply(counts: dict[str, list[int]], event: ChangeEvent) -> None:
+    if event.kind in {USER_CREATED, USER_UPDATED, USER_DELETED}:
+        before: set[str] = set()
+        after: set[str] = set()
+        if event.kind == USER_UPDATED:
+            before = _record_advisors({**event.data["user"], **event.data["previous"]})
+        if event.kind == USER_DELETED:
+            before = _record_advisors(event.data["previous"])
+        else:
+            after = _record_advisors(event.data["user"])
+        for advisor in before - after:
+            counts.setdefault(advisor, [0, 0])[0] -= 1
+        for advisor in after - before:
+            counts.setdefault(advisor, [0, 0])[0] += 1
+    elif event.kind == REQUEST_CREATED:
+        counts.setdefault(event.data["request"]["professor_name"], [0, 0])[1] += 1
+        replaced = event.data.get("replaced")
+        if replaced:
+            counts.setdefault(replaced["professor_name"], [0, 0])[1] -= 1
+    elif event.kind == REQUEST_DECIDED:
+        counts.setdefault(event.data["request"]["professor_name"], [0, 0])[1] -= 1
+
+
+def _frozen(counts: dict[str, list[int]]) -> Counts:
+    return {
+        name: ProfessorCount(advisees=advisees, pending=pending)
+        for name, (advisees, pending) in counts.items()
+    }
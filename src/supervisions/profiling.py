@@ -0,0 +1,352 @@
+import cProfile
+import itertools
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Protocol
+
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    abort,
+    current_app,
+    g,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
+
+from supervisions.storage import counting_reads
+from supervisions.user_control import User, can, parse_role
+
+CPROFILE = "cprofile"
+SAMPLE = "sample"
+MODES = (CPROFILE, SAMPLE)
+HEADER_NAME = "X-Profile"
+QUERY_PARAM = "profile"
+DEFAULT_CAPACITY = 32
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_cprofile_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class FunctionCost:
+    name: str
+    calls: int
+    self_ms: float
+    cumulative_ms: float
+
+
+@dataclass(frozen=True)
+class ProfileCapture:
+    id: int
+    mode: str
+    method: str
+    path: str
+    route: str
+    status: int
+    started_at: float
+    wall_ms: float
+    cpu_ms: float
+    reads: dict[str, int]
+    functions: tuple[FunctionCost, ...]
+    data: bytes
+
+    @property
+    def filename(self) -> str:
+        extension = "pstats" if self.mode == CPROFILE else "folded"
+        return f"profile-{self.id}.{extension}"
+
+    @property
+    def total_reads(self) -> int:
+        return sum(self.reads.values())
+
+    def top(self, limit: int = 25) -> list[FunctionCost]:
+        return sorted(self.functions, key=lambda cost: cost.self_ms, reverse=True)[:limit]
+
+
+@dataclass(frozen=True)
+class FunctionDelta:
+    name: str
+    before_ms: float
+    after_ms: float
+
+    @property
+    def delta_ms(self) -> float:
+        return self.after_ms - self.before_ms
+
+
+def diff(before: ProfileCapture, after: ProfileCapture, limit: int = 25) -> list[FunctionDelta]:
+    before_costs = {cost.name: cost.self_ms for cost in before.functions}
+    after_costs = {cost.name: cost.self_ms for cost in after.functions}
+    deltas = [
+        FunctionDelta(name, before_costs.get(name, 0.0), after_costs.get(name, 0.0))
+        for name in before_costs.keys() | after_costs.keys()
+    ]
+    deltas.sort(key=lambda delta: (-abs(delta.delta_ms), delta.name))
+    return deltas[:limit]
+
+
+class ProfileBuffer:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._captures: deque[ProfileCapture] = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._captures)
+
+    def add(self, **fields: object) -> ProfileCapture:
+        with self._lock:
+            capture = ProfileCapture(id=next(self._ids), **fields)
+            self._captures.append(capture)
+        return capture
+
+    def all(self) -> list[ProfileCapture]:
+        with self._lock:
+            return list(reversed(self._captures))
+
+    def get(self, capture_id: int) -> ProfileCapture | None:
+        with self._lock:
+            return next((item for item in self._captures if item.id == capture_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._captures.clear()
+
+
+class Profiler(Protocol):
+    def start(self) -> None: ...
+
+    def stop(self) -> tuple[tuple[FunctionCost, ...], bytes]: ...
+
+
+class CProfileProfiler:
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        if not _cprofile_lock.acquire(blocking=False):
+            raise ValueError("Another cProfile capture is already running")
+        try:
+            self._profile.enable()
+        except BaseException:
+            _cprofile_lock.release()
+            raise
+
+    def stop(self) -> tuple[tuple[FunctionCost, ...], bytes]:
+        self._profile.disable()
+        _cprofile_lock.release()
+        stats = pstats.Stats(self._profile).stats
+        functions = tuple(
+            FunctionCost(pstats.func_std_string(function), calls, own * 1000, total * 1000)
+            for function, (_, calls, own, total, _) in stats.items()
+        )
+        return functions, marshal.dumps(stats)
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target = threading.get_ident()
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> tuple[tuple[FunctionCost, ...], bytes]:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        interval_ms = self.interval * 1000
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+        functions = tuple(
+            FunctionCost(name, 0, own[name] * interval_ms, count * interval_ms)
+            for name, count in total.items()
+        )
+        folded = "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in sorted(self._stacks.items())
+        )
+        return functions, folded.encode("utf-8")
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_firstlineno}({code.co_name})")
+                frame = frame.f_back
+            if stack:
+                self._stacks[tuple(reversed(stack))] += 1
+
+
+@dataclass
+class _Capture:
+    mode: str
+    profiler: Profiler
+    reads: Counter[str]
+    resources: ExitStack
+    started_at: float
+    wall_start: float
+    cpu_start: float
+
+
+profiles = Blueprint("profiles", __name__, url_prefix="/admin/profiles")
+
+
+def configure_profiling(app: Flask, capacity: int = DEFAULT_CAPACITY) -> ProfileBuffer:
+    buffer = ProfileBuffer(capacity)
+    app.extensions["profiles"] = buffer
+    app.config.setdefault("PROFILE_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL)
+    app.before_request(_start_capture)
+    app.after_request(_finish_capture)
+    app.teardown_request(_abandon_capture)
+    app.register_blueprint(profiles)
+    return buffer
+
+
+def _actor() -> User | None:
+    username = session.get("username")
+    role = session.get("role")
+    if not username or not role:
+        return None
+    try:
+        return User(username=username, role=parse_role(role))
+    except ValueError:
+        return None
+
+
+def _requested_mode() -> str | None:
+    value = (request.headers.get(HEADER_NAME) or request.args.get(QUERY_PARAM, "")).strip()
+    if not value:
+        return None
+    return SAMPLE if value.lower() == SAMPLE else CPROFILE
+
+
+def _start_capture() -> None:
+    mode = _requested_mode()
+    if mode is None or request.blueprint == profiles.name:
+        return
+    actor = _actor()
+    if actor is None or not can(actor, "reports:view"):
+        return
+    profiler: Profiler
+    if mode == CPROFILE:
+        profiler = CProfileProfiler()
+        try:
+            profiler.start()
+        except ValueError:
+            mode = SAMPLE
+    if mode == SAMPLE:
+        profiler = SamplingProfiler(current_app.config["PROFILE_SAMPLE_INTERVAL"])
+        profiler.start()
+    resources = ExitStack()
+    reads = resources.enter_context(counting_reads())
+    g.profile_capture = _Capture(
+        mode=mode,
+        profiler=profiler,
+        reads=reads,
+        resources=resources,
+        started_at=time.time(),
+        wall_start=time.perf_counter(),
+        cpu_start=time.thread_time(),
+    )
+
+
+def _finish_capture(response: Response) -> Response:
+    capture: _Capture | None = g.pop("profile_capture", None)
+    if capture is None:
+        return response
+    functions, data = capture.profiler.stop()
+    wall_ms = (time.perf_counter() - capture.wall_start) * 1000
+    cpu_ms = (time.thread_time() - capture.cpu_start) * 1000
+    capture.resources.close()
+    buffer: ProfileBuffer = current_app.extensions["profiles"]
+    saved = buffer.add(
+        mode=capture.mode,
+        method=request.method,
+        path=request.path,
+        route=request.url_rule.rule if request.url_rule is not None else request.path,
+        status=response.status_code,
+        started_at=capture.started_at,
+        wall_ms=wall_ms,
+        cpu_ms=cpu_ms,
+        reads=dict(sorted(capture.reads.items())),
+        functions=functions,
+        data=data,
+    )
+    response.headers["X-Profile-Id"] = str(saved.id)
+    return response
+
+
+def _abandon_capture(error: BaseException | None) -> None:
+    capture: _Capture | None = g.pop("profile_capture", None)
+    if capture is not None:
+        capture.profiler.stop()
+        capture.resources.close()
+
+
+def _require_reports() -> ProfileBuffer:
+    actor = _actor()
+    if actor is None:
+        abort(redirect(url_for("login_page")))
+    if not can(actor, "reports:view"):
+        abort(403)
+    return current_app.extensions["profiles"]
+
+
+def _capture_arg(buffer: ProfileBuffer, name: str) -> ProfileCapture | None:
+    value = request.args.get(name, type=int)
+    return buffer.get(value) if value is not None else None
+
+
+@profiles.get("")
+def list_profiles():
+    buffer = _require_reports()
+    selected = _capture_arg(buffer, "id")
+    before = _capture_arg(buffer, "before")
+    after = _capture_arg(buffer, "after")
+    return render_template(
+        "profiles.html",
+        captures=buffer.all(),
+        capacity=buffer.capacity,
+        selected=selected,
+        before=before,
+        after=after,
+        deltas=diff(before, after) if before is not None and after is not None else None,
+    )
+
+
+@profiles.get("/<int:capture_id>/download")
+def download_profile(capture_id: int):
+    capture = _require_reports().get(capture_id)
+    if capture is None:
+        abort(404)
+    return Response(
+        capture.data,
+        mimetype="application/octet-stream" if capture.mode == CPROFILE else "text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{capture.filename}"'},
+    )
@@ -0,0 +1,281 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from supervisions.coalescing import SingleFlightCache
+from supervisions.supervision_requests import (
+    SupervisionRequest,
+    SupervisionRequestStore,
+    open_request_store,
+)
+from supervisions.user_store import UserStore, open_user_store
+
+PERIODS = ("day", "week", "month")
+DEFAULT_CHUNK_SIZE = 5000
+
+T = TypeVar("T")
+Partial = Counter[tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class AdvisorLoad:
+    professor_name: str
+    advisees: int
+    pending: int
+
+
+@dataclass(frozen=True)
+class PeriodCounts:
+    period: str
+    created: int
+    accepted: int
+    rejected: int
+
+
+@dataclass(frozen=True)
+class AcceptanceRate:
+    professor_name: str
+    accepted: int
+    rejected: int
+
+    @property
+    def rate(self) -> float | None:
+        decided = self.accepted + self.rejected
+        return self.accepted / decided if decided else None
+
+
+@dataclass(frozen=True)
+class SupervisionReport:
+    version: str
+    period: str
+    advisor_load: list[AdvisorLoad]
+    requests_per_period: list[PeriodCounts]
+    acceptance_rates: list[AcceptanceRate]
+    students_without_advisors: list[str]
+
+
+_reports: SingleFlightCache[SupervisionReport] = SingleFlightCache()
+_executors: dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def supervision_report(
+    period: str = "month",
+    workers: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    user_store: UserStore | None = None,
+    request_store: SupervisionRequestStore | None = None,
+) -> SupervisionReport:
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'. Use one of: {', '.join(PERIODS)}")
+    user_store = user_store or open_user_store()
+    request_store = request_store or open_request_store()
+    version = f"{user_store.version()}:{request_store.version()}"
+    return _reports.get(
+        (user_store.file_path, request_store.file_path, period),
+        version,
+        partial(_build, version, period, workers, chunk_size, user_store, request_store),
+    )
+
+
+def clear_report_cache() -> None:
+    _reports.clear()
+
+
+def _build(
+    version: str,
+    period: str,
+    workers: int,
+    chunk_size: int,
+    user_store: UserStore,
+    request_store: SupervisionRequestStore,
+) -> SupervisionReport:
+    user_chunks = _chunks(
+        (
+            (
+                user.username,
+                user.role,
+                user.category,
+                user.full_name,
+                user.advisor_1,
+                user.advisor_2,
+            )
+            for user in user_store.iter_all()
+        ),
+        chunk_size,
+    )
+    request_chunks = _chunks(
+        (
+            (request.professor_name, request.status, request.created_at, request.decided_at)
+            for request in _iter_requests(request_store, chunk_size)
+        ),
+        chunk_size,
+    )
+
+    stages = (
+        (_summarize_users, user_chunks),
+        (partial(_summarize_requests, period=period), request_chunks),
+    )
+    totals: Partial = Counter()
+    if workers > 0:
+        executor = _executor(workers)
+        for summarize, chunks in stages:
+            for counts in _map_bounded(executor, summarize, chunks, workers * 2):
+                totals.update(counts)
+    else:
+        for summarize, chunks in stages:
+            for counts in map(summarize, chunks):
+                totals.update(counts)
+    return _report(version, period, totals)
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            executor = _executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=context
+            )
+        return executor
+
+
+def _drop_inherited_executors() -> None:
+    global _executors_lock
+    _executors.clear()
+    _executors_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_drop_inherited_executors)
+
+
+def _iter_requests(
+    store: SupervisionRequestStore, chunk_size: int
+) -> Iterator[SupervisionRequest]:
+    after: int | None = None
+    while True:
+        page = store.page(after=after, limit=chunk_size)
+        yield from page
+        if len(page) < chunk_size:
+            return
+        after = page[-1].id
+
+
+def _chunks(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_bounded(
+    executor: Executor,
+    function: Callable[[list[T]], Partial],
+    chunks: Iterator[list[T]],
+    in_flight: int,
+) -> Iterator[Partial]:
+    pending: list[Future] = []
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= in_flight:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def _summarize_users(chunk: list[tuple]) -> Partial:
+    counts: Partial = Counter()
+    for username, role, category, full_name, advisor_1, advisor_2 in chunk:
+        if role != "regular":
+            continue
+        if category == "professor":
+            counts[("professor", (full_name or "").strip() or username)] += 1
+        elif category == "student":
+            advisors = {advisor for advisor in (advisor_1, advisor_2) if advisor}
+            for advisor in advisors:
+                counts[("advisees", advisor)] += 1
+            if not advisors:
+                counts[("unadvised", username)] += 1
+    return counts
+
+
+def _summarize_requests(chunk: list[tuple], period: str) -> Partial:
+    counts: Partial = Counter()
+    for professor_name, status, created_at, decided_at in chunk:
+        counts[(status, professor_name)] += 1
+        if created_at is not None:
+            counts[("created@", _period_key(created_at, period))] += 1
+        if decided_at is not None and status in {"accepted", "rejected"}:
+            counts[(f"{status}@", _period_key(decided_at, period))] += 1
+    return counts
+
+
+def _period_key(timestamp: float, period: str) -> str:
+    moment = time.gmtime(timestamp)
+    if period == "day":
+        return time.strftime("%Y-%m-%d", moment)
+    if period == "week":
+        return time.strftime("%G-W%V", moment)
+    return time.strftime("%Y-%m", moment)
+
+
+def _report(version: str, period: str, totals: Partial) -> SupervisionReport:
+    grouped: dict[str, dict[str, int]] = {}
+    for (group, name), count in totals.items():
+        grouped.setdefault(group, {})[name] = count
+
+    professors = set(grouped.get("professor", {})) | set(grouped.get("advisees", {}))
+    advisor_load = sorted(
+        (
+            AdvisorLoad(
+                professor_name=name,
+                advisees=grouped.get("advisees", {}).get(name, 0),
+                pending=grouped.get("pending", {}).get(name, 0),
+            )
+            for name in professors
+        ),
+        key=lambda load: (-load.advisees, load.professor_name),
+    )
+    periods = sorted(
+        set(grouped.get("created@", {}))
+        | set(grouped.get("accepted@", {}))
+        | set(grouped.get("rejected@", {}))
+    )
+    requests_per_period = [
+        PeriodCounts(
+            period=key,
+            created=grouped.get("created@", {}).get(key, 0),
+            accepted=grouped.get("accepted@", {}).get(key, 0),
+            rejected=grouped.get("rejected@", {}).get(key, 0),
+        )
+        for key in periods
+    ]
+    acceptance_rates = [
+        AcceptanceRate(
+            professor_name=name,
+            accepted=grouped.get("accepted", {}).get(name, 0),
+            rejected=grouped.get("rejected", {}).get(name, 0),
+        )
+        for name in sorted(set(grouped.get("accepted", {})) | set(grouped.get("rejected", {})))
+    ]
+    return SupervisionReport(
+        version=version,
+        period=period,
+        advisor_load=advisor_load,
+        requests_per_period=requests_per_period,
+        acceptance_rates=acceptance_rates,
+        students_without_advisors=sorted(grouped.get("unadvised", {})),
+    )
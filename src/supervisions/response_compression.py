@@ -0,0 +1,255 @@
+import zlib
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Protocol
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MINIMUM_SIZE = 1024
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/javascript",
+        "application/json",
+        "image/svg+xml",
+        "text/css",
+        "text/csv",
+        "text/html",
+        "text/plain",
+    }
+)
+_UNCOMPRESSED_STATUSES = {"204", "206", "304"}
+
+StartResponse = Callable[..., object]
+Headers = list[tuple[str, str]]
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def sync(self) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def sync(self) -> bytes:
+        return self._compressor.flush()
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def sync(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Zstd:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def sync(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> dict[str, Callable[[int], Compressor]]:
+    encodings: dict[str, Callable[[int], Compressor]] = {}
+    if brotli is not None:
+        encodings["br"] = lambda level: _Brotli(min(level, 11))
+    if zstandard is not None:
+        encodings["zstd"] = _Zstd
+    encodings["gzip"] = _Gzip
+    return encodings
+
+
+def negotiate(accept_encoding: str, offered: Iterable[str]) -> str | None:
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        weight = 1.0
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                weight = float(parameter[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    candidates = [(weights.get(name, wildcard), name) for name in offered]
+    best = max(candidates, key=lambda candidate: candidate[0], default=(0.0, None))
+    return best[1] if best[0] > 0 else None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: Callable[[dict, StartResponse], Iterable[bytes]],
+        minimum_size: int = MINIMUM_SIZE,
+        content_types: frozenset[str] = COMPRESSIBLE_TYPES,
+        level: int = 6,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.level = level
+        self.encodings = available_encodings()
+
+    def __call__(self, environ: dict, start_response: StartResponse) -> Iterable[bytes]:
+        encoding = negotiate(environ.get("HTTP_ACCEPT_ENCODING", ""), self.encodings)
+        if encoding is None or environ.get("REQUEST_METHOD") == "HEAD":
+            return self.app(environ, start_response)
+
+        captured: list[tuple[str, Headers, object]] = []
+
+        def capture(
+            status: str, headers: Headers, exc_info: object = None
+        ) -> Callable[[bytes], None]:
+            captured[:] = [(status, headers, exc_info)]
+            return _unsupported_write
+
+        body = self.app(environ, capture)
+        return self._respond(body, captured, encoding, start_response)
+
+    def _respond(
+        self,
+        body: Iterable[bytes],
+        captured: list[tuple[str, Headers, object]],
+        encoding: str,
+        start_response: StartResponse,
+    ) -> Iterator[bytes]:
+        try:
+            chunks = iter(body)
+            buffered: list[bytes] = []
+            if captured:
+                status, headers, exc_info = captured[0]
+            else:
+                status, headers, exc_info = self._first(chunks, captured, buffered)
+            eligible = self._eligible(status, headers)
+            length = _header(headers, "Content-Length")
+            if eligible:
+                if length is not None:
+                    try:
+                        eligible = int(length) >= self.minimum_size
+                    except ValueError:
+                        eligible = False
+                else:
+                    size = sum(len(chunk) for chunk in buffered)
+                    for chunk in chunks:
+                        buffered.append(chunk)
+                        size += len(chunk)
+                        if size >= self.minimum_size:
+                            break
+                    eligible = size >= self.minimum_size
+            if self._compressible(headers):
+                headers = _vary(headers)
+
+            if not eligible:
+                start_response(status, headers, exc_info)
+                yield from buffered
+                yield from chunks
+                return
+
+            compressor = self.encodings[encoding](self.level)
+            start_response(status, _encoded_headers(headers, encoding), exc_info)
+            for chunk in chain(buffered, chunks):
+                compressed = compressor.compress(chunk)
+                if length is None and chunk:
+                    compressed += compressor.sync()
+                if compressed:
+                    yield compressed
+            yield compressor.flush()
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+    def _first(
+        self,
+        chunks: Iterator[bytes],
+        captured: list[tuple[str, Headers, object]],
+        buffered: list[bytes],
+    ) -> tuple[str, Headers, object]:
+        for chunk in chunks:
+            buffered.append(chunk)
+            if captured:
+                break
+        if not captured:
+            raise RuntimeError("The application did not call start_response")
+        return captured[0]
+
+    def _compressible(self, headers: Headers) -> bool:
+        content_type = _header(headers, "Content-Type") or ""
+        return content_type.partition(";")[0].strip().lower() in self.content_types
+
+    def _eligible(self, status: str, headers: Headers) -> bool:
+        return (
+            status[:3] not in _UNCOMPRESSED_STATUSES
+            and self._compressible(headers)
+            and _header(headers, "Content-Encoding") is None
+            and "no-transform" not in (_header(headers, "Cache-Control") or "")
+        )
+
+
+def _unsupported_write(data: bytes) -> None:
+    raise RuntimeError("CompressionMiddleware does not support the WSGI write() callable")
+
+
+def _header(headers: Headers, name: str) -> str | None:
+    lowered = name.lower()
+    for key, value in headers:
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+def _vary(headers: Headers) -> Headers:
+    vary = _header(headers, "Vary")
+    if vary is None:
+        return [*headers, ("Vary", "Accept-Encoding")]
+    if "accept-encoding" in vary.lower() or vary.strip() == "*":
+        return headers
+    return [
+        (key, f"{value}, Accept-Encoding" if key.lower() == "vary" else value)
+        for key, value in headers
+    ]
+
+
+def _encoded_headers(headers: Headers, encoding: str) -> Headers:
+    encoded: Headers = [("Content-Encoding", encoding)]
+    for key, value in headers:
+        lowered = key.lower()
+        if lowered == "content-length":
+            continue
+        if lowered == "etag" and not value.startswith("W/"):
+            value = f"W/{value}"
+        encoded.append((key, value))
+    return encoded
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import shutil
+import threading
+import zlib
+from contextlib import ExitStack, contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Iterator
+
+from supervisions.storage import (
+    FileSignature,
+    SnapshotCache,
+    file_lock,
+    file_signature,
+    read_data_file,
+    recover_interrupted_commit,
+    write_data_files,
+)
+from supervisions.user_store import (
+    StoredUser,
+    UserSnapshot,
+    UserStore,
+    changed_fields,
+    check_fields,
+    delete_from,
+    merge_into,
+    patch_into,
+    record_from_user,
+    save_into,
+    sharded_directory,
+    user_from_record,
+)
+
+DEFAULT_SHARD_COUNT = 64
+_META_FILE_NAME = "meta.json"
+
+ShardSignatures = tuple[FileSignature | None, ...]
+
+_shards: SnapshotCache[dict[str, dict[str, str]]] = SnapshotCache()
+_merged: dict[Path, tuple[ShardSignatures, UserSnapshot]] = {}
+_merged_lock = threading.Lock()
+
+
+class ShardedUserStore(UserStore):
+    def __init__(self, file_path: Path | None = None) -> None:
+        super().__init__(file_path=file_path)
+        self._directory = sharded_directory(self._file_path)
+        self._shard_count = _read_shard_count(self._directory)
+        recover_interrupted_commit(self._directory)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def shard_count(self) -> int:
+        return self._shard_count
+
+    def shard_path(self, username: str) -> Path:
+        index = zlib.crc32(username.encode("utf-8")) % self._shard_count
+        return self._directory / f"shard-{index:03d}.json"
+
+    def shard_paths(self) -> list[Path]:
+        return [self._directory / f"shard-{index:03d}.json" for index in range(self._shard_count)]
+
+    def version(self) -> str:
+        signatures = repr(self._signatures()).encode("utf-8")
+        return hashlib.sha1(signatures).hexdigest()[:16]
+
+    def _put(self, user: StoredUser, create: bool) -> None:
+        shard_path = self.shard_path(user.username)
+        with self._shard_lock(shard_path):
+            shard = dict(self._load_shard(shard_path))
+            previous = shard.get(user.username)
+            if create and previous is not None:
+                raise ValueError(f"User '{user.username}' already exists")
+            with self._unique_guard(user.username, previous, record_from_user(user)):
+                change = save_into(shard, user)
+                if change is None:
+                    return
+                write_data_files({shard_path: shard})
+            self._emit([change])
+
+    def update_fields(self, username: str, /, **changes: str | None) -> dict[str, str | None]:
+        check_fields(changes)
+        shard_path = self.shard_path(username)
+        record = self._load_shard(shard_path).get(username)
+        if record is None:
+            raise ValueError(f"User '{username}' does not exist")
+        if not changed_fields(record, changes):
+            return {}
+        with self._shard_lock(shard_path):
+            shard = dict(self._load_shard(shard_path))
+            previous = shard.get(username)
+            with self._unique_guard(username, previous, {**(previous or {}), **changes}):
+                changed, change = patch_into(shard, username, changes)
+                if change is None:
+                    return {}
+                write_data_files({shard_path: shard})
+            self._emit([change])
+        return changed
+
+    def delete(self, username: str) -> bool:
+        shard_path = self.shard_path(username)
+        with self._shard_lock(shard_path):
+            shard = dict(self._load_shard(shard_path))
+            with self._unique_guard(username, shard.get(username), None):
+                change = delete_from(shard, username)
+                if change is None:
+                    return False
+                write_data_files({shard_path: shard})
+            self._emit([change])
+        return True
+
+    def iter_all(self) -> Iterator[StoredUser]:
+        for shard_path in self.shard_paths():
+            shard = self._load_shard(shard_path)
+            for username in sorted(shard):
+                yield user_from_record(username, shard[username])
+
+    def _load(self) -> UserSnapshot:
+        signatures = self._signatures()
+        with _merged_lock:
+            entry = _merged.get(self._directory)
+        if entry is not None and entry[0] == signatures:
+            return entry[1]
+        data: dict[str, dict[str, str]] = {}
+        for shard_path in self.shard_paths():
+            data.update(self._load_shard(shard_path))
+        snapshot = UserSnapshot(data)
+        with _merged_lock:
+            _merged[self._directory] = (signatures, snapshot)
+        return snapshot
+
+    def _record(self, username: str) -> dict[str, str] | None:
+        return self._load_shard(self.shard_path(username)).get(username)
+
+    def _signatures(self) -> ShardSignatures:
+        return tuple(file_signature(shard_path) for shard_path in self.shard_paths())
+
+    def _load_shard(self, shard_path: Path) -> dict[str, dict[str, str]]:
+        return _shards.get(shard_path, lambda: _parse_shard(shard_path))
+
+    def _shard_lock(self, shard_path: Path) -> ContextManager[None]:
+        return file_lock(shard_path.with_name(f".{shard_path.name}.lock"))
+
+    def _unique_lock(self) -> ContextManager[None]:
+        return file_lock(self._directory / ".unique.lock")
+
+    def _unaffected_unique(self) -> ContextManager[None]:
+        return nullcontext()
+
+    @contextmanager
+    def _commit_lock(self, usernames: set[str]) -> Iterator[None]:
+        with ExitStack() as locks:
+            for shard_path in sorted({self.shard_path(username) for username in usernames}):
+                locks.enter_context(self._shard_lock(shard_path))
+            locks.enter_context(self._unique_lock())
+            yield
+
+    def _write_raw(self, data: dict[str, dict[str, str]]) -> None:
+        files: dict[Path, object] = {shard_path: {} for shard_path in self.shard_paths()}
+        for username, record in data.items():
+            files[self.shard_path(username)][username] = record
+        write_data_files(files)
+
+    def _merged_files(
+        self, staged: dict[str, dict[str, str] | None]
+    ) -> dict[Path, dict[str, dict[str, str]]]:
+        files: dict[Path, dict[str, dict[str, str]]] = {}
+        for username, record in staged.items():
+            shard_path = self.shard_path(username)
+            if shard_path not in files:
+                files[shard_path] = dict(self._load_shard(shard_path))
+            merge_into(files[shard_path], {username: record})
+        return files
+
+    def _stored_files(self, files: dict[Path, dict[str, dict[str, str]]]) -> dict[Path, object]:
+        return dict(files)
+
+    def _committed(
+        self,
+        files: dict[Path, dict[str, dict[str, str]]],
+        signatures: dict[Path, FileSignature],
+    ) -> None:
+        for shard_path, shard in files.items():
+            _shards.put(shard_path, signatures[shard_path], shard)
+
+
+def migrate_to_shards(file_path: Path, shard_count: int = DEFAULT_SHARD_COUNT) -> int:
+    if shard_count < 1:
+        raise ValueError("Shard count must be at least 1")
+    directory = sharded_directory(file_path)
+    if directory.exists():
+        raise ValueError(f"User store at '{directory}' is already sharded")
+    source = UserStore(file_path)
+    with source._write_lock():
+        data = source._read_raw()
+        staging = directory.with_name(f".{directory.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        files: dict[Path, object] = {staging / _META_FILE_NAME: {"shards": shard_count}}
+        for index in range(shard_count):
+            files[staging / f"shard-{index:03d}.json"] = {}
+        for username, record in data.items():
+            index = zlib.crc32(username.encode("utf-8")) % shard_count
+            files[staging / f"shard-{index:03d}.json"][username] = record
+        write_data_files(files)
+        staging.rename(directory)
+        if file_path.exists():
+            file_path.rename(file_path.with_name(f"{file_path.name}.bak"))
+    return len(data)
+
+
+def migrate_to_json(file_path: Path) -> int:
+    directory = sharded_directory(file_path)
+    if not directory.is_dir():
+        raise ValueError(f"User store at '{file_path}' is not sharded")
+    data = ShardedUserStore(file_path)._read_raw()
+    UserStore(file_path)._write_raw(data)
+    shutil.rmtree(directory)
+    with _merged_lock:
+        _merged.pop(directory, None)
+    return len(data)
+
+
+def _read_shard_count(directory: Path) -> int:
+    try:
+        with (directory / _META_FILE_NAME).open("r", encoding="utf-8") as file_handle:
+            return int(json.load(file_handle)["shards"])
+    except FileNotFoundError:
+        return DEFAULT_SHARD_COUNT
+
+
+def _parse_shard(shard_path: Path) -> dict[str, dict[str, str]]:
+    return read_data_file(shard_path, {})
@@ -0,0 +1,282 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator
+
+from supervisions.storage import count_read, read_data_file
+from supervisions.supervision_requests import (
+    SNAPSHOT_SUFFIX,
+    SQLITE_SUFFIX,
+    SupervisionRequest,
+    SupervisionRequestStore,
+    created_change,
+    decided_change,
+)
+
+BUSY_TIMEOUT_SECONDS = 30.0
+
+_COLUMNS = (
+    "id, student_username, student_name, professor_name, slot, status, created_at, decided_at"
+)
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS supervision_requests (
+        id INTEGER PRIMARY KEY,
+        student_username TEXT NOT NULL,
+        student_name TEXT NOT NULL,
+        professor_name TEXT NOT NULL,
+        slot TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at INTEGER,
+        decided_at INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS supervision_requests_professor "
+    "ON supervision_requests (professor_name, status)",
+    "CREATE INDEX IF NOT EXISTS supervision_requests_student "
+    "ON supervision_requests (student_username, status)",
+)
+_TIMESTAMP_COLUMNS = ("created_at", "decided_at")
+_SELECT = f"SELECT {_COLUMNS} FROM supervision_requests"
+_INSERT = f"INSERT INTO supervision_requests ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_PENDING_FOR_PROFESSOR = f"{_SELECT} WHERE professor_name = ? AND status = 'pending' ORDER BY id"
+_PENDING_FOR_STUDENT = f"{_SELECT} WHERE student_username = ? AND status = 'pending' ORDER BY id"
+_PENDING_FOR_SLOT = (
+    f"{_SELECT} WHERE student_username = ? AND status = 'pending' AND slot = ? ORDER BY id LIMIT 1"
+)
+_DECIDE = (
+    "UPDATE supervision_requests SET status = ?, decided_at = ? "
+    "WHERE id = ? AND professor_name = ? AND status = 'pending'"
+)
+
+_pool = threading.local()
+_inherited: list[threading.local] = []
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(
+        path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None, cached_statements=256
+    )
+    connection.execute("PRAGMA journal_mode = WAL")
+    for statement in _SCHEMA:
+        connection.execute(statement)
+    _add_timestamp_columns(connection)
+    return connection
+
+
+def _add_timestamp_columns(connection: sqlite3.Connection) -> None:
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(supervision_requests)")}
+    for column in _TIMESTAMP_COLUMNS:
+        if column not in columns:
+            connection.execute(f"ALTER TABLE supervision_requests ADD COLUMN {column} INTEGER")
+
+
+def close_connections(path: Path | None = None) -> None:
+    connections: dict[Path, sqlite3.Connection] = getattr(_pool, "connections", {})
+    for pooled_path in [path] if path is not None else list(connections):
+        connection = connections.pop(pooled_path, None)
+        if connection is not None:
+            connection.close()
+
+
+def _drop_inherited_connections() -> None:
+    global _pool
+    _inherited.append(_pool)
+    _pool = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_drop_inherited_connections)
+
+
+def bump_version(connection: sqlite3.Connection) -> None:
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    connection.execute(f"PRAGMA user_version = {int(version) + 1}")
+
+
+def replace_rows(
+    connection: sqlite3.Connection, requests: dict[int, SupervisionRequest | None]
+) -> None:
+    for request_id, request in requests.items():
+        connection.execute("DELETE FROM supervision_requests WHERE id = ?", (request_id,))
+        if request is not None:
+            connection.execute(_INSERT, _row(request))
+
+
+class SqliteSupervisionRequestStore(SupervisionRequestStore):
+    @staticmethod
+    def default_file_path() -> Path:
+        return SupervisionRequestStore.default_file_path().with_suffix(SQLITE_SUFFIX)
+
+    def version(self) -> str:
+        return str(self._connection().execute("PRAGMA user_version").fetchone()[0])
+
+    def all(self) -> list[SupervisionRequest]:
+        return self._select(f"{_SELECT} ORDER BY id")
+
+    def get(self, request_id: int) -> SupervisionRequest | None:
+        requests = self._select(f"{_SELECT} WHERE id = ?", (request_id,))
+        return requests[0] if requests else None
+
+    def create_pending(
+        self,
+        student_username: str,
+        student_name: str,
+        professor_name: str,
+        slot: str,
+    ) -> SupervisionRequest:
+        with self._transaction() as connection:
+            next_id = connection.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM supervision_requests"
+            ).fetchone()[0]
+            row = connection.execute(_PENDING_FOR_SLOT, (student_username, slot)).fetchone()
+            replaced = None if row is None else SupervisionRequest(*row)
+            if replaced is not None:
+                connection.execute("DELETE FROM supervision_requests WHERE id = ?", (replaced.id,))
+            created = SupervisionRequest(
+                id=next_id,
+                student_username=student_username,
+                student_name=student_name,
+                professor_name=professor_name,
+                slot=slot,
+                status="pending",
+                created_at=int(time.time()),
+            )
+            connection.execute(_INSERT, _row(created))
+            self._emit([created_change(created, replaced)])
+        return created
+
+    def pending_for_professor(self, professor_name: str) -> list[SupervisionRequest]:
+        return self._select(_PENDING_FOR_PROFESSOR, (professor_name,))
+
+    def pending_for_student(self, student_username: str) -> list[SupervisionRequest]:
+        return self._select(_PENDING_FOR_STUDENT, (student_username,))
+
+    def page(
+        self,
+        after: int | None = None,
+        limit: int | None = 50,
+        status: str | None = None,
+        professor_name: str | None = None,
+        student_username: str | None = None,
+    ) -> list[SupervisionRequest]:
+        clauses: list[str] = []
+        parameters: list[object] = []
+        if after is not None:
+            clauses.append("id > ?")
+            parameters.append(after)
+        for column, value in (
+            ("status", status),
+            ("professor_name", professor_name),
+            ("student_username", student_username),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                parameters.append(value)
+        query = _SELECT
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self._select(query, tuple(parameters))
+
+    def decide(self, request_id: int, professor_name: str, decision: str) -> SupervisionRequest | None:
+        with self._transaction() as connection:
+            decided_at = int(time.time())
+            if not connection.execute(
+                _DECIDE, (decision, decided_at, request_id, professor_name)
+            ).rowcount:
+                return None
+            decided = SupervisionRequest(
+                *connection.execute(f"{_SELECT} WHERE id = ?", (request_id,)).fetchone()
+            )
+            self._emit([decided_change(decided)])
+        return decided
+
+    def _read_raw(self) -> list[dict[str, object]]:
+        return [asdict(request) for request in self.all()]
+
+    def _write_raw(self, data: list[dict[str, object]]) -> None:
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM supervision_requests")
+            connection.executemany(
+                _INSERT, (_row(SupervisionRequest(**item)) for item in data)
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connections = getattr(_pool, "connections", None)
+        if connections is None:
+            connections = _pool.connections = {}
+        connection = connections.get(self._file_path)
+        if connection is None:
+            connection = connections[self._file_path] = connect(self._file_path)
+        return connection
+
+    def _select(self, query: str, parameters: tuple[object, ...] = ()) -> list[SupervisionRequest]:
+        count_read("query", self._file_path)
+        return [
+            SupervisionRequest(*row) for row in self._connection().execute(query, parameters)
+        ]
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        changes = connection.total_changes
+        try:
+            yield connection
+            if connection.total_changes != changes:
+                bump_version(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+
+def migrate_to_sqlite(file_path: Path) -> int:
+    target = file_path.with_suffix(SQLITE_SUFFIX)
+    if target.exists():
+        raise ValueError(f"Request store at '{target}' already exists")
+    source = file_path.with_suffix(SNAPSHOT_SUFFIX)
+    if not source.exists():
+        source = file_path
+    data = read_data_file(source, [])
+    staging = target.with_name(f".{target.name}.tmp")
+    staging.unlink(missing_ok=True)
+    store = SqliteSupervisionRequestStore(staging)
+    store._write_raw(data)
+    close_connections(staging)
+    os.replace(staging, target)
+    if source.exists():
+        source.rename(source.with_name(f"{source.name}.bak"))
+    return len(data)
+
+
+def migrate_to_json(file_path: Path) -> int:
+    source = file_path.with_suffix(SQLITE_SUFFIX)
+    if not source.exists():
+        raise ValueError(f"Request store at '{file_path}' is not in SQLite")
+    data = SqliteSupervisionRequestStore(source)._read_raw()
+    SupervisionRequestStore(file_path)._write_raw(data)
+    close_connections(source)
+    source.rename(source.with_name(f"{source.name}.bak"))
+    return len(data)
+
+
+def _row(request: SupervisionRequest) -> tuple[object, ...]:
+    return (
+        request.id,
+        request.student_username,
+        request.student_name,
+        request.professor_name,
+        request.slot,
+        request.status,
+        request.created_at,
+        request.decided_at,
+    )
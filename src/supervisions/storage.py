@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Generic, Iterator, TypeVar
+
+from supervisions.offset_index import IndexedMapping, write_index
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+_JOURNAL_DIR_NAME = ".journal"
+
+SNAPSHOT_SUFFIX = ".snap"
+
+FileSignature = tuple[int, int, int]
+T = TypeVar("T")
+
+_reads: ContextVar[Counter[str] | None] = ContextVar("reads", default=None)
+
+
+@contextmanager
+def counting_reads() -> Iterator[Counter[str]]:
+    reads: Counter[str] = Counter()
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+
+
+def count_read(kind: str, path: Path) -> None:
+    reads = _reads.get()
+    if reads is not None:
+        reads[f"{kind} {path.name}"] += 1
+
+
+def dump_json(data: object) -> str:
+    return json.dumps(data, indent=2, sort_keys=True)
+
+
+def encode_data(path: Path, data: object) -> bytes:
+    if isinstance(data, IndexedMapping):
+        return data.encode()
+    if path.suffix == SNAPSHOT_SUFFIX:
+        from supervisions.binary_snapshot import encode
+
+        return encode(data)
+    return dump_json(data).encode("utf-8")
+
+
+def read_data_file(path: Path, default: T) -> T:
+    count_read("read", path)
+    try:
+        if path.suffix == SNAPSHOT_SUFFIX:
+            from supervisions.binary_snapshot import decode
+
+            return decode(path)
+        with path.open("r", encoding="utf-8") as file_handle:
+            return json.load(file_handle)
+    except FileNotFoundError:
+        return default
+
+
+def file_signature(path: Path) -> FileSignature | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class SnapshotCache(Generic[T]):
+    def __init__(self) -> None:
+        self._entries: dict[Path, tuple[FileSignature | None, T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, load: Callable[[], T]) -> T:
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            count_read("cached", path)
+            return entry[1]
+        value = load()
+        with self._lock:
+            self._entries[path] = (signature, value)
+        return value
+
+    def peek(self, path: Path) -> T | None:
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        return None
+
+    def put(self, path: Path, signature: FileSignature | None, value: T) -> None:
+        with self._lock:
+            self._entries[path] = (signature, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as file_handle:
+        if fcntl is not None:
+            try:
+                fcntl.flock(file_handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                fcntl.flock(file_handle.fileno(), fcntl.LOCK_EX)
+                recover_interrupted_commit(path.parent)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file_handle.fileno(), fcntl.LOCK_UN)
+
+
+def write_data_files(
+    files: dict[Path, object], before_replace: Callable[[], None] | None = None
+) -> dict[Path, FileSignature]:
+    if not files:
+        if before_replace is not None:
+            before_replace()
+        return {}
+    originals = list(files)
+    files = {target.resolve(): data for target, data in files.items()}
+    directory = _common_directory(list(files))
+    recover_interrupted_commit(directory)
+
+    staged: list[tuple[Path, Path]] = []
+    signatures: list[FileSignature] = []
+    try:
+        for target, data in files.items():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temporary = target.with_name(f".{target.name}.{os.urandom(16).hex()}.tmp")
+            staged.append((temporary, target))
+            with temporary.open("wb") as file_handle:
+                file_handle.write(encode_data(target, data))
+                file_handle.flush()
+                os.fsync(file_handle.fileno())
+                stat = os.fstat(file_handle.fileno())
+                signatures.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        if before_replace is not None:
+            before_replace()
+    except BaseException:
+        for temporary, _ in staged:
+            temporary.unlink(missing_ok=True)
+        raise
+
+    if len(staged) == 1:
+        temporary, target = staged[0]
+        os.replace(temporary, target)
+        _fsync_directory(target.parent)
+    else:
+        journal = _write_journal(directory, staged)
+        _replay(directory, staged)
+        journal.unlink(missing_ok=True)
+        _fsync_directory(journal.parent)
+    for (_, target), signature, data in zip(staged, signatures, files.values()):
+        if isinstance(data, IndexedMapping):
+            write_index(target, data.index(signature))
+    return dict(zip(originals, signatures))
+
+
+def convert_data_file(source: Path, target: Path) -> bool:
+    data = read_data_file(source, None)
+    if data is None:
+        return False
+    write_data_files({target: data})
+    source.rename(source.with_name(f"{source.name}.bak"))
+    return True
+
+
+def recover_interrupted_commit(directory: Path) -> None:
+    journal_dir = directory / _JOURNAL_DIR_NAME
+    try:
+        journals = sorted(journal_dir.glob("*.json"))
+    except OSError:
+        return
+    for journal in journals:
+        try:
+            with journal.open("r", encoding="utf-8") as file_handle:
+                entries = json.load(file_handle)
+        except (OSError, ValueError):
+            continue
+        staged = [(directory / temporary, directory / target) for temporary, target in entries]
+        _replay(directory, staged)
+        journal.unlink(missing_ok=True)
+
+
+def _write_journal(directory: Path, staged: list[tuple[Path, Path]]) -> Path:
+    journal_dir = directory / _JOURNAL_DIR_NAME
+    journal_dir.mkdir(parents=True, exist_ok=True)
+    entries = [
+        [str(temporary.relative_to(directory)), str(target.relative_to(directory))]
+        for temporary, target in staged
+    ]
+    journal = journal_dir / f"{os.urandom(16).hex()}.json"
+    pending = journal.with_suffix(".tmp")
+    with pending.open("w", encoding="utf-8") as file_handle:
+        json.dump(entries, file_handle)
+        file_handle.flush()
+        os.fsync(file_handle.fileno())
+    os.replace(pending, journal)
+    _fsync_directory(journal_dir)
+    return journal
+
+
+def _replay(directory: Path, staged: list[tuple[Path, Path]]) -> None:
+    parents: set[Path] = set()
+    for temporary, target in staged:
+        try:
+            os.replace(temporary, target)
+        except FileNotFoundError:
+            continue
+        parents.add(target.parent)
+    for parent in parents:
+        _fsync_directory(parent)
+
+
+def _common_directory(paths: list[Path]) -> Path:
+    return Path(os.path.commonpath([str(path.parent) for path in paths]))
+
+
+def _fsync_directory(directory: Path) -> None:
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
@@ -1,6 +1,20 @@
-import json
+import bisect
+import time
 from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import ContextManager
+
+from supervisions.change_feed import REQUEST_CREATED, REQUEST_DECIDED, Change, feed_for
+from supervisions.storage import (
+    SNAPSHOT_SUFFIX,
+    FileSignature,
+    SnapshotCache,
+    file_lock,
+    file_signature,
+    read_data_file,
+    recover_interrupted_commit,
+    write_data_files,
+)
 
 
 @dataclass(frozen=True)
@@ -11,20 +25,84 @@ class SupervisionRequest:
     professor_name: str
     slot: str
     status: str
+    created_at: int | None = None
+    decided_at: int | None = None
+
+
+SQLITE_SUFFIX = ".sqlite3"
+
+
+class RequestSnapshot:
+    def __init__(self, data: list[dict[str, object]]) -> None:
+        self.data = data
+        self._requests: list[SupervisionRequest] | None = None
+        self._ids: list[int] | None = None
+        self._ordered: list[SupervisionRequest] | None = None
+        self._positions: dict[int, int] | None = None
+        self._by_professor: dict[tuple[str, str], list[SupervisionRequest]] | None = None
+        self._by_student: dict[tuple[str, str], list[SupervisionRequest]] | None = None
+
+    def requests(self) -> list[SupervisionRequest]:
+        if self._requests is None:
+            self._requests = [SupervisionRequest(**item) for item in self.data]
+        return self._requests
+
+    def ordered_by_id(self) -> tuple[list[int], list[SupervisionRequest]]:
+        if self._ids is None or self._ordered is None:
+            self._ordered = sorted(self.requests(), key=lambda request: request.id)
+            self._ids = [request.id for request in self._ordered]
+        return self._ids, self._ordered
+
+    def position(self, request_id: int) -> int | None:
+        if self._positions is None:
+            self._positions = {request.id: index for index, request in enumerate(self.requests())}
+        return self._positions.get(request_id)
+
+    def by_professor(self, professor_name: str, status: str) -> list[SupervisionRequest]:
+        if self._by_professor is None:
+            by_professor: dict[tuple[str, str], list[SupervisionRequest]] = {}
+            for request in self.requests():
+                by_professor.setdefault((request.professor_name, request.status), []).append(request)
+            self._by_professor = by_professor
+        return self._by_professor.get((professor_name, status), [])
+
+    def by_student(self, student_username: str, status: str) -> list[SupervisionRequest]:
+        if self._by_student is None:
+            by_student: dict[tuple[str, str], list[SupervisionRequest]] = {}
+            for request in self.requests():
+                by_student.setdefault((request.student_username, request.status), []).append(request)
+            self._by_student = by_student
+        return self._by_student.get((student_username, status), [])
+
+
+_snapshots: SnapshotCache[RequestSnapshot] = SnapshotCache()
 
 
 class SupervisionRequestStore:
     def __init__(self, file_path: Path | None = None) -> None:
         self._file_path = file_path or self.default_file_path()
+        recover_interrupted_commit(self._file_path.parent)
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
 
     @staticmethod
     def default_file_path() -> Path:
         project_root = Path(__file__).resolve().parents[2]
         return project_root / "data" / "supervision_requests.json"
 
+    def version(self) -> str:
+        signature = file_signature(self._file_path)
+        return "0" if signature is None else "-".join(str(part) for part in signature)
+
     def all(self) -> list[SupervisionRequest]:
-        data = self._read_raw()
-        return [SupervisionRequest(**item) for item in data]
+        return list(self._load().requests())
+
+    def get(self, request_id: int) -> SupervisionRequest | None:
+        snapshot = self._load()
+        position = snapshot.position(request_id)
+        return None if position is None else snapshot.requests()[position]
 
     def create_pending(
         self,
@@ -33,49 +111,86 @@ class SupervisionRequestStore:
         professor_name: str,
         slot: str,
     ) -> SupervisionRequest:
-        requests = self.all()
-        next_id = max((request.id for request in requests), default=0) + 1
-
-        for request in requests:
-            if (
-                request.student_username == student_username
-                and request.slot == slot
-                and request.status == "pending"
-            ):
-                requests.remove(request)
-                break
+        with self._write_lock():
+            requests = self.all()
+            next_id = max((request.id for request in requests), default=0) + 1
+
+            replaced: SupervisionRequest | None = None
+            for request in requests:
+                if (
+                    request.student_username == student_username
+                    and request.slot == slot
+                    and request.status == "pending"
+                ):
+                    requests.remove(request)
+                    replaced = request
+                    break
 
-        created = SupervisionRequest(
-            id=next_id,
-            student_username=student_username,
-            student_name=student_name,
-            professor_name=professor_name,
-            slot=slot,
-            status="pending",
-        )
-        requests.append(created)
-        self._write_requests(requests)
+            created = SupervisionRequest(
+                id=next_id,
+                student_username=student_username,
+                student_name=student_name,
+                professor_name=professor_name,
+                slot=slot,
+                status="pending",
+                created_at=int(time.time()),
+            )
+            requests.append(created)
+            self._write_requests(requests)
+            self._emit([created_change(created, replaced)])
         return created
 
     def pending_for_professor(self, professor_name: str) -> list[SupervisionRequest]:
-        return [
-            request
-            for request in self.all()
-            if request.professor_name == professor_name and request.status == "pending"
-        ]
+        return list(self._load().by_professor(professor_name, "pending"))
 
     def pending_for_student(self, student_username: str) -> list[SupervisionRequest]:
-        return [
-            request
-            for request in self.all()
-            if request.student_username == student_username and request.status == "pending"
-        ]
+        return list(self._load().by_student(student_username, "pending"))
 
-    def decide(self, request_id: int, professor_name: str, decision: str) -> SupervisionRequest | None:
-        requests = self.all()
-        for index, request in enumerate(requests):
-            if request.id != request_id:
+    def page(
+        self,
+        after: int | None = None,
+        limit: int | None = 50,
+        status: str | None = None,
+        professor_name: str | None = None,
+        student_username: str | None = None,
+    ) -> list[SupervisionRequest]:
+        snapshot = self._load()
+        if professor_name is not None and status is not None:
+            candidates = sorted(
+                snapshot.by_professor(professor_name, status), key=lambda request: request.id
+            )
+        elif student_username is not None and status is not None:
+            candidates = sorted(
+                snapshot.by_student(student_username, status), key=lambda request: request.id
+            )
+        else:
+            ids, ordered = snapshot.ordered_by_id()
+            start = bisect.bisect_right(ids, after) if after is not None else 0
+            candidates = ordered[start:]
+
+        requests: list[SupervisionRequest] = []
+        for request in candidates:
+            if after is not None and request.id <= after:
+                continue
+            if status is not None and request.status != status:
                 continue
+            if professor_name is not None and request.professor_name != professor_name:
+                continue
+            if student_username is not None and request.student_username != student_username:
+                continue
+            requests.append(request)
+            if limit is not None and len(requests) >= limit:
+                break
+        return requests
+
+    def decide(self, request_id: int, professor_name: str, decision: str) -> SupervisionRequest | None:
+        with self._write_lock():
+            snapshot = self._load()
+            position = snapshot.position(request_id)
+            if position is None:
+                return None
+            requests = list(snapshot.requests())
+            request = requests[position]
             if request.professor_name != professor_name or request.status != "pending":
                 return None
             decided = SupervisionRequest(
@@ -85,20 +200,60 @@ class SupervisionRequestStore:
                 professor_name=request.professor_name,
                 slot=request.slot,
                 status=decision,
+                created_at=request.created_at,
+                decided_at=int(time.time()),
             )
-            requests[index] = decided
+            requests[position] = decided
             self._write_requests(requests)
-            return decided
-        return None
+            self._emit([decided_change(decided)])
+        return decided
+
+    def _load(self) -> RequestSnapshot:
+        return _snapshots.get(self._file_path, self._parse)
+
+    def _parse(self) -> RequestSnapshot:
+        return RequestSnapshot(read_data_file(self._file_path, []))
 
     def _read_raw(self) -> list[dict[str, object]]:
-        if not self._file_path.exists():
-            return []
-        with self._file_path.open("r", encoding="utf-8") as file_handle:
-            return json.load(file_handle)
+        return list(self._load().data)
 
     def _write_requests(self, requests: list[SupervisionRequest]) -> None:
-        self._file_path.parent.mkdir(parents=True, exist_ok=True)
-        data = [asdict(request) for request in requests]
-        with self._file_path.open("w", encoding="utf-8") as file_handle:
-            json.dump(data, file_handle, indent=2, sort_keys=True)
+        self._write_raw([asdict(request) for request in requests])
+
+    def _write_raw(self, data: list[dict[str, object]]) -> None:
+        signatures = write_data_files({self._file_path: data})
+        self._remember(data, signatures[self._file_path])
+
+    def _write_lock(self) -> ContextManager[None]:
+        return file_lock(self._file_path.with_name(f"{self._file_path.name}.lock"))
+
+    def _remember(self, data: list[dict[str, object]], signature: FileSignature) -> None:
+        _snapshots.put(self._file_path, signature, RequestSnapshot(data))
+
+    def _emit(self, changes: list[Change]) -> None:
+        feed_for(self._file_path.parent).publish(changes)
+
+
+def created_change(created: SupervisionRequest, replaced: SupervisionRequest | None) -> Change:
+    return (
+        REQUEST_CREATED,
+        str(created.id),
+        {"request": asdict(created), "replaced": asdict(replaced) if replaced else None},
+    )
+
+
+def decided_change(decided: SupervisionRequest) -> Change:
+    return (REQUEST_DECIDED, str(decided.id), {"request": asdict(decided)})
+
+
+def open_request_store(file_path: Path | None = None) -> SupervisionRequestStore:
+    path = file_path or SupervisionRequestStore.default_file_path()
+    sqlite_path = path.with_suffix(SQLITE_SUFFIX)
+    if sqlite_path.exists():
+        from supervisions.sqlite_request_store import SqliteSupervisionRequestStore
+
+        return SqliteSupervisionRequestStore(sqlite_path)
+    snapshot_path = path.with_suffix(SNAPSHOT_SUFFIX)
+    if snapshot_path.exists():
+        return SupervisionRequestStore(snapshot_path)
+    return SupervisionRequestStore(path)
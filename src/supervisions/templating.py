@@ -0,0 +1,61 @@
+import threading
+from pathlib import Path
+from typing import Callable
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+from markupsafe import Markup
+
+
+def default_bytecode_cache_dir() -> Path:
+    project_root = Path(__file__).resolve().parents[2]
+    return project_root / "data" / "template_cache"
+
+
+class FragmentCache:
+    def __init__(self) -> None:
+        self._fragments: dict[tuple[object, ...], Markup] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str, *key: object, caller: Callable[[], str]) -> Markup:
+        cache_key = (name, *key)
+        fragment = self._fragments.get(cache_key)
+        if fragment is None:
+            fragment = Markup(caller())
+            with self._lock:
+                self._fragments[cache_key] = fragment
+        return fragment
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fragments.clear()
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def configure_templates(app: Flask, cache_dir: Path | None = None) -> None:
+    directory = cache_dir or default_bytecode_cache_dir()
+    app.jinja_env.bytecode_cache = _BytecodeCache(str(directory))
+    fragment_cache = FragmentCache()
+    app.extensions["fragment_cache"] = fragment_cache
+    app.jinja_env.globals["cached_fragment"] = fragment_cache
+
+
+def warm_templates(app: Flask) -> list[str]:
+    cache = app.jinja_env.bytecode_cache
+    if isinstance(cache, FileSystemBytecodeCache):
+        try:
+            Path(cache.directory).mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+    names = app.jinja_env.list_templates(extensions=["html"])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Callable, Mapping
+
+Record = Mapping[str, str | None]
+
+
+@dataclass(frozen=True)
+class UniqueConstraint:
+    field: str
+    label: str
+    normalize: Callable[[str], str]
+
+    def key(self, record: Record | None) -> str | None:
+        value = (record or {}).get(self.field)
+        if not value or not value.strip():
+            return None
+        return self.normalize(value)
+
+
+def _casefold(value: str) -> str:
+    return value.strip().casefold()
+
+
+def _strip(value: str) -> str:
+    return value.strip()
+
+
+UNIQUE_CONSTRAINTS = (
+    UniqueConstraint("email", "Email", _casefold),
+    UniqueConstraint("enroll_number", "Enroll number", _strip),
+    UniqueConstraint("sipap_number", "SIPAP number", _strip),
+)
+
+
+class UniqueIndex:
+    def __init__(self, constraints: tuple[UniqueConstraint, ...] = UNIQUE_CONSTRAINTS) -> None:
+        self.constraints = constraints
+        self._owners: dict[str, dict[str, str]] = {
+            constraint.field: {} for constraint in constraints
+        }
+
+    @classmethod
+    def build(
+        cls,
+        data: Mapping[str, Record],
+        constraints: tuple[UniqueConstraint, ...] = UNIQUE_CONSTRAINTS,
+    ) -> "UniqueIndex":
+        index = cls(constraints)
+        for username, record in data.items():
+            for constraint in constraints:
+                key = constraint.key(record)
+                if key is not None:
+                    index._owners[constraint.field].setdefault(key, username)
+        return index
+
+    @staticmethod
+    def affects(
+        previous: Record | None,
+        record: Record | None,
+        constraints: tuple[UniqueConstraint, ...] = UNIQUE_CONSTRAINTS,
+    ) -> bool:
+        return any(
+            constraint.key(previous) != constraint.key(record) for constraint in constraints
+        )
+
+    def owner(self, field: str, value: str) -> str | None:
+        constraint = next(item for item in self.constraints if item.field == field)
+        return self._owners[field].get(constraint.normalize(value))
+
+    def check(self, username: str, previous: Record | None, record: Record | None) -> None:
+        self.check_all({username: (previous, record)})
+
+    def check_all(self, changes: Mapping[str, tuple[Record | None, Record | None]]) -> None:
+        claimed: dict[str, dict[str, str]] = {
+            constraint.field: {} for constraint in self.constraints
+        }
+        for username, (previous, record) in changes.items():
+            for constraint in self.constraints:
+                key = constraint.key(record)
+                if key is None or key == constraint.key(previous):
+                    continue
+                owner = claimed[constraint.field].get(key)
+                if owner is None:
+                    owner = self._owners[constraint.field].get(key)
+                    if owner in changes and constraint.key(changes[owner][1]) != key:
+                        owner = None
+                if owner is not None and owner != username:
+                    raise ValueError(
+                        f"{constraint.label} '{(record or {}).get(constraint.field)}' "
+                        "is already in use"
+                    )
+                claimed[constraint.field][key] = username
+
+    def replace(self, username: str, previous: Record | None, record: Record | None) -> None:
+        self.replace_all({username: (previous, record)})
+
+    def replace_all(self, changes: Mapping[str, tuple[Record | None, Record | None]]) -> None:
+        for constraint in self.constraints:
+            owners = self._owners[constraint.field]
+            for username, (previous, record) in changes.items():
+                old = constraint.key(previous)
+                if old is None or old == constraint.key(record):
+                    continue
+                if owners.get(old) == username:
+                    del owners[old]
+            for username, (previous, record) in changes.items():
+                new = constraint.key(record)
+                if new is not None and new != constraint.key(previous):
+                    owners.setdefault(new, username)
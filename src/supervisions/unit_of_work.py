@@ -0,0 +1,611 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Callable, ContextManager, Iterator
+
+from supervisions.audit import audit_log_for
+from supervisions.change_feed import REQUEST_CREATED, REQUEST_DECIDED, Change
+from supervisions.sqlite_request_store import (
+    SqliteSupervisionRequestStore,
+    bump_version,
+    replace_rows,
+)
+from supervisions.storage import FileSignature, file_lock, write_data_files
+from supervisions.supervision_requests import (
+    RequestSnapshot,
+    SupervisionRequest,
+    SupervisionRequestStore,
+    created_change,
+    decided_change,
+    open_request_store,
+)
+from supervisions.unique_constraints import UniqueIndex
+from supervisions.user_store import (
+    StoredUser,
+    UserSnapshot,
+    UserStore,
+    check_fields,
+    delete_from,
+    merge_into,
+    open_user_store,
+    patch_into,
+    record_from_user,
+    save_into,
+)
+
+if TYPE_CHECKING:
+    from supervisions.outbox import Notification, Outbox
+
+PROFILE_FIELDS = {
+    "professor": ("full_name", "lattes_link", "email", "sipap_number"),
+    "student": (
+        "enroll_number",
+        "full_name",
+        "lattes_link",
+        "email",
+        "telephone_number",
+        "advisor_1",
+        "advisor_2",
+    ),
+}
+ADVISOR_SLOTS = ("advisor_1", "advisor_2")
+
+
+@dataclass(frozen=True)
+class ProfileUpdate:
+    changed: dict[str, str | None]
+    requested: tuple[SupervisionRequest, ...] = ()
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.changed and not self.requested
+
+
+class _StagedUserStore(UserStore):
+    def __init__(self, backing: UserStore) -> None:
+        super().__init__(file_path=backing.file_path)
+        self._backing = backing
+        self._read: dict[str, dict[str, str] | None] = {}
+        self._staged: dict[str, dict[str, str] | None] = {}
+        self._snapshot: UserSnapshot | None = None
+        self._files: dict[Path, dict[str, dict[str, str]]] = {}
+        self._changes: list[Change] = []
+        self._unique: UniqueIndex | None = None
+        self.dirty = False
+
+    def _put(self, user: StoredUser, create: bool) -> None:
+        previous = self._record(user.username)
+        if create and previous is not None:
+            raise ValueError(f"User '{user.username}' already exists")
+        data = {} if previous is None else {user.username: previous}
+        self._check_unique(user.username, previous, record_from_user(user))
+        change = save_into(data, user)
+        if change is not None:
+            self._stage(user.username, data[user.username], change)
+
+    def update_fields(self, username: str, /, **changes: str | None) -> dict[str, str | None]:
+        check_fields(changes)
+        previous = self._record(username)
+        data = {} if previous is None else {username: previous}
+        if previous is not None:
+            self._check_unique(username, previous, {**previous, **changes})
+        changed, change = patch_into(data, username, changes)
+        if change is not None:
+            self._stage(username, data[username], change)
+        return changed
+
+    def delete(self, username: str) -> bool:
+        previous = self._record(username)
+        if previous is None:
+            return False
+        data = {username: previous}
+        change = delete_from(data, username)
+        if change is not None:
+            self._stage(username, None, change)
+        return True
+
+    def _record(self, username: str) -> dict[str, str] | None:
+        if username in self._staged:
+            return self._staged[username]
+        if username not in self._read:
+            self._read[username] = self._backing._record(username)
+        return self._read[username]
+
+    def _load(self) -> UserSnapshot:
+        if not self._staged:
+            return self._backing._load()
+        if self._snapshot is None:
+            data = dict(self._backing._load().data)
+            merge_into(data, self._staged)
+            self._snapshot = UserSnapshot(data)
+        return self._snapshot
+
+    def _stage(self, username: str, record: dict[str, str] | None, change: Change) -> None:
+        self._staged[username] = record
+        self._snapshot = None
+        self._changes.append(change)
+        self.dirty = True
+
+    def _check_unique(
+        self, username: str, previous: dict[str, str] | None, record: dict[str, str] | None
+    ) -> None:
+        if UniqueIndex.affects(previous, record):
+            changes = self._unique_changes()
+            changes[username] = (self._read.get(username), record)
+            self._backing.unique_index().check_all(changes)
+
+    def _unique_changes(self) -> dict[str, tuple[dict[str, str] | None, dict[str, str] | None]]:
+        return {
+            username: (self._read.get(username), record)
+            for username, record in self._staged.items()
+            if UniqueIndex.affects(self._read.get(username), record)
+        }
+
+    def commit_files(self) -> dict[Path, object]:
+        for username in self._staged:
+            if self._backing._record(username) != self._read.get(username):
+                raise ValueError(f"User '{username}' was changed by another request; try again")
+        changes = self._unique_changes()
+        if changes:
+            self._unique = self._backing.unique_index()
+            self._unique.check_all(changes)
+        self._files = self._backing._merged_files(self._staged)
+        return self._backing._stored_files(self._files)
+
+    @contextmanager
+    def committing(self) -> Iterator[None]:
+        with self._backing._commit_lock(set(self._staged)):
+            yield
+            if self._unique is not None:
+                self._unique.replace_all(self._unique_changes())
+                self._backing._cache_unique(self._unique)
+
+    def apply_commit(self, signatures: dict[Path, FileSignature]) -> None:
+        self._backing._committed(self._files, signatures)
+        self._backing._emit(self._changes)
+
+    def reset(self) -> None:
+        self._read = {}
+        self._staged = {}
+        self._snapshot = None
+        self._files = {}
+        self._changes = []
+        self._unique = None
+        self.dirty = False
+
+
+class _StagedSupervisionRequestStore(SupervisionRequestStore):
+    def __init__(self, backing: SupervisionRequestStore) -> None:
+        super().__init__(file_path=backing.file_path)
+        self._backing = backing
+        self._snapshot: RequestSnapshot | None = None
+        self._version: str | None = None
+        self._changes: list[Change] = []
+        self.dirty = False
+
+    def _load(self) -> RequestSnapshot:
+        if self._snapshot is None:
+            self._version = self._backing.version()
+            self._snapshot = RequestSnapshot(self._backing._read_raw())
+        return self._snapshot
+
+    def _read_raw(self) -> list[dict[str, object]]:
+        return self._load().data
+
+    def _write_raw(self, data: list[dict[str, object]]) -> None:
+        self._snapshot = RequestSnapshot(data)
+        self.dirty = True
+
+    def _write_lock(self) -> ContextManager[None]:
+        return nullcontext()
+
+    def _emit(self, changes: list[Change]) -> None:
+        self._changes.extend(changes)
+
+    def commit_files(self) -> dict[Path, object]:
+        if self._backing.version() != self._version:
+            raise ValueError("Supervision requests were changed by another request; try again")
+        return {self.file_path: self._load().data}
+
+    def committing(self) -> ContextManager[None]:
+        return self._backing._write_lock()
+
+    def apply_commit(self, signatures: dict[Path, FileSignature]) -> None:
+        self._backing._remember(self._load().data, signatures[self.file_path])
+        self._backing._emit(self._changes)
+
+    def reset(self) -> None:
+        self._snapshot = None
+        self._version = None
+        self._changes = []
+        self.dirty = False
+
+
+class _StagedSqliteRequestStore(SqliteSupervisionRequestStore):
+    def __init__(self, backing: SqliteSupervisionRequestStore) -> None:
+        super().__init__(file_path=backing.file_path)
+        self._backing = backing
+        self._staged: dict[int, SupervisionRequest | None] = {}
+        self._version: str | None = None
+        self._changes: list[Change] = []
+        self.dirty = False
+
+    def all(self) -> list[SupervisionRequest]:
+        return self._overlay(super().all(), lambda request: True)
+
+    def get(self, request_id: int) -> SupervisionRequest | None:
+        if request_id in self._staged:
+            return self._staged[request_id]
+        return super().get(request_id)
+
+    def create_pending(
+        self,
+        student_username: str,
+        student_name: str,
+        professor_name: str,
+        slot: str,
+    ) -> SupervisionRequest:
+        replaced = next(
+            (
+                request
+                for request in self.pending_for_student(student_username)
+                if request.slot == slot
+            ),
+            None,
+        )
+        if replaced is not None:
+            self._staged[replaced.id] = None
+        created = SupervisionRequest(
+            id=max([self._max_id(), *self._staged]) + 1,
+            student_username=student_username,
+            student_name=student_name,
+            professor_name=professor_name,
+            slot=slot,
+            status="pending",
+            created_at=int(time.time()),
+        )
+        self._stage(created, created_change(created, replaced))
+        return created
+
+    def pending_for_professor(self, professor_name: str) -> list[SupervisionRequest]:
+        return self._overlay(
+            super().pending_for_professor(professor_name),
+            lambda request: request.professor_name == professor_name
+            and request.status == "pending",
+        )
+
+    def pending_for_student(self, student_username: str) -> list[SupervisionRequest]:
+        return self._overlay(
+            super().pending_for_student(student_username),
+            lambda request: request.student_username == student_username
+            and request.status == "pending",
+        )
+
+    def page(
+        self,
+        after: int | None = None,
+        limit: int | None = 50,
+        status: str | None = None,
+        professor_name: str | None = None,
+        student_username: str | None = None,
+    ) -> list[SupervisionRequest]:
+        if not self._staged:
+            return super().page(after, limit, status, professor_name, student_username)
+        requests = self._overlay(
+            super().page(after, None, status, professor_name, student_username),
+            lambda request: (after is None or request.id > after)
+            and status in (None, request.status)
+            and professor_name in (None, request.professor_name)
+            and student_username in (None, request.student_username),
+        )
+        return requests if limit is None else requests[:limit]
+
+    def decide(self, request_id: int, professor_name: str, decision: str) -> SupervisionRequest | None:
+        request = self.get(request_id)
+        if request is None or request.professor_name != professor_name:
+            return None
+        if request.status != "pending":
+            return None
+        decided = replace(request, status=decision, decided_at=int(time.time()))
+        self._stage(decided, decided_change(decided))
+        return decided
+
+    def _select(self, query: str, parameters: tuple[object, ...] = ()) -> list[SupervisionRequest]:
+        if self._version is None:
+            self._version = self._backing.version()
+        return super()._select(query, parameters)
+
+    def _max_id(self) -> int:
+        if self._version is None:
+            self._version = self._backing.version()
+        return self._connection().execute(
+            "SELECT COALESCE(MAX(id), 0) FROM supervision_requests"
+        ).fetchone()[0]
+
+    def _overlay(
+        self,
+        requests: list[SupervisionRequest],
+        matches: Callable[[SupervisionRequest], bool],
+    ) -> list[SupervisionRequest]:
+        if not self._staged:
+            return requests
+        merged = {request.id: request for request in requests if request.id not in self._staged}
+        for request_id, request in self._staged.items():
+            if request is not None and matches(request):
+                merged[request_id] = request
+        return [merged[request_id] for request_id in sorted(merged)]
+
+    def _stage(self, request: SupervisionRequest, change: Change) -> None:
+        self._staged[request.id] = request
+        self._changes.append(change)
+        self.dirty = True
+
+    @contextmanager
+    def committing(self) -> Iterator[None]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if self._backing.version() != self._version:
+                raise ValueError("Supervision requests were changed by another request; try again")
+            replace_rows(connection, self._staged)
+            bump_version(connection)
+            yield
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+            raise RuntimeError("Unit of work finished without committing supervision requests")
+
+    def commit_database(self) -> None:
+        self._connection().execute("COMMIT")
+
+    def commit_files(self) -> dict[Path, object]:
+        return {}
+
+    def apply_commit(self, signatures: dict[Path, FileSignature]) -> None:
+        self._backing._emit(self._changes)
+
+    def reset(self) -> None:
+        self._staged = {}
+        self._version = None
+        self._changes = []
+        self.dirty = False
+
+
+class _StagedOutbox:
+    def __init__(self, directory: Path, backing: "Outbox | None" = None) -> None:
+        self._directory = directory
+        self._backing = backing
+        self._added: list["Notification"] = []
+        self.dirty = False
+
+    @property
+    def backing(self) -> "Outbox":
+        if self._backing is None:
+            from supervisions.outbox import outbox_for
+
+            self._backing = outbox_for(self._directory)
+        return self._backing
+
+    @property
+    def added(self) -> list["Notification"]:
+        return list(self._added)
+
+    def add(self, kind: str, request: SupervisionRequest) -> "Notification":
+        from supervisions.outbox import new_notification
+
+        notification = new_notification(kind, request)
+        self._added.append(notification)
+        self.dirty = True
+        return notification
+
+    def commit_files(self) -> dict[Path, object]:
+        data = self.backing._read_raw()
+        return {self.backing.file_path: data + [asdict(item) for item in self._added]}
+
+    def committing(self) -> ContextManager[None]:
+        return self.backing.lock()
+
+    def apply_commit(self, signatures: dict[Path, FileSignature]) -> None:
+        return None
+
+    def reset(self) -> None:
+        self._added = []
+        self.dirty = False
+
+
+def _staged_requests(
+    store: SupervisionRequestStore,
+) -> _StagedSupervisionRequestStore | _StagedSqliteRequestStore:
+    if isinstance(store, SqliteSupervisionRequestStore):
+        return _StagedSqliteRequestStore(store)
+    return _StagedSupervisionRequestStore(store)
+
+
+class UnitOfWork:
+    def __init__(
+        self,
+        user_store: UserStore | None = None,
+        request_store: SupervisionRequestStore | None = None,
+        advisor_capacity: int | None = None,
+        outbox: "Outbox | None" = None,
+    ) -> None:
+        self.users = _StagedUserStore(user_store or open_user_store())
+        self.requests = _staged_requests(request_store or open_request_store())
+        self.outbox = _StagedOutbox(self.users.file_path.parent, outbox)
+        self.advisor_capacity = advisor_capacity
+        self._accepted: Counter[str] = Counter()
+        self._audited: list[tuple[str, str, str, dict[str, object]]] = []
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def audit(self, actor: str, action: str, target: str, **details: object) -> None:
+        self._audited.append((actor, action, target, details))
+
+    def update_profile(self, user: StoredUser, submitted: dict[str, str | None]) -> ProfileUpdate:
+        editable = PROFILE_FIELDS.get(user.category or "")
+        if user.role != "regular" or editable is None:
+            raise PermissionError("Only professor or student users can edit their profile")
+        unknown = sorted(set(submitted) - set(editable))
+        if unknown:
+            raise ValueError(f"Field(s) not editable: {', '.join(unknown)}")
+
+        changes = {
+            field: value
+            for field, value in submitted.items()
+            if field not in ADVISOR_SLOTS and getattr(user, field) != value
+        }
+        student_name = submitted.get("full_name", user.full_name) or user.username
+        pending: list[SupervisionRequest] | None = None
+        requested: list[SupervisionRequest] = []
+        for slot in ADVISOR_SLOTS:
+            professor_name = submitted.get(slot)
+            if not professor_name or professor_name == getattr(user, slot):
+                continue
+            if pending is None:
+                pending = self.requests.pending_for_student(user.username)
+            if any(
+                existing.slot == slot and existing.professor_name == professor_name
+                for existing in pending
+            ):
+                continue
+            created = self.requests.create_pending(
+                student_username=user.username,
+                student_name=student_name,
+                professor_name=professor_name,
+                slot=slot,
+            )
+            self.outbox.add(REQUEST_CREATED, created)
+            requested.append(created)
+        changed = self.users.update_fields(user.username, **changes) if changes else {}
+        return ProfileUpdate(changed=changed, requested=tuple(requested))
+
+    def decide_supervision_request(
+        self, request_id: int, professor_name: str, decision: str
+    ) -> SupervisionRequest | None:
+        if decision == "accepted" and self.advisor_capacity is not None:
+            self._check_capacity(request_id, professor_name, self.advisor_capacity)
+        decided = self.requests.decide(
+            request_id=request_id,
+            professor_name=professor_name,
+            decision=decision,
+        )
+        if decided is not None:
+            self.outbox.add(REQUEST_DECIDED, decided)
+        if decided is None or decision != "accepted":
+            return decided
+        student = self.users.get(decided.student_username)
+        if student is not None:
+            if professor_name not in {student.advisor_1, student.advisor_2}:
+                self._accepted[professor_name] += 1
+            advisor_1 = student.advisor_1
+            advisor_2 = student.advisor_2
+            if decided.slot == "advisor_1":
+                advisor_1 = decided.professor_name
+            if decided.slot == "advisor_2":
+                advisor_2 = decided.professor_name
+            self.users.save(
+                StoredUser(
+                    username=student.username,
+                    password=student.password,
+                    role=student.role,
+                    category=student.category,
+                    full_name=student.full_name,
+                    lattes_link=student.lattes_link,
+                    email=student.email,
+                    sipap_number=student.sipap_number,
+                    enroll_number=student.enroll_number,
+                    telephone_number=student.telephone_number,
+                    advisor_1=advisor_1,
+                    advisor_2=advisor_2,
+                )
+            )
+        return decided
+
+    def _check_capacity(self, request_id: int, professor_name: str, capacity: int) -> None:
+        pending = self.requests.get(request_id)
+        if (
+            pending is None
+            or pending.status != "pending"
+            or pending.professor_name != professor_name
+        ):
+            return
+        student = self.users.get(pending.student_username)
+        if student is not None and professor_name in {student.advisor_1, student.advisor_2}:
+            return
+        advisees = self._advisees(professor_name)
+        if advisees >= capacity:
+            raise ValueError(
+                f"Professor '{professor_name}' already advises {advisees} student(s); "
+                f"capacity is {capacity}"
+            )
+
+    def _recheck_capacity(self, capacity: int) -> None:
+        for professor_name in sorted(self._accepted):
+            advisees = self._advisees(professor_name)
+            if advisees > capacity:
+                raise ValueError(
+                    f"Professor '{professor_name}' would advise {advisees} student(s); "
+                    f"capacity is {capacity}"
+                )
+
+    def _advisees(self, professor_name: str) -> int:
+        from supervisions.professor_counters import ProfessorCounters
+
+        counters = ProfessorCounters(self.users._backing, self.requests._backing)
+        return counters.get(professor_name).advisees + self._accepted[professor_name]
+
+    def _capacity_lock(self) -> ContextManager[None]:
+        return file_lock(self.requests.file_path.with_name(".capacity.lock"))
+
+    def commit(self) -> None:
+        staged = [store for store in (self.users, self.requests, self.outbox) if store.dirty]
+        try:
+            with ExitStack() as capacity:
+                if self._accepted and self.advisor_capacity is not None:
+                    capacity.enter_context(self._capacity_lock())
+                    self._recheck_capacity(self.advisor_capacity)
+                with ExitStack() as stack:
+                    for store in staged:
+                        stack.enter_context(store.committing())
+                    files: dict[Path, object] = {}
+                    for store in staged:
+                        files.update(store.commit_files())
+                    signatures = write_data_files(files, self._commit_database(staged))
+                    for store in staged:
+                        store.apply_commit(signatures)
+            if self._audited:
+                log = audit_log_for(self.users.file_path.parent)
+                for actor, action, target, details in self._audited:
+                    log.record(actor, action, target, **details)
+        finally:
+            self.rollback()
+
+    def _commit_database(self, staged: list[object]) -> Callable[[], None] | None:
+        if isinstance(self.requests, _StagedSqliteRequestStore) and self.requests in staged:
+            return self.requests.commit_database
+        return None
+
+    def rollback(self) -> None:
+        self._accepted.clear()
+        self._audited.clear()
+        self.users.reset()
+        self.requests.reset()
+        self.outbox.reset()
@@ -1,7 +1,9 @@
 from dataclasses import dataclass
 from enum import Enum
+from typing import TYPE_CHECKING
 
-from supervisions.user_store import StoredUser, UserStore
+if TYPE_CHECKING:
+    from supervisions.user_store import StoredUser, UserStore
 
 
 class Role(str, Enum):
@@ -15,7 +17,13 @@ class RegularCategory(str, Enum):
 
 
 PERMISSIONS: dict[Role, set[str]] = {
-    Role.ADMIN: {"users:create", "users:delete", "reports:view", "profile:view"},
+    Role.ADMIN: {
+        "users:create",
+        "users:delete",
+        "supervisions:manage",
+        "reports:view",
+        "profile:view",
+    },
     Role.REGULAR: {"profile:view"},
 }
 
@@ -63,8 +71,12 @@ def list_permissions(user: User) -> list[str]:
 
 
 class UserRegistry:
-    def __init__(self, store: UserStore | None = None) -> None:
-        self._store = store or UserStore()
+    def __init__(self, store: "UserStore | None" = None) -> None:
+        if store is None:
+            from supervisions.user_store import open_user_store
+
+            store = open_user_store()
+        self._store = store
 
     def create_user(
         self,
@@ -75,6 +87,7 @@ class UserRegistry:
         category: str | None = None,
     ) -> User:
         require_permission(actor, "users:create")
+        from supervisions.user_store import StoredUser
 
         user_role = parse_role(role)
         user_category: RegularCategory | None = None
@@ -84,7 +97,7 @@ class UserRegistry:
 
         user_password = password or f"{username}123"
         created = User(username=username, role=user_role, category=user_category)
-        self._store.save(
+        self._store.create(
             StoredUser(
                 username=created.username,
                 password=user_password,
@@ -103,15 +116,26 @@ class UserRegistry:
         return created
 
     def list_users(self) -> list[User]:
+        return [_user_from_stored(stored) for stored in self._store.all()]
+
+    def search_users(self, query: str, limit: int = 20) -> list[User]:
+        from supervisions.user_search import UserSearchIndex
+
         users: list[User] = []
-        for stored in self._store.all():
-            role = parse_role(stored.role)
-            category: RegularCategory | None = None
-            if role == Role.REGULAR:
-                category = parse_regular_category(stored.category or RegularCategory.STUDENT.value)
-            users.append(User(username=stored.username, role=role, category=category))
+        for username in UserSearchIndex(self._store).search(query, limit=limit):
+            stored = self._store.get(username)
+            if stored is not None:
+                users.append(_user_from_stored(stored))
         return users
 
     def delete_user(self, actor: User, username: str) -> bool:
         require_permission(actor, "users:delete")
         return self._store.delete(username)
+
+
+def _user_from_stored(stored: "StoredUser") -> User:
+    role = parse_role(stored.role)
+    category: RegularCategory | None = None
+    if role == Role.REGULAR:
+        category = parse_regular_category(stored.category or RegularCategory.STUDENT.value)
+    return User(username=stored.username, role=role, category=category)
@@ -0,0 +1,198 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from dataclasses import asdict
+from itertools import islice
+from pathlib import Path
+
+from supervisions.change_feed import USER_CREATED, USER_DELETED, USER_UPDATED, ChangeFeed, feed_for
+from supervisions.storage import read_data_file, write_data_files
+from supervisions.user_store import UserStore, open_user_store
+
+SEARCH_FILE_NAME = "user_search.json"
+SEARCH_FIELDS = ("full_name", "email", "enroll_number", "sipap_number", "telephone_number")
+CHECKPOINT_EVERY = 1000
+
+_TOKEN = re.compile(r"[^\W_]+")
+_EVENT_BATCH = 1000
+
+
+def fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(fold(text))
+
+
+def document_tokens(username: str, record: dict[str, object]) -> list[str]:
+    tokens = set(tokenize(username))
+    for field in SEARCH_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            tokens.update(tokenize(value))
+    return sorted(tokens)
+
+
+class _Index:
+    def __init__(self, seq: int, documents: dict[str, list[str]], checkpoint_seq: int) -> None:
+        self.seq = seq
+        self.checkpoint_seq = checkpoint_seq
+        self.documents = documents
+        self.postings: dict[str, set[str]] = {}
+        for username, tokens in documents.items():
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(username)
+        self.tokens = sorted(self.postings)
+        self.usernames = sorted(documents)
+        self.lock = threading.Lock()
+
+    def put(self, username: str, tokens: list[str]) -> None:
+        if username in self.documents:
+            self._unpost(username)
+        else:
+            bisect.insort(self.usernames, username)
+        self.documents[username] = tokens
+        for token in tokens:
+            usernames = self.postings.get(token)
+            if usernames is None:
+                usernames = self.postings[token] = set()
+                bisect.insort(self.tokens, token)
+            usernames.add(username)
+
+    def remove(self, username: str) -> None:
+        if username in self.documents:
+            self._unpost(username)
+            del self.documents[username]
+            del self.usernames[bisect.bisect_left(self.usernames, username)]
+
+    def _unpost(self, username: str) -> None:
+        for token in self.documents[username]:
+            usernames = self.postings[token]
+            usernames.discard(username)
+            if not usernames:
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+
+    def prefix_tokens(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self.tokens, prefix)
+        end = bisect.bisect_left(self.tokens, prefix + "\U0010ffff", start)
+        return self.tokens[start:end]
+
+    def postings_count(self, prefix: str, cap: int) -> int:
+        count = 0
+        position = bisect.bisect_left(self.tokens, prefix)
+        while count <= cap and position < len(self.tokens):
+            token = self.tokens[position]
+            if not token.startswith(prefix):
+                break
+            count += len(self.postings[token])
+            position += 1
+        return count
+
+    def matches(self, username: str, terms: list[str]) -> bool:
+        tokens = self.documents[username]
+        for term in terms:
+            position = bisect.bisect_left(tokens, term)
+            if position == len(tokens) or not tokens[position].startswith(term):
+                return False
+        return True
+
+
+_indexes: dict[Path, _Index] = {}
+_indexes_lock = threading.Lock()
+
+
+class UserSearchIndex:
+    def __init__(self, user_store: UserStore | None = None) -> None:
+        self._store = user_store or open_user_store()
+        directory = self._store.file_path.parent
+        self._file_path = directory / SEARCH_FILE_NAME
+        self._feed: ChangeFeed = feed_for(directory)
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    def search(self, query: str, limit: int = 20) -> list[str]:
+        terms = sorted(set(tokenize(query)))
+        if not terms or limit < 1:
+            return []
+        index = self.refresh()
+        with index.lock:
+            cap = math.isqrt(limit * len(index.usernames))
+            counts = sorted((index.postings_count(term, cap), term) for term in terms)
+            count, narrowest = counts[0]
+            if count <= cap:
+                others = [term for _, term in counts[1:]]
+                candidates: set[str] = set()
+                for token in index.prefix_tokens(narrowest):
+                    candidates.update(index.postings[token])
+                return heapq.nsmallest(
+                    limit, (name for name in candidates if index.matches(name, others))
+                )
+            return list(
+                islice((name for name in index.usernames if index.matches(name, terms)), limit)
+            )
+
+    def refresh(self) -> _Index:
+        with _indexes_lock:
+            index = _indexes.get(self._file_path)
+            if index is None:
+                index = self._load()
+                _indexes[self._file_path] = index
+        last_seq = self._feed.last_seq()
+        if index.seq == last_seq:
+            return index
+        if index.seq > last_seq:
+            return self.rebuild()
+        with index.lock:
+            while index.seq < last_seq:
+                events = self._feed.events_since(index.seq, limit=_EVENT_BATCH)
+                if not events:
+                    break
+                if events[0].seq != index.seq + 1:
+                    return self.rebuild()
+                for event in events:
+                    if event.kind in {USER_CREATED, USER_UPDATED}:
+                        index.put(event.key, document_tokens(event.key, event.data["user"]))
+                    elif event.kind == USER_DELETED:
+                        index.remove(event.key)
+                index.seq = events[-1].seq
+            if index.seq - index.checkpoint_seq >= CHECKPOINT_EVERY:
+                self._checkpoint(index)
+        return index
+
+    def rebuild(self) -> _Index:
+        index = self._build()
+        with _indexes_lock:
+            _indexes[self._file_path] = index
+        return index
+
+    def _load(self) -> _Index:
+        persisted = read_data_file(self._file_path, None)
+        if persisted is None or persisted["seq"] > self._feed.last_seq():
+            return self._build()
+        documents = {
+            username: tokens.split() for username, tokens in persisted["documents"].items()
+        }
+        return _Index(persisted["seq"], documents, checkpoint_seq=persisted["seq"])
+
+    def _build(self) -> _Index:
+        seq = self._feed.last_seq()
+        documents = {
+            user.username: document_tokens(user.username, asdict(user))
+            for user in self._store.iter_all()
+        }
+        index = _Index(seq, documents, checkpoint_seq=seq)
+        self._checkpoint(index)
+        return index
+
+    def _checkpoint(self, index: _Index) -> None:
+        documents = {username: " ".join(tokens) for username, tokens in index.documents.items()}
+        write_data_files({self._file_path: {"seq": index.seq, "documents": documents}})
+        index.checkpoint_seq = index.seq
@@ -1,6 +1,23 @@
-import json
-from dataclasses import dataclass
+import bisect
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, fields
 from pathlib import Path
+from typing import ContextManager, Iterator
+
+from supervisions.change_feed import USER_CREATED, USER_DELETED, USER_UPDATED, Change, feed_for
+from supervisions.offset_index import IndexedMapping, IndexUnavailable, read_indexed_record
+from supervisions.storage import (
+    SNAPSHOT_SUFFIX,
+    FileSignature,
+    SnapshotCache,
+    file_lock,
+    file_signature,
+    read_data_file,
+    recover_interrupted_commit,
+    write_data_files,
+)
+from supervisions.unique_constraints import UniqueIndex
 
 
 @dataclass(frozen=True)
@@ -19,87 +36,394 @@ class StoredUser:
     advisor_2: str | None = None
 
 
+USER_FIELDS = frozenset(field.name for field in fields(StoredUser)) - {"username"}
+
+_ANY = "*"
+
+
+class UserSnapshot:
+    def __init__(self, data: dict[str, dict[str, str]]) -> None:
+        self.data = data
+        self._users: list[StoredUser] | None = None
+        self._usernames: list[str] | None = None
+        self._by_group: dict[tuple[str, str | None], list[str]] | None = None
+        self._by_advisor: dict[str, list[str]] | None = None
+
+    def users(self) -> list[StoredUser]:
+        if self._users is None:
+            self._users = [
+                user_from_record(username, self.data[username]) for username in self.usernames()
+            ]
+        return self._users
+
+    def usernames(self) -> list[str]:
+        if self._usernames is None:
+            self._usernames = sorted(self.data)
+        return self._usernames
+
+    def by_group(self, role: str, category: str | None) -> list[str]:
+        if self._by_group is None:
+            by_group: dict[tuple[str, str | None], list[str]] = {}
+            for username in self.usernames():
+                record = self.data[username]
+                by_group.setdefault((record["role"], record.get("category")), []).append(username)
+                by_group.setdefault((record["role"], _ANY), []).append(username)
+            self._by_group = by_group
+        return self._by_group.get((role, category), [])
+
+    def by_advisor(self, advisor_name: str) -> list[str]:
+        if self._by_advisor is None:
+            by_advisor: dict[str, list[str]] = {}
+            for username in self.usernames():
+                record = self.data[username]
+                for advisor in {record.get("advisor_1"), record.get("advisor_2")}:
+                    if advisor:
+                        by_advisor.setdefault(advisor, []).append(username)
+            self._by_advisor = by_advisor
+        return self._by_advisor.get(advisor_name, [])
+
+
+_snapshots: SnapshotCache[UserSnapshot] = SnapshotCache()
+_uniques: dict[Path, tuple[str, UniqueIndex]] = {}
+_uniques_lock = threading.Lock()
+
+
 class UserStore:
     def __init__(self, file_path: Path | None = None) -> None:
         self._file_path = file_path or self.default_file_path()
+        recover_interrupted_commit(self._file_path.parent)
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
 
     @staticmethod
     def default_file_path() -> Path:
         project_root = Path(__file__).resolve().parents[2]
         return project_root / "data" / "users.json"
 
+    def version(self) -> str:
+        signature = file_signature(self._file_path)
+        return "0" if signature is None else "-".join(str(part) for part in signature)
+
     def get(self, username: str) -> StoredUser | None:
-        data = self._read_raw()
-        record = data.get(username)
+        record = self._record(username)
         if record is None:
             return None
-        return StoredUser(
-            username=username,
-            password=record["password"],
-            role=record["role"],
-            category=record.get("category"),
-            full_name=record.get("full_name"),
-            lattes_link=record.get("lattes_link"),
-            email=record.get("email"),
-            sipap_number=record.get("sipap_number"),
-            enroll_number=record.get("enroll_number"),
-            telephone_number=record.get("telephone_number"),
-            advisor_1=record.get("advisor_1"),
-            advisor_2=record.get("advisor_2"),
-        )
+        return user_from_record(username, record)
 
     def save(self, user: StoredUser) -> None:
-        data = self._read_raw()
-        data[user.username] = {
-            "password": user.password,
-            "role": user.role,
-            "category": user.category,
-            "full_name": user.full_name,
-            "lattes_link": user.lattes_link,
-            "email": user.email,
-            "sipap_number": user.sipap_number,
-            "enroll_number": user.enroll_number,
-            "telephone_number": user.telephone_number,
-            "advisor_1": user.advisor_1,
-            "advisor_2": user.advisor_2,
-        }
-        self._write_raw(data)
+        self._put(user, create=False)
+
+    def create(self, user: StoredUser) -> None:
+        self._put(user, create=True)
+
+    def _put(self, user: StoredUser, create: bool) -> None:
+        with self._write_lock():
+            data = self._read_raw()
+            previous = data.get(user.username)
+            if create and previous is not None:
+                raise ValueError(f"User '{user.username}' already exists")
+            with self._unique_guard(user.username, previous, record_from_user(user)):
+                change = save_into(data, user)
+                if change is None:
+                    return
+                self._write_raw(data)
+            self._emit([change])
+
+    def update_fields(self, username: str, /, **changes: str | None) -> dict[str, str | None]:
+        check_fields(changes)
+        record = self._record(username)
+        if record is None:
+            raise ValueError(f"User '{username}' does not exist")
+        if not changed_fields(record, changes):
+            return {}
+        with self._write_lock():
+            data = self._read_raw()
+            previous = data.get(username)
+            with self._unique_guard(username, previous, {**(previous or {}), **changes}):
+                changed, change = patch_into(data, username, changes)
+                if change is None:
+                    return {}
+                self._write_raw(data)
+            self._emit([change])
+        return changed
 
     def delete(self, username: str) -> bool:
-        data = self._read_raw()
-        if username not in data:
-            return False
-        del data[username]
-        self._write_raw(data)
+        with self._write_lock():
+            data = self._read_raw()
+            with self._unique_guard(username, data.get(username), None):
+                change = delete_from(data, username)
+                if change is None:
+                    return False
+                self._write_raw(data)
+            self._emit([change])
         return True
 
     def all(self) -> list[StoredUser]:
-        data = self._read_raw()
+        return list(self._load().users())
+
+    def iter_all(self) -> Iterator[StoredUser]:
+        return iter(self._load().users())
+
+    def page(
+        self,
+        after: str | None = None,
+        limit: int = 50,
+        role: str | None = None,
+        category: str | None = None,
+        advisor: str | None = None,
+    ) -> list[StoredUser]:
+        snapshot = self._load()
+        if advisor is not None:
+            usernames = snapshot.by_advisor(advisor)
+        elif role is not None:
+            usernames = snapshot.by_group(role, _ANY if category is None else category)
+        else:
+            usernames = snapshot.usernames()
+        start = bisect.bisect_right(usernames, after) if after is not None else 0
+
+        users: list[StoredUser] = []
+        for username in usernames[start:]:
+            record = snapshot.data[username]
+            if role is not None and record["role"] != role:
+                continue
+            if category is not None and record.get("category") != category:
+                continue
+            users.append(user_from_record(username, record))
+            if len(users) >= limit:
+                break
+        return users
+
+    def advisees(self, advisor_name: str) -> list[StoredUser]:
+        snapshot = self._load()
         return [
-            StoredUser(
-                username=username,
-                password=record["password"],
-                role=record["role"],
-                category=record.get("category"),
-                full_name=record.get("full_name"),
-                lattes_link=record.get("lattes_link"),
-                email=record.get("email"),
-                sipap_number=record.get("sipap_number"),
-                enroll_number=record.get("enroll_number"),
-                telephone_number=record.get("telephone_number"),
-                advisor_1=record.get("advisor_1"),
-                advisor_2=record.get("advisor_2"),
-            )
-            for username, record in sorted(data.items())
+            user_from_record(username, snapshot.data[username])
+            for username in snapshot.by_advisor(advisor_name)
         ]
 
+    def _record(self, username: str) -> dict[str, str] | None:
+        snapshot = _snapshots.peek(self._file_path)
+        if snapshot is None and self._file_path.suffix == ".json":
+            try:
+                return read_indexed_record(self._file_path, username)
+            except (IndexUnavailable, FileNotFoundError):
+                pass
+        return (snapshot or self._load()).data.get(username)
+
+    def _load(self) -> UserSnapshot:
+        return _snapshots.get(self._file_path, self._parse)
+
+    def _parse(self) -> UserSnapshot:
+        return UserSnapshot(read_data_file(self._file_path, {}))
+
     def _read_raw(self) -> dict[str, dict[str, str]]:
-        if not self._file_path.exists():
-            return {}
-        with self._file_path.open("r", encoding="utf-8") as file_handle:
-            return json.load(file_handle)
+        return dict(self._load().data)
 
     def _write_raw(self, data: dict[str, dict[str, str]]) -> None:
-        self._file_path.parent.mkdir(parents=True, exist_ok=True)
-        with self._file_path.open("w", encoding="utf-8") as file_handle:
-            json.dump(data, file_handle, indent=2, sort_keys=True)
+        signatures = write_data_files({self._file_path: self._stored_form(data)})
+        self._remember(data, signatures[self._file_path])
+
+    def _stored_form(self, data: dict[str, dict[str, str]]) -> object:
+        return IndexedMapping(data) if self._file_path.suffix == ".json" else data
+
+    def _remember(self, data: dict[str, dict[str, str]], signature: FileSignature) -> None:
+        _snapshots.put(self._file_path, signature, UserSnapshot(data))
+
+    def _write_lock(self) -> ContextManager[None]:
+        return file_lock(self._file_path.with_name(f"{self._file_path.name}.lock"))
+
+    @contextmanager
+    def _commit_lock(self, usernames: set[str]) -> Iterator[None]:
+        with self._write_lock(), self._unique_lock():
+            yield
+
+    def _merged_files(
+        self, staged: dict[str, dict[str, str] | None]
+    ) -> dict[Path, dict[str, dict[str, str]]]:
+        data = self._read_raw()
+        merge_into(data, staged)
+        return {self._file_path: data}
+
+    def _stored_files(self, files: dict[Path, dict[str, dict[str, str]]]) -> dict[Path, object]:
+        return {path: self._stored_form(data) for path, data in files.items()}
+
+    def _committed(
+        self,
+        files: dict[Path, dict[str, dict[str, str]]],
+        signatures: dict[Path, FileSignature],
+    ) -> None:
+        self._remember(files[self._file_path], signatures[self._file_path])
+
+    def _emit(self, changes: list[Change]) -> None:
+        feed_for(self._file_path.parent).publish(changes)
+
+    @contextmanager
+    def _unique_guard(
+        self,
+        username: str,
+        previous: dict[str, str] | None,
+        record: dict[str, str | None] | None,
+    ) -> Iterator[None]:
+        if not UniqueIndex.affects(previous, record):
+            with self._unaffected_unique():
+                yield
+            return
+        with self._unique_lock():
+            index = self._cached_unique(self.version())
+            if index is None:
+                index = UniqueIndex.build(self._load().data)
+            index.check(username, previous, record)
+            yield
+            index.replace(username, previous, record)
+            self._cache_unique(index)
+
+    @contextmanager
+    def _unaffected_unique(self) -> Iterator[None]:
+        index = self._cached_unique(self.version())
+        yield
+        if index is not None:
+            self._cache_unique(index)
+
+    def unique_index(self) -> UniqueIndex:
+        version = self.version()
+        index = self._cached_unique(version)
+        if index is None:
+            index = UniqueIndex.build(self._load().data)
+            self._cache_unique(index, version)
+        return index
+
+    def _unique_lock(self) -> ContextManager[None]:
+        return nullcontext()
+
+    def _cached_unique(self, version: str) -> UniqueIndex | None:
+        with _uniques_lock:
+            entry = _uniques.get(self._file_path)
+        return entry[1] if entry is not None and entry[0] == version else None
+
+    def _cache_unique(self, index: UniqueIndex, version: str | None = None) -> None:
+        if version is None:
+            version = self.version()
+        with _uniques_lock:
+            _uniques[self._file_path] = (version, index)
+
+
+def sharded_directory(file_path: Path) -> Path:
+    return file_path.with_name(f"{file_path.stem}.d")
+
+
+def open_user_store(file_path: Path | None = None) -> UserStore:
+    path = file_path or UserStore.default_file_path()
+    if sharded_directory(path).is_dir():
+        from supervisions.sharded_user_store import ShardedUserStore
+
+        return ShardedUserStore(path)
+    snapshot_path = path.with_suffix(SNAPSHOT_SUFFIX)
+    if snapshot_path.exists():
+        return UserStore(snapshot_path)
+    return UserStore(path)
+
+
+def record_from_user(user: StoredUser) -> dict[str, str]:
+    return {
+        "password": user.password,
+        "role": user.role,
+        "category": user.category,
+        "full_name": user.full_name,
+        "lattes_link": user.lattes_link,
+        "email": user.email,
+        "sipap_number": user.sipap_number,
+        "enroll_number": user.enroll_number,
+        "telephone_number": user.telephone_number,
+        "advisor_1": user.advisor_1,
+        "advisor_2": user.advisor_2,
+    }
+
+
+def save_into(data: dict[str, dict[str, str]], user: StoredUser) -> Change | None:
+    previous = data.get(user.username)
+    record = record_from_user(user)
+    if record == previous:
+        return None
+    data[user.username] = record
+    if previous is None:
+        return (USER_CREATED, user.username, {"user": _public_record(record)})
+    changed = {
+        field: previous.get(field)
+        for field, value in record.items()
+        if field != "password" and previous.get(field) != value
+    }
+    return (USER_UPDATED, user.username, {"user": _public_record(record), "previous": changed})
+
+
+def check_fields(changes: dict[str, str | None]) -> None:
+    unknown = sorted(set(changes) - USER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown user field(s): {', '.join(unknown)}")
+
+
+def changed_fields(
+    record: dict[str, str], changes: dict[str, str | None]
+) -> dict[str, str | None]:
+    return {field: value for field, value in changes.items() if record.get(field) != value}
+
+
+def patch_into(
+    data: dict[str, dict[str, str]], username: str, changes: dict[str, str | None]
+) -> tuple[dict[str, str | None], Change | None]:
+    previous = data.get(username)
+    if previous is None:
+        raise ValueError(f"User '{username}' does not exist")
+    changed = changed_fields(previous, changes)
+    if not changed:
+        return {}, None
+    record = {**previous, **changed}
+    data[username] = record
+    return changed, (
+        USER_UPDATED,
+        username,
+        {
+            "user": _public_record(record),
+            "previous": {
+                field: previous.get(field) for field in changed if field != "password"
+            },
+        },
+    )
+
+
+def merge_into(
+    data: dict[str, dict[str, str]], staged: dict[str, dict[str, str] | None]
+) -> None:
+    for username, record in staged.items():
+        if record is None:
+            data.pop(username, None)
+        else:
+            data[username] = record
+
+
+def delete_from(data: dict[str, dict[str, str]], username: str) -> Change | None:
+    previous = data.pop(username, None)
+    if previous is None:
+        return None
+    return (USER_DELETED, username, {"previous": _public_record(previous)})
+
+
+def user_from_record(username: str, record: dict[str, str]) -> StoredUser:
+    return StoredUser(
+        username=username,
+        password=record["password"],
+        role=record["role"],
+        category=record.get("category"),
+        full_name=record.get("full_name"),
+        lattes_link=record.get("lattes_link"),
+        email=record.get("email"),
+        sipap_number=record.get("sipap_number"),
+        enroll_number=record.get("enroll_number"),
+        telephone_number=record.get("telephone_number"),
+        advisor_1=record.get("advisor_1"),
+        advisor_2=record.get("advisor_2"),
+    )
+
+
+def _public_record(record: dict[str, str]) -> dict[str, str]:
+    return {field: value for field, value in record.items() if field != "password"}
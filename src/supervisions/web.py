@@ -1,22 +1,71 @@
+import json
+from functools import partial
 from pathlib import Path
-
-from flask import Flask, redirect, render_template, request, session, url_for
-
+from typing import Iterator
+
+from flask import (
+    Flask,
+    Response,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_template,
+    url_for,
+)
+
+from supervisions.api import api
+from supervisions.assets import configure_assets, publish_assets
+from supervisions.audit import (
+    REQUEST_DECIDE,
+    USER_CREATE,
+    USER_DELETE,
+    AuditLog,
+    audit_log_for,
+)
 from supervisions.auth import authenticate
-from supervisions.supervision_requests import SupervisionRequestStore
-from supervisions.user_control import User, UserRegistry, parse_role
-from supervisions.user_store import StoredUser, UserStore
+from supervisions.change_feed import REQUEST_CREATED, REQUEST_DECIDED, ChangeEvent, feed_for
+from supervisions.coalescing import SingleFlightCache
+from supervisions.idempotency import configure_idempotency, idempotent
+from supervisions.lazy import Lazy
+from supervisions.profiling import configure_profiling
+from supervisions.reports import PERIODS, supervision_report
+from supervisions.response_compression import CompressionMiddleware
+from supervisions.supervision_requests import (
+    SupervisionRequest,
+    SupervisionRequestStore,
+    open_request_store,
+)
+from supervisions.templating import configure_templates, warm_templates
+from supervisions.unit_of_work import PROFILE_FIELDS, UnitOfWork
+from supervisions.user_control import User, UserRegistry, can, parse_role
+from supervisions.user_store import StoredUser, UserStore, open_user_store
 
 _TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
 
-app = Flask(__name__, template_folder=str(_TEMPLATE_DIR))
+app = Flask(__name__, template_folder=str(_TEMPLATE_DIR), static_folder=None)
 app.config["SECRET_KEY"] = "supervisions-dev-secret"
+app.config["EVENTS_KEEPALIVE_SECONDS"] = 15.0
+app.config["REPORT_WORKERS"] = 0
+app.config["ADVISOR_CAPACITY"] = None
+app.wsgi_app = CompressionMiddleware(app.wsgi_app)
+app.register_blueprint(api)
+configure_templates(app)
+configure_assets(app)
+configure_idempotency(app)
+configure_profiling(app)
+
+_views: SingleFlightCache[object] = SingleFlightCache()
+
+
+def _audit_log() -> AuditLog:
+    return audit_log_for(UserStore.default_file_path().parent)
 
 
 def _professor_full_names(store: UserStore) -> list[str]:
     names = {
         stored.full_name.strip()
-        for stored in store.all()
+        for stored in store.iter_all()
         if stored.role == "regular"
         and stored.category == "professor"
         and stored.full_name
@@ -25,32 +74,86 @@ def _professor_full_names(store: UserStore) -> list[str]:
     return sorted(names)
 
 
-def _dashboard_context(username: str, role: str, category: str) -> dict[str, object]:
-    store = UserStore()
-    request_store = SupervisionRequestStore()
-    profile = store.get(username)
-    professor_name = ""
-    if profile and profile.full_name:
-        professor_name = profile.full_name.strip()
-    return {
+def _dashboard_context(
+    username: str, role: str, category: str, search_query: str = ""
+) -> dict[str, object]:
+    store = open_user_store()
+    profile: Lazy[StoredUser | None] = Lazy(partial(store.get, username))
+    context: dict[str, object] = {
         "username": username,
         "role": role,
         "category": category,
         "profile": profile,
-        "users": UserRegistry(store=store).list_users(),
-        "professor_names": _professor_full_names(store),
-        "pending_requests": request_store.pending_for_professor(professor_name)
-        if role == "regular" and category == "professor" and professor_name
-        else [],
-        "student_pending_requests": request_store.pending_for_student(username)
-        if role == "regular" and category == "student"
-        else [],
+        "search_query": search_query,
+        "users": Lazy(partial(_persisted_users, store)),
+        "professor_names": [],
+        "pending_requests": [],
+        "student_pending_requests": [],
     }
+    builder = _CONTEXT_BUILDERS.get(role if role == "admin" else category)
+    if builder is not None:
+        context.update(builder(store, username, profile, search_query))
+    return context
+
+
+def _persisted_users(store: UserStore) -> list[User]:
+    registry = UserRegistry(store=store)
+    return _views.get(("users", store.file_path), store.version(), registry.list_users)
+
+
+def _admin_context(
+    store: UserStore, username: str, profile: Lazy[StoredUser | None], search_query: str
+) -> dict[str, object]:
+    if not search_query:
+        return {}
+    registry = UserRegistry(store=store)
+    return {"users": Lazy(partial(registry.search_users, search_query))}
+
+
+def _professor_context(
+    store: UserStore, username: str, profile: Lazy[StoredUser | None], search_query: str
+) -> dict[str, object]:
+    def pending_requests() -> list[SupervisionRequest]:
+        professor = profile.resolve()
+        professor_name = (professor.full_name or "").strip() if professor else ""
+        if not professor_name:
+            return []
+        return open_request_store().pending_for_professor(professor_name)
+
+    return {"pending_requests": Lazy(pending_requests)}
+
+
+def _student_context(
+    store: UserStore, username: str, profile: Lazy[StoredUser | None], search_query: str
+) -> dict[str, object]:
+    return {
+        "professor_names": Lazy(
+            lambda: _views.get(
+                ("professor_names", store.file_path),
+                store.version(),
+                partial(_professor_full_names, store),
+            )
+        ),
+        "student_pending_requests": Lazy(
+            lambda: open_request_store().pending_for_student(username)
+        ),
+    }
+
+
+_CONTEXT_BUILDERS = {
+    "admin": _admin_context,
+    "professor": _professor_context,
+    "student": _student_context,
+}
 
 
 @app.get("/")
 def landing_page():
-    store = UserStore()
+    store = open_user_store()
+    return _views.get(("landing", store.file_path), store.version(), partial(_landing, store))
+
+
+def _landing(store: UserStore) -> str:
     users = store.all()
 
     professor_entries: list[dict[str, object]] = []
@@ -125,7 +228,12 @@ def dashboard():
     if not username or not role:
         return redirect(url_for("login_page"))
 
-    context = _dashboard_context(username=username, role=role, category=category)
+    context = _dashboard_context(
+        username=username,
+        role=role,
+        category=category,
+        search_query=request.args.get("q", "").strip(),
+    )
     return render_template(
         "dashboard.html",
         **context,
@@ -134,7 +242,72 @@ def dashboard():
     )
 
 
+def _dashboard_event(
+    event: ChangeEvent, username: str, category: str, professor_name: str
+) -> tuple[str, dict[str, object]] | None:
+    if event.kind not in {REQUEST_CREATED, REQUEST_DECIDED}:
+        return None
+    supervision_request = event.data["request"]
+    if category == "professor" and professor_name:
+        if supervision_request["professor_name"] == professor_name:
+            if event.kind == REQUEST_CREATED:
+                return "pending-request", supervision_request
+            return "request-decided", supervision_request
+        replaced = event.data.get("replaced")
+        if replaced and replaced["professor_name"] == professor_name:
+            return "request-withdrawn", replaced
+    if category == "student" and event.kind == REQUEST_DECIDED:
+        if supervision_request["student_username"] == username:
+            return "decision", supervision_request
+    return None
+
+
+@app.get("/dashboard/events")
+def dashboard_events():
+    username = session.get("username")
+    role = session.get("role")
+    category = session.get("category", "")
+    if not username or not role:
+        return Response(status=401)
+    if role != "regular" or category not in {"professor", "student"}:
+        return Response(status=204)
+
+    professor_name = ""
+    if category == "professor":
+        profile = open_user_store().get(username)
+        if profile and profile.full_name:
+            professor_name = profile.full_name.strip()
+
+    feed = feed_for(SupervisionRequestStore().file_path.parent)
+    last_event_id = request.headers.get("Last-Event-ID", "").strip()
+    seq = int(last_event_id) if last_event_id.isdigit() else feed.last_seq()
+    keepalive = app.config["EVENTS_KEEPALIVE_SECONDS"]
+
+    def stream() -> Iterator[str]:
+        nonlocal seq
+        yield "retry: 5000\n\n"
+        while True:
+            events = feed.wait(seq, timeout=keepalive)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                seq = event.seq
+                message = _dashboard_event(event, username, category, professor_name)
+                if message is None:
+                    continue
+                name, data = message
+                yield f"id: {event.seq}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/profile")
+@idempotent
 def update_profile():
     username = session.get("username")
     role = session.get("role")
@@ -142,9 +315,8 @@ def update_profile():
     if not username or not role:
         return redirect(url_for("login_page"))
 
-    store = UserStore()
     context = _dashboard_context(username=username, role=role, category=category)
-    current_user = context["profile"]
+    current_user = context["profile"].resolve()
     if current_user is None:
         return redirect(url_for("login_page"))
 
@@ -159,56 +331,19 @@ def update_profile():
             403,
         )
 
-    full_name = request.form.get("full_name", "").strip() or None
-    lattes_link = request.form.get("lattes_link", "").strip() or None
-    email = request.form.get("email", "").strip() or None
-    sipap_number = current_user.sipap_number
-    enroll_number = current_user.enroll_number
-    telephone_number = current_user.telephone_number
-    advisor_1 = current_user.advisor_1
-    advisor_2 = current_user.advisor_2
-
-    if category == "professor":
-        sipap_number = request.form.get("sipap_number", "").strip() or None
-
-    if category == "student":
-        enroll_number = request.form.get("enroll_number", "").strip() or None
-        telephone_number = request.form.get("telephone_number", "").strip() or None
-        requested_advisor_1 = request.form.get("advisor_1", "").strip() or None
-        requested_advisor_2 = request.form.get("advisor_2", "").strip() or None
-
-        request_store = SupervisionRequestStore()
-        student_name = full_name or current_user.username
-        if requested_advisor_1 and requested_advisor_1 != current_user.advisor_1:
-            request_store.create_pending(
-                student_username=current_user.username,
-                student_name=student_name,
-                professor_name=requested_advisor_1,
-                slot="advisor_1",
-            )
-        if requested_advisor_2 and requested_advisor_2 != current_user.advisor_2:
-            request_store.create_pending(
-                student_username=current_user.username,
-                student_name=student_name,
-                professor_name=requested_advisor_2,
-                slot="advisor_2",
-            )
-
-    updated = StoredUser(
-        username=current_user.username,
-        password=current_user.password,
-        role=current_user.role,
-        category=current_user.category,
-        full_name=full_name,
-        lattes_link=lattes_link,
-        email=email,
-        sipap_number=sipap_number,
-        enroll_number=enroll_number,
-        telephone_number=telephone_number,
-        advisor_1=advisor_1,
-        advisor_2=advisor_2,
-    )
-    store.save(updated)
+    submitted = {
+        field: request.form.get(field, "").strip() or None for field in PROFILE_FIELDS[category]
+    }
+    try:
+        with UnitOfWork() as unit_of_work:
+            update = unit_of_work.update_profile(current_user, submitted)
+    except ValueError as error:
+        return (
+            render_template("dashboard.html", **context, error=str(error), result=None),
+            400,
+        )
+    if update.unchanged:
+        return render_template("dashboard.html", **context, error=None, result="Profile unchanged")
 
     refreshed_context = _dashboard_context(username=username, role=role, category=category)
 
@@ -218,13 +353,14 @@ def update_profile():
         error=None,
         result=(
             "Profile updated and supervision request(s) submitted"
-            if category == "student"
+            if update.requested
             else "Profile updated"
         ),
     )
 
 
 @app.post("/supervision-requests/decision")
+@idempotent
 def decide_supervision_request():
     username = session.get("username")
     role = session.get("role")
@@ -233,7 +369,7 @@ def decide_supervision_request():
         return redirect(url_for("login_page"))
 
     context = _dashboard_context(username=username, role=role, category=category)
-    profile = context["profile"]
+    profile = context["profile"].resolve()
     if role != "regular" or category != "professor" or profile is None or not profile.full_name:
         return (
             render_template(
@@ -271,12 +407,32 @@ def decide_supervision_request():
             400,
         )
 
-    request_store = SupervisionRequestStore()
-    decided = request_store.decide(
-        request_id=request_id,
-        professor_name=profile.full_name.strip(),
-        decision=decision,
-    )
+    try:
+        with UnitOfWork(advisor_capacity=app.config["ADVISOR_CAPACITY"]) as unit_of_work:
+            decided = unit_of_work.decide_supervision_request(
+                request_id=request_id,
+                professor_name=profile.full_name.strip(),
+                decision=decision,
+            )
+            if decided is not None:
+                unit_of_work.audit(
+                    username,
+                    REQUEST_DECIDE,
+                    str(decided.id),
+                    decision=decision,
+                    student=decided.student_username,
+                )
+    except ValueError as error:
+        return (
+            render_template(
+                "dashboard.html",
+                **context,
+                error=str(error),
+                result=None,
+            ),
+            409,
+        )
+
     if decided is None:
         refreshed_context = _dashboard_context(username=username, role=role, category=category)
         return (
@@ -289,33 +445,6 @@ def decide_supervision_request():
             404,
         )
 
-    if decision == "accepted":
-        user_store = UserStore()
-        student = user_store.get(decided.student_username)
-        if student is not None:
-            advisor_1 = student.advisor_1
-            advisor_2 = student.advisor_2
-            if decided.slot == "advisor_1":
-                advisor_1 = decided.professor_name
-            if decided.slot == "advisor_2":
-                advisor_2 = decided.professor_name
-            user_store.save(
-                StoredUser(
-                    username=student.username,
-                    password=student.password,
-                    role=student.role,
-                    category=student.category,
-                    full_name=student.full_name,
-                    lattes_link=student.lattes_link,
-                    email=student.email,
-                    sipap_number=student.sipap_number,
-                    enroll_number=student.enroll_number,
-                    telephone_number=student.telephone_number,
-                    advisor_1=advisor_1,
-                    advisor_2=advisor_2,
-                )
-            )
-
     refreshed_context = _dashboard_context(username=username, role=role, category=category)
     return render_template(
         "dashboard.html",
@@ -326,6 +455,7 @@ def decide_supervision_request():
 
 
 @app.post("/admin/users")
+@idempotent
 def create_user():
     username = session.get("username")
     role = session.get("role")
@@ -394,6 +524,13 @@ def create_user():
             400,
         )
 
+    _audit_log().record(
+        username,
+        USER_CREATE,
+        created.username,
+        role=created.role.value,
+        category=created.category.value if created.category else None,
+    )
     context = _dashboard_context(
         username=username,
         role=role,
@@ -471,6 +608,7 @@ def delete_user():
             404,
         )
 
+    _audit_log().record(username, USER_DELETE, target_username)
     return render_template(
         "dashboard.html",
         **context,
@@ -479,6 +617,34 @@ def delete_user():
     )
 
 
+@app.get("/admin/reports")
+def supervision_reports():
+    username = session.get("username")
+    role = session.get("role")
+    category = session.get("category", "")
+    if not username or not role:
+        return redirect(url_for("login_page"))
+
+    actor = User(username=username, role=parse_role(role))
+    if not can(actor, "reports:view"):
+        context = _dashboard_context(username=username, role=role, category=category)
+        return (
+            render_template(
+                "dashboard.html",
+                **context,
+                error=f"User '{username}' with role '{role}' cannot 'reports:view'",
+                result=None,
+            ),
+            403,
+        )
+
+    period = request.args.get("period", "month").strip()
+    if period not in PERIODS:
+        period = "month"
+    report = supervision_report(period=period, workers=app.config["REPORT_WORKERS"])
+    return stream_template("reports.html", report=report, periods=PERIODS)
+
+
 @app.post("/logout")
 def logout():
     session.clear()
@@ -486,6 +652,8 @@ def logout():
 
 
 def main() -> None:
+    publish_assets(app)
+    warm_templates(app)
     app.run(host="127.0.0.1", port=8000, debug=False)
 
 
@@ -0,0 +1,4 @@
+from supervisions.preload import preload
+from supervisions.web import app
+
+preload(app)
@@ -0,0 +1,21 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.user_store import UserStore
+
+
+def use_temporary_stores(test: unittest.TestCase) -> Path:
+    temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(temp_dir.cleanup)
+    directory = Path(temp_dir.name)
+    for target, path in (
+        (UserStore, directory / "users.json"),
+        (SupervisionRequestStore, directory / "supervision_requests.json"),
+    ):
+        patcher = patch.object(target, "default_file_path", return_value=path)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return directory
@@ -0,0 +1,200 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.user_store import StoredUser, UserStore
+from supervisions.web import app
+
+
+class ApiTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        users_file = Path(self._temp_dir.name) / "users.json"
+        requests_file = Path(self._temp_dir.name) / "supervision_requests.json"
+        self._users_patch = patch(
+            "supervisions.user_store.UserStore.default_file_path",
+            return_value=users_file,
+        )
+        self._requests_patch = patch(
+            "supervisions.supervision_requests.SupervisionRequestStore.default_file_path",
+            return_value=requests_file,
+        )
+        self._users_patch.start()
+        self._requests_patch.start()
+        self.addCleanup(self._users_patch.stop)
+        self.addCleanup(self._requests_patch.stop)
+        self.addCleanup(self._temp_dir.cleanup)
+
+        store = UserStore(file_path=users_file)
+        store.save(StoredUser(username="alice", password="alice123", role="admin"))
+        store.save(
+            StoredUser(
+                username="prof",
+                password="prof123",
+                role="regular",
+                category="professor",
+                full_name="Professor Silva",
+            )
+        )
+        for username in ("bob", "carol", "dave"):
+            store.save(
+                StoredUser(
+                    username=username,
+                    password=f"{username}123",
+                    role="regular",
+                    category="student",
+                    advisor_1="Professor Silva" if username != "dave" else None,
+                )
+            )
+        request_store = SupervisionRequestStore(file_path=requests_file)
+        request_store.create_pending("dave", "Dave", "Professor Silva", "advisor_1")
+
+        self.client = app.test_client()
+
+    def _login(self, username: str) -> None:
+        self.client.post(
+            "/login",
+            data={"username": username, "password": f"{username}123"},
+            follow_redirects=True,
+        )
+
+    def test_users_requires_reports_permission(self) -> None:
+        self.assertEqual(self.client.get("/api/v1/users").status_code, 401)
+        self._login("bob")
+        response = self.client.get("/api/v1/users")
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("reports:view", response.get_json()["error"])
+
+    def test_users_projection_and_keyset_pagination(self) -> None:
+        self._login("alice")
+        first = self.client.get("/api/v1/users?role=regular&category=student&limit=2&fields=username")
+        self.assertEqual(first.status_code, 200)
+        body = first.get_json()
+        self.assertEqual(body["items"], [{"username": "bob"}, {"username": "carol"}])
+        self.assertEqual(body["next_after"], "carol")
+
+        second = self.client.get(
+            f"/api/v1/users?role=regular&category=student&limit=2&fields=username&after={body['next_after']}"
+        )
+        self.assertEqual(second.get_json(), {"items": [{"username": "dave"}], "next_after": None})
+
+        self.assertEqual(self.client.get("/api/v1/users?fields=password").status_code, 400)
+        self.assertNotIn("password", self.client.get("/api/v1/users").get_json()["items"][0])
+
+    def test_professor_students_and_conditional_requests(self) -> None:
+        self._login("bob")
+        response = self.client.get("/api/v1/professors/prof/students?fields=username")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["username"] for item in response.get_json()["items"]], ["bob", "carol"]
+        )
+
+        etag = response.headers["ETag"]
+        cached = self.client.get(
+            "/api/v1/professors/prof/students?fields=username",
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(cached.status_code, 304)
+
+        UserStore().save(
+            StoredUser(
+                username="dave",
+                password="dave123",
+                role="regular",
+                category="student",
+                advisor_1="Professor Silva",
+            )
+        )
+        refreshed = self.client.get(
+            "/api/v1/professors/prof/students?fields=username",
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(len(refreshed.get_json()["items"]), 3)
+        self.assertEqual(self.client.get("/api/v1/professors/bob/students").status_code, 404)
+
+    def test_professor_students_hides_contact_fields_from_regular_users(self) -> None:
+        self._login("bob")
+        response = self.client.get("/api/v1/professors/prof/students")
+        self.assertEqual(
+            response.get_json()["items"][0], {"username": "bob", "full_name": None}
+        )
+        denied = self.client.get("/api/v1/professors/prof/students?fields=username,email")
+        self.assertEqual(denied.status_code, 400)
+
+        self.client.post("/logout")
+        self._login("alice")
+        response = self.client.get("/api/v1/professors/prof/students?fields=username,email")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.get_json()["items"][0])
+
+    def test_conditional_requests_survive_compression(self) -> None:
+        store = UserStore()
+        for index in range(30):
+            store.save(
+                StoredUser(username=f"user{index:02d}", password="secret", role="regular")
+            )
+        self._login("alice")
+        headers = {"Accept-Encoding": "gzip"}
+        response = self.client.get("/api/v1/users?limit=100", headers=headers)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+
+        cached = self.client.get(
+            "/api/v1/users?limit=100", headers={**headers, "If-None-Match": etag}
+        )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+
+    def test_users_search(self) -> None:
+        self._login("alice")
+        response = self.client.get("/api/v1/users/search?q=silv&fields=username,full_name")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get_json()["items"],
+            [{"username": "prof", "full_name": "Professor Silva"}],
+        )
+        self.assertEqual(self.client.get("/api/v1/users/search").status_code, 400)
+
+    def test_supervision_requests_filters(self) -> None:
+        self._login("alice")
+        response = self.client.get(
+            "/api/v1/supervision-requests?status=pending&professor=Professor%20Silva"
+        )
+        items = response.get_json()["items"]
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["student_username"], "dave")
+        empty = self.client.get("/api/v1/supervision-requests?status=accepted")
+        self.assertEqual(empty.get_json()["items"], [])
+
+
+    def test_patch_profile(self) -> None:
+        self._login("dave")
+        response = self.client.patch(
+            "/api/v1/profile", json={"email": " dave@example.com ", "advisor_1": "Professor Silva"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get_json(), {"changed": {"email": "dave@example.com"}, "requested": []}
+        )
+        self.assertEqual(len(SupervisionRequestStore().pending_for_student("dave")), 1)
+
+        version = UserStore().version()
+        response = self.client.patch("/api/v1/profile", json={"email": "dave@example.com"})
+        self.assertEqual(response.get_json(), {"changed": {}, "requested": []})
+        self.assertEqual(UserStore().version(), version)
+
+        response = self.client.patch("/api/v1/profile", json={"advisor_2": "Professor Silva"})
+        self.assertEqual(response.get_json()["requested"][0]["slot"], "advisor_2")
+
+        for body in ({"role": "admin"}, {"email": 1}, ["email"]):
+            self.assertEqual(self.client.patch("/api/v1/profile", json=body).status_code, 400)
+        self._login("alice")
+        self.assertEqual(self.client.patch("/api/v1/profile", json={}).status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
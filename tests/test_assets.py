@@ -0,0 +1,114 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from flask import Flask
+
+from supervisions.assets import (
+    ASSET_SOURCE_DIR,
+    IMMUTABLE,
+    build_assets,
+    configure_assets,
+    publish_assets,
+)
+from supervisions.web import app
+
+
+class AssetPipelineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.source_dir = Path(self._temp_dir.name) / "assets"
+        self.build_dir = Path(self._temp_dir.name) / "static"
+        (self.source_dir / "css").mkdir(parents=True)
+
+    def test_fingerprints_follow_content(self) -> None:
+        stylesheet = self.source_dir / "css" / "site.css"
+        stylesheet.write_text("body { color: red; }\n", encoding="utf-8")
+        first = build_assets(self.source_dir, self.build_dir)["css/site.css"]
+        self.assertRegex(first, r"^css/site\.[0-9a-f]{12}\.css$")
+        self.assertEqual(
+            gzip.decompress((self.build_dir / f"{first}.gz").read_bytes()),
+            stylesheet.read_bytes(),
+        )
+
+        stylesheet.write_text("body { color: blue; }\n", encoding="utf-8")
+        second = build_assets(self.source_dir, self.build_dir)["css/site.css"]
+        self.assertNotEqual(first, second)
+        self.assertTrue((self.build_dir / first).exists())
+        manifest = json.loads((self.build_dir / "manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(manifest, {"css/site.css": second})
+
+    def test_unwritable_build_dir_serves_from_the_sources(self) -> None:
+        blocked = Path(self._temp_dir.name) / "read-only"
+        blocked.write_text("", encoding="utf-8")
+        fallback = Flask(__name__, static_folder=None)
+        manifest = configure_assets(fallback, blocked / "static")
+        self.assertFalse(publish_assets(fallback))
+
+        self.assertEqual(manifest, build_assets(build_dir=self.build_dir))
+        response = fallback.test_client().get(
+            f"/static/{manifest['css/base.css']}", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.data, (ASSET_SOURCE_DIR / "css" / "base.css").read_bytes())
+        self.assertEqual(response.headers["Cache-Control"], IMMUTABLE)
+        response.close()
+
+
+    def test_importing_the_web_app_writes_nothing(self) -> None:
+        target = Path(self._temp_dir.name) / "data"
+        target.mkdir()
+        script = (
+            "import sys; from pathlib import Path; "
+            "from supervisions import assets, templating; "
+            "target = Path(sys.argv[1]); "
+            "assets.default_build_dir = lambda: target / 'static'; "
+            "templating.default_bytecode_cache_dir = lambda: target / 'template_cache'; "
+            "import supervisions.web"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        subprocess.run([sys.executable, "-c", script, str(target)], check=True, env=env)
+        self.assertEqual(list(target.iterdir()), [])
+
+
+class StaticRouteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        publish_assets(app)
+        self.client = app.test_client()
+        self.manifest = app.extensions["asset_manifest"]
+
+    def test_pages_link_fingerprinted_stylesheets(self) -> None:
+        page = self.client.get("/login").get_data(as_text=True)
+        self.assertNotIn("<style>", page)
+        self.assertIn(f'href="/static/{self.manifest["css/base.css"]}"', page)
+        self.assertIn(f'href="/static/{self.manifest["css/login.css"]}"', page)
+
+    def test_serves_precompressed_immutable_assets(self) -> None:
+        url = f"/static/{self.manifest['css/base.css']}"
+        source = (ASSET_SOURCE_DIR / "css" / "base.css").read_bytes()
+
+        compressed = self.client.get(url, headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertEqual(compressed.headers["Cache-Control"], IMMUTABLE)
+        self.assertEqual(compressed.mimetype, "text/css")
+        self.assertEqual(gzip.decompress(compressed.data), source)
+
+        plain = self.client.get(url)
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertEqual(plain.data, source)
+        self.assertIn("Accept-Encoding", plain.headers["Vary"])
+
+    def test_unlisted_files_are_not_served(self) -> None:
+        self.assertEqual(self.client.get("/static/manifest.json").status_code, 404)
+        self.assertEqual(self.client.get("/static/css/base.css").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import gzip
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.audit import REQUEST_DECIDE, USER_CREATE, USER_DELETE, AuditLog
+from supervisions.storage import file_lock
+
+
+class AuditLogTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name) / "audit"
+
+    def _log(self, **options) -> AuditLog:
+        log = AuditLog(self.directory, **options)
+        self.addCleanup(log.close)
+        return log
+
+    def test_batches_records_and_filters(self) -> None:
+        log = self._log()
+        with patch("supervisions.audit.os.fsync") as fsync:
+            with file_lock(self.directory / ".audit.lock"):
+                for index in range(200):
+                    log.record("alice", USER_CREATE, f"user{index:03d}", role="regular")
+                log.record("prof", REQUEST_DECIDE, "7", decision="accepted")
+            log.flush()
+        self.assertLessEqual(fsync.call_count, 2)
+
+        created = list(log.query(action=USER_CREATE))
+        self.assertEqual(len(created), 200)
+        self.assertEqual(created[0].details, {"role": "regular"})
+        [decided] = log.query(actor="prof")
+        self.assertEqual((decided.action, decided.target), (REQUEST_DECIDE, "7"))
+        self.assertEqual(list(log.query(since=decided.ts + 1)), [])
+
+    def test_rotates_by_size_into_compressed_segments(self) -> None:
+        log = self._log(max_bytes=2048)
+        for index in range(60):
+            log.record("alice", USER_CREATE, f"user{index:03d}")
+            log.flush()
+        log.record("bob", USER_DELETE, "user001")
+        log.flush()
+        log.rotate()
+
+        segments = log.segments()
+        self.assertGreater(len(segments), 2)
+        self.assertEqual(sum(segment.count for segment in segments), 61)
+        self.assertEqual(segments[-1].actors, ["alice", "bob"])
+        self.assertFalse((self.directory / "current.jsonl").exists())
+        with gzip.open(self.directory / segments[0].name, "rt", encoding="utf-8") as lines:
+            self.assertIn('"target":"user000"', lines.readline())
+
+        with patch("supervisions.audit.gzip.open", wraps=gzip.open) as opened:
+            [deleted] = log.query(actor="bob")
+        self.assertEqual(deleted.target, "user001")
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(list(log.query(action=USER_CREATE))), 60)
+
+    def test_rotates_by_age(self) -> None:
+        log = self._log(max_age=0.0)
+        log.record("alice", USER_CREATE, "bob")
+        log.flush()
+        log.record("alice", USER_DELETE, "bob")
+        log.flush()
+        self.assertEqual([segment.actions for segment in log.segments()], [[USER_CREATE]])
+        self.assertEqual([record.action for record in log.query()], [USER_CREATE, USER_DELETE])
+
+    def test_close_stops_the_writer_while_records_arrive(self) -> None:
+        running = set(threading.enumerate())
+        log = self._log()
+        log.record("alice", USER_CREATE, "bob")
+        put = log._queue.put
+
+        def record_during_close(item, *args, **kwargs):
+            if item is None:
+                log.record("alice", USER_DELETE, "bob")
+            put(item, *args, **kwargs)
+
+        with patch.object(log._queue, "put", side_effect=record_during_close):
+            closer = threading.Thread(target=log.close, daemon=True)
+            closer.start()
+            closer.join(5)
+        self.assertFalse(closer.is_alive())
+        writers = [
+            thread
+            for thread in set(threading.enumerate()) - running
+            if thread.name == "audit-writer"
+        ]
+        self.assertEqual(writers, [])
+        self.assertEqual([record.action for record in log.query()], [USER_CREATE, USER_DELETE])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from supervisions.binary_snapshot import decode, encode
+from supervisions.supervision_requests import open_request_store
+from supervisions.user_store import StoredUser, UserStore, open_user_store
+
+
+class BinarySnapshotTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+
+    def _round_trip(self, data: object) -> object:
+        path = self.directory / "data.snap"
+        path.write_bytes(encode(data))
+        return decode(path)
+
+    def test_round_trips_store_shapes(self) -> None:
+        users = {
+            "bob": {"password": "x", "role": "regular", "category": "student", "full_name": "Zoë"},
+            "alice": {"password": "y", "role": "admin", "category": None, "full_name": None},
+        }
+        requests = [
+            {"id": 1, "status": "pending", "slot": "advisor_1"},
+            {"id": 7, "status": "accepted", "slot": "advisor_2"},
+        ]
+        self.assertEqual(self._round_trip(users), users)
+        self.assertEqual(self._round_trip(requests), requests)
+        self.assertEqual(self._round_trip({}), {})
+        self.assertEqual(self._round_trip([]), [])
+
+    def test_strings_containing_separator(self) -> None:
+        data = {"a\x00b": {"full_name": "x\x00y", "role": "regular"}}
+        self.assertEqual(self._round_trip(data), data)
+
+    def test_rejects_nested_values(self) -> None:
+        with self.assertRaises(TypeError):
+            encode([{"id": 1, "tags": ["a"]}])
+
+    def test_factories_prefer_existing_snapshots(self) -> None:
+        users_file = self.directory / "users.json"
+        requests_file = self.directory / "supervision_requests.json"
+        self.assertEqual(open_user_store(users_file).file_path, users_file)
+
+        store = UserStore(file_path=self.directory / "users.snap")
+        store.save(StoredUser(username="bob", password="bob123", role="regular"))
+        request_store = open_request_store(self.directory / "supervision_requests.snap")
+        request_store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+        reopened = open_user_store(users_file)
+        self.assertEqual(reopened.file_path, self.directory / "users.snap")
+        self.assertEqual(reopened.get("bob").password, "bob123")
+        self.assertEqual(len(open_request_store(requests_file).pending_for_student("bob")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.change_feed import (
+    REQUEST_CREATED,
+    USER_CREATED,
+    USER_DELETED,
+    USER_UPDATED,
+    ChangeEvent,
+    ChangeFeed,
+    feed_for,
+)
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.user_store = UserStore(file_path=self.directory / "users.json")
+        self.request_store = SupervisionRequestStore(
+            file_path=self.directory / "supervision_requests.json"
+        )
+        self.received: list[ChangeEvent] = []
+        self.addCleanup(feed_for(self.directory).subscribe(self.received.append))
+
+    def test_store_mutations_are_published_in_order(self) -> None:
+        self.user_store.save(StoredUser(username="bob", password="bob123", role="regular"))
+        self.user_store.save(
+            StoredUser(username="bob", password="bob123", role="regular", full_name="Bob")
+        )
+        self.user_store.save(
+            StoredUser(username="bob", password="bob123", role="regular", full_name="Bob")
+        )
+        self.user_store.delete("bob")
+
+        self.assertEqual(
+            [event.kind for event in self.received],
+            [USER_CREATED, USER_UPDATED, USER_DELETED],
+        )
+        self.assertEqual([event.seq for event in self.received], [1, 2, 3])
+        self.assertEqual(self.received[1].data["previous"], {"full_name": None})
+        self.assertNotIn("password", self.received[0].data["user"])
+
+    def test_log_can_be_tailed_by_another_reader(self) -> None:
+        self.user_store.save(StoredUser(username="bob", password="bob123", role="regular"))
+        self.request_store.create_pending(
+            student_username="bob",
+            student_name="Bob",
+            professor_name="Professor Silva",
+            slot="advisor_1",
+        )
+
+        reader = ChangeFeed(self.directory / "changes.log")
+        self.assertEqual(reader.last_seq(), 2)
+        tailed = reader.events_since(1)
+        self.assertEqual([(event.seq, event.kind) for event in tailed], [(2, REQUEST_CREATED)])
+
+    def test_events_follow_commit_order_for_concurrent_writers(self) -> None:
+        self.user_store.save(StoredUser(username="bob", password="bob123", role="regular"))
+        first_publishing = threading.Event()
+        second_published = threading.Event()
+        publish = ChangeFeed.publish
+
+        def ordered_publish(feed: ChangeFeed, changes):
+            if threading.current_thread().name == "first":
+                first_publishing.set()
+                second_published.wait(0.2)
+            events = publish(feed, changes)
+            if threading.current_thread().name == "second":
+                second_published.set()
+            return events
+
+        def update(full_name: str) -> None:
+            UserStore(file_path=self.user_store.file_path).update_fields("bob", full_name=full_name)
+
+        first = threading.Thread(target=update, args=("Ana",), name="first")
+        second = threading.Thread(target=update, args=("Bia",), name="second")
+        with patch.object(ChangeFeed, "publish", ordered_publish):
+            first.start()
+            first_publishing.wait(5)
+            second.start()
+            first.join()
+            second.join()
+
+        events = feed_for(self.directory).events_since(0)
+        self.assertEqual([event.key for event in events], ["bob"] * 3)
+        self.assertEqual(
+            events[-1].data["user"]["full_name"], self.user_store.get("bob").full_name
+        )
+
+    def test_unit_of_work_publishes_after_commit(self) -> None:
+        unit_of_work = UnitOfWork(user_store=self.user_store, request_store=self.request_store)
+        unit_of_work.users.save(StoredUser(username="bob", password="bob123", role="regular"))
+        self.assertEqual(self.received, [])
+        unit_of_work.commit()
+        self.assertEqual([event.kind for event in self.received], [USER_CREATED])
+
+        unit_of_work.users.delete("bob")
+        unit_of_work.rollback()
+        self.assertEqual(len(self.received), 1)
+
+    def test_wait_wakes_up_on_publish(self) -> None:
+        feed = feed_for(self.directory)
+        timer = threading.Timer(
+            0.05,
+            self.user_store.save,
+            args=(StoredUser(username="bob", password="bob123", role="regular"),),
+        )
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        events = feed.wait(0, timeout=5.0)
+        self.assertEqual([event.kind for event in events], [USER_CREATED])
+        self.assertEqual(feed.wait(events[-1].seq, timeout=0.01), [])
+
+    def test_new_reader_seeks_without_scanning_the_log(self) -> None:
+        writer = ChangeFeed(self.directory / "seek.log")
+        for seq in range(1, 1001):
+            writer.publish([(USER_UPDATED, f"user{seq}", {"padding": "x" * 200})])
+
+        reader = ChangeFeed(self.directory / "seek.log")
+        self.assertEqual(reader.last_seq(), 1000)
+        for seq in (0, 1, 255, 256, 511, 997, 1000):
+            events = reader.events_since(seq, limit=3)
+            self.assertEqual(
+                [event.seq for event in events], list(range(seq + 1, min(seq + 3, 1000) + 1))
+            )
+
+    def test_log_rotates_and_keeps_recent_segments(self) -> None:
+        feed = ChangeFeed(self.directory / "rotating.log", segment_bytes=1024, retained_segments=2)
+        for seq in range(1, 101):
+            feed.publish([(USER_UPDATED, f"user{seq}", {"padding": "x" * 50})])
+
+        segments = feed.segments()
+        self.assertEqual(len(segments), 2)
+        self.assertLess(feed.log_path.stat().st_size, 1024)
+        reader = ChangeFeed(self.directory / "rotating.log")
+        self.assertEqual(reader.last_seq(), 100)
+        retained = reader.events_since(0)
+        self.assertEqual(retained[0].seq, int(segments[0].suffix[1:]))
+        self.assertEqual(
+            [event.seq for event in retained], list(range(retained[0].seq, 101))
+        )
+        self.assertEqual([event.seq for event in reader.events_since(97)], [98, 99, 100])
+
+        feed.segment_bytes = 1
+        feed.publish([(USER_DELETED, "user1", {})])
+        self.assertEqual(feed.log_path.stat().st_size, 0)
+        self.assertEqual(reader.last_seq(), 101)
+        self.assertEqual(feed.publish([(USER_DELETED, "user2", {})])[0].seq, 102)
+
+
+if __name__ == "__main__":
+    unittest.main()
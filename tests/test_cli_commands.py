@@ -0,0 +1,185 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.main import run
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.user_store import UserStore
+
+
+class CliCommandsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.users_file = self.directory / "users.json"
+        self.requests_file = self.directory / "supervision_requests.json"
+        for target, path in (
+            ("supervisions.user_store.UserStore.default_file_path", self.users_file),
+            (
+                "supervisions.supervision_requests.SupervisionRequestStore.default_file_path",
+                self.requests_file,
+            ),
+        ):
+            patcher = patch(target, return_value=path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _script(self, content: str) -> Path:
+        script = self.directory / "ops.txt"
+        script.write_text(content, encoding="utf-8")
+        return script
+
+    def _run(self, *argv: str) -> tuple[int, str]:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = run(["--role", "admin", "--username", "alice", *argv])
+        return status, output.getvalue()
+
+    def test_script_applies_all_operations_in_one_commit(self) -> None:
+        script = self.directory / "ops.txt"
+        script.write_text(
+            "# provisioning\n"
+            "create carol --category professor\n"
+            "create dave\n"
+            'set-advisor dave advisor_1 "Carol Prof"\n',
+            encoding="utf-8",
+        )
+        status, output = self._run("--script", str(script))
+
+        self.assertEqual(status, 0)
+        self.assertNotIn("users=[", output)
+        dave = UserStore().get("dave")
+        assert dave is not None
+        self.assertEqual(dave.advisor_1, "Carol Prof")
+
+    def test_failing_script_line_rolls_back_everything(self) -> None:
+        script = self.directory / "ops.txt"
+        script.write_text("create carol\ndelete ghost\n", encoding="utf-8")
+        status, output = self._run("--script", str(script))
+
+        self.assertEqual(status, 1)
+        self.assertIn("ops.txt:2: User 'ghost' not found", output)
+        self.assertIsNone(UserStore().get("carol"))
+
+    def test_requests_list_and_decide(self) -> None:
+        self._run("create", "bob")
+        created = SupervisionRequestStore().create_pending(
+            "bob", "Bob", "Professor Silva", "advisor_1"
+        )
+
+        status, output = self._run("requests", "list", "--status", "pending")
+        self.assertEqual(status, 0)
+        self.assertIn(f"{created.id} pending bob -> Professor Silva (advisor_1)", output)
+
+        status, output = self._run("requests", "decide", str(created.id), "accepted")
+        self.assertEqual(status, 0)
+        self.assertIn("status=accepted", output)
+        bob = UserStore().get("bob")
+        assert bob is not None
+        self.assertEqual(bob.advisor_1, "Professor Silva")
+
+    def test_notify_once_delivers_decision_to_jsonl(self) -> None:
+        self._run("create", "bob")
+        users = UserStore()
+        users.update_fields("bob", email="bob@example.com")
+        created = SupervisionRequestStore().create_pending(
+            "bob", "Bob", "Professor Silva", "advisor_1"
+        )
+        self._run("requests", "decide", str(created.id), "rejected")
+
+        sink = self.directory / "mail.jsonl"
+        status, output = self._run("notify", "--once", "--path", str(sink))
+        self.assertEqual(status, 0)
+        self.assertIn("delivered=1 skipped=0 retried=0 dead=0", output)
+        self.assertIn('"to": "bob@example.com"', sink.read_text(encoding="utf-8"))
+
+    def test_audit_records_admin_actions(self) -> None:
+        self._run("create", "bob")
+        self._run("delete", "bob")
+        self._run("--script", str(self._script("create carol\ndelete ghost\n")))
+
+        status, output = self._run("audit", "--actor", "alice")
+        self.assertEqual(status, 0)
+        lines = output.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith("alice user.create bob category=student role=regular"))
+        self.assertIn("alice user.delete bob", lines[1])
+        _, output = self._run("audit", "--action", "user.delete", "--since", "2000-01-01")
+        self.assertEqual(len(output.splitlines()), 1)
+        _, output = self._run("audit", "--until", "2000-01-01")
+        self.assertEqual(output.strip(), "")
+
+    def test_create_lists_users_only_when_asked(self) -> None:
+        _, quiet = self._run("create", "carol")
+        _, listed = self._run("create", "dave", "--list")
+        self.assertNotIn("users=[", quiet)
+        self.assertIn("users=[carol:regular:student, dave:regular:student]", listed)
+
+    def test_counters_show_and_repair(self) -> None:
+        self._run("create", "bob")
+        SupervisionRequestStore().create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+        status, output = self._run("counters", "show")
+        self.assertEqual(status, 0)
+        self.assertIn("Professor Silva: advisees=0 pending=1", output)
+
+        status, output = self._run("counters", "repair")
+        self.assertEqual(status, 0)
+        self.assertIn("counters rebuilt drifted=0", output)
+
+    def test_reports_summarize_users(self) -> None:
+        self._run("create", "carol", "--category", "professor")
+        self._run("create", "dave")
+
+        status, output = self._run("reports", "--period", "week")
+        self.assertEqual(status, 0)
+        self.assertIn("  carol: 0, 0", output)
+        self.assertIn("students without advisors: dave", output)
+
+    def test_storage_migrate_to_snapshot_and_export(self) -> None:
+        self._run("create", "bob")
+        SupervisionRequestStore().create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+        status, output = self._run("storage", "migrate", "--layout", "snapshot")
+        self.assertEqual(status, 0)
+        self.assertIn("layout=snapshot files=[users.json, supervision_requests.json]", output)
+        self.assertFalse(self.users_file.exists())
+        self.assertTrue((self.directory / "users.snap").exists())
+
+        self._run("create", "carol")
+        status, output = self._run("storage", "export", str(self.directory / "export"))
+        self.assertEqual(status, 0)
+        self.assertIn("exported users=2 requests=1", output)
+        self.assertIn('"carol"', (self.directory / "export" / "users.json").read_text())
+
+        status, _ = self._run("storage", "migrate", "--layout", "json")
+        self.assertEqual(status, 0)
+        self.assertFalse((self.directory / "users.snap").exists())
+        self.assertIsNotNone(UserStore().get("carol"))
+
+    def test_storage_migrate_requests_to_sqlite(self) -> None:
+        self._run("create", "bob")
+        SupervisionRequestStore().create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+        status, output = self._run("storage", "migrate", "--layout", "sqlite")
+        self.assertEqual(status, 0)
+        self.assertIn("layout=sqlite requests=1", output)
+        self.assertTrue((self.directory / "supervision_requests.sqlite3").exists())
+
+        status, output = self._run("requests", "list")
+        self.assertIn("Professor Silva", output)
+        status, output = self._run("storage", "migrate", "--layout", "snapshot")
+        self.assertEqual(status, 1)
+
+        status, output = self._run("storage", "migrate", "--layout", "json")
+        self.assertEqual(status, 0)
+        self.assertIn("supervision_requests.sqlite3", output)
+        self.assertEqual(len(SupervisionRequestStore().all()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.main import run_shell
+from supervisions.user_store import UserStore
+
+CLI_IMPORT_BUDGET_US = 100_000
+WEB_ONLY_MODULES = {"flask", "jinja2", "werkzeug", "supervisions.web", "supervisions.api"}
+CLI_MODULES = ("supervisions.main", "supervisions.commands")
+
+
+def _import_profile() -> dict[str, int]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(CLI_MODULES)}"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    cumulative: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+class CliStartupTest(unittest.TestCase):
+    def test_cli_import_stays_within_budget(self) -> None:
+        profiles = [_import_profile() for _ in range(3)]
+        imported = set(profiles[0])
+        self.assertEqual(imported & WEB_ONLY_MODULES, set())
+        fastest = min(sum(profile[name] for name in CLI_MODULES) for profile in profiles)
+        self.assertLess(
+            fastest,
+            CLI_IMPORT_BUDGET_US,
+            f"importing {', '.join(CLI_MODULES)} took {fastest} us "
+            f"(budget {CLI_IMPORT_BUDGET_US} us)",
+        )
+
+    def test_shell_runs_many_commands_in_one_process(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            users_file = Path(temp_dir) / "users.json"
+            script = io.StringIO(
+                "# provisioning\n"
+                "--role admin --username alice --create-user carol --create-password carol-pass\n"
+                "--role regular --username bob --create-user mallory\n"
+                "\n"
+                "--role admin --username alice --create-user dave --create-category professor\n"
+            )
+            output = io.StringIO()
+            with patch(
+                "supervisions.user_store.UserStore.default_file_path", return_value=users_file
+            ), redirect_stdout(output):
+                status = run_shell(script)
+
+            self.assertEqual(status, 1)
+            lines = output.getvalue().splitlines()
+            self.assertEqual(len(lines), 3)
+            self.assertIn("created=carol:regular:student", lines[0])
+            self.assertIn("cannot 'users:create'", lines[1])
+            self.assertIn("created=dave:regular:professor", lines[2])
+            stored = UserStore(file_path=users_file).all()
+            self.assertEqual([user.username for user in stored], ["carol", "dave"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import threading
+import unittest
+
+from supervisions.coalescing import SingleFlightCache
+
+
+class SingleFlightCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache: SingleFlightCache[str] = SingleFlightCache()
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.builds = 0
+
+    def _slow_build(self, value: str):
+        def build() -> str:
+            self.builds += 1
+            self.started.set()
+            self.release.wait(5)
+            return value
+
+        return build
+
+    def _in_threads(self, count: int, call) -> tuple[list[object], list[threading.Thread]]:
+        results: list[object] = [None] * count
+
+        def run(index: int) -> None:
+            try:
+                results[index] = call()
+            except Exception as error:
+                results[index] = error
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        return results, threads
+
+    def test_concurrent_misses_build_once(self) -> None:
+        results, threads = self._in_threads(
+            8, lambda: self.cache.get("landing", 1, self._slow_build("fresh"))
+        )
+        self.started.wait(5)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["fresh"] * 8)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(self.cache.get("landing", 1, self._slow_build("again")), "fresh")
+
+    def test_stale_value_is_served_while_revalidating(self) -> None:
+        self.cache.get("landing", 1, lambda: "old")
+        leader = threading.Thread(
+            target=self.cache.get, args=("landing", 2, self._slow_build("new"))
+        )
+        leader.start()
+        self.started.wait(5)
+
+        self.assertEqual(self.cache.get("landing", 2, self._slow_build("other")), "old")
+        self.release.set()
+        leader.join()
+        self.assertEqual(self.cache.get("landing", 2, self._slow_build("other")), "new")
+        self.assertEqual(self.builds, 1)
+
+    def test_waiters_see_the_leader_error(self) -> None:
+        def failing() -> str:
+            self.started.set()
+            self.release.wait(5)
+            raise RuntimeError("boom")
+
+        cache: SingleFlightCache[str] = SingleFlightCache(serve_stale=False)
+        results, threads = self._in_threads(3, lambda: cache.get("report", 1, failing))
+        self.started.wait(5)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(cache.get("report", 1, lambda: "recovered"), "recovered")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+from store_fixtures import use_temporary_stores
+
+from supervisions.lazy import Lazy
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.user_store import StoredUser, UserStore
+from supervisions.web import app
+
+_USER_READS = ("get", "all", "iter_all")
+_REQUEST_READS = ("all", "pending_for_professor", "pending_for_student")
+
+
+class LazyTest(unittest.TestCase):
+    def test_loads_once_on_first_use(self) -> None:
+        loads: list[int] = []
+        value = Lazy(lambda: loads.append(1) or ["a", "b"])
+        self.assertFalse(value.loaded)
+        self.assertEqual(repr(value), "Lazy(<not loaded>)")
+        self.assertEqual(len(value), 2)
+        self.assertIn("a", value)
+        self.assertEqual(list(value), ["a", "b"])
+        self.assertTrue(value.loaded)
+        self.assertEqual(loads, [1])
+        self.assertFalse(Lazy(lambda: None))
+
+
+class DashboardContextReadsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temporary_stores(self)
+
+        store = UserStore()
+        store.save(StoredUser(username="alice", password="alice123", role="admin", category=None))
+        store.save(
+            StoredUser(
+                username="prof",
+                password="prof123",
+                role="regular",
+                category="professor",
+                full_name="Professor Silva",
+            )
+        )
+        store.save(
+            StoredUser(username="bob", password="bob123", role="regular", category="student")
+        )
+        SupervisionRequestStore().create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+    def _reads(self, username: str, role: str, category: str | None) -> Counter[str]:
+        reads: Counter[str] = Counter()
+
+        def counting(owner: type, name: str):
+            original = getattr(owner, name)
+
+            def read(*args, **kwargs):
+                reads[f"{owner.__name__}.{name}"] += 1
+                return original(*args, **kwargs)
+
+            return patch.object(owner, name, autospec=True, side_effect=read)
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session.update({"username": username, "role": role, "category": category})
+        patchers = [counting(UserStore, name) for name in _USER_READS] + [
+            counting(SupervisionRequestStore, name) for name in _REQUEST_READS
+        ]
+        for patcher in patchers:
+            patcher.start()
+        try:
+            response = client.get("/dashboard")
+        finally:
+            for patcher in patchers:
+                patcher.stop()
+        self.assertEqual(response.status_code, 200)
+        return reads
+
+    def test_every_role_sees_the_persisted_users(self) -> None:
+        for username, role, category in (
+            ("alice", "admin", None),
+            ("prof", "regular", "professor"),
+            ("bob", "regular", "student"),
+        ):
+            with self.subTest(role=role, category=category):
+                client = app.test_client()
+                with client.session_transaction() as session:
+                    session.update({"username": username, "role": role, "category": category})
+                body = client.get("/dashboard").get_data(as_text=True)
+                self.assertIn("Persisted users", body)
+                self.assertIn("bob (regular - student)", body)
+                self.assertEqual("Delete</button>" in body, role == "admin")
+                self.assertEqual('name="q"' in body, role == "admin")
+
+    def test_admin_reads_only_the_user_listing(self) -> None:
+        self.assertEqual(self._reads("alice", "admin", None), Counter({"UserStore.all": 1}))
+
+    def test_professor_reads_profile_and_pending_requests(self) -> None:
+        self.assertEqual(
+            self._reads("prof", "regular", "professor"),
+            Counter(
+                {
+                    "UserStore.get": 1,
+                    "UserStore.all": 1,
+                    "SupervisionRequestStore.pending_for_professor": 1,
+                }
+            ),
+        )
+
+    def test_student_reads_profile_professors_and_own_requests(self) -> None:
+        self.assertEqual(
+            self._reads("bob", "regular", "student"),
+            Counter(
+                {
+                    "UserStore.get": 1,
+                    "UserStore.all": 1,
+                    "UserStore.iter_all": 1,
+                    "SupervisionRequestStore.pending_for_student": 1,
+                }
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
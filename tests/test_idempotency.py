@@ -0,0 +1,116 @@
+import re
+import threading
+import unittest
+from unittest.mock import patch
+
+from store_fixtures import use_temporary_stores
+
+from supervisions.audit import close_audit_logs
+from supervisions.idempotency import FIELD_NAME, IdempotencyCache
+from supervisions.user_store import StoredUser, UserStore
+from supervisions.web import app
+
+
+class IdempotencyCacheTest(unittest.TestCase):
+    def test_replays_result_until_expiry(self) -> None:
+        now = [0.0]
+        cache: IdempotencyCache[int] = IdempotencyCache(
+            capacity=10, ttl=60.0, clock=lambda: now[0]
+        )
+        calls: list[int] = []
+
+        def action() -> int:
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache.run("key", action), 1)
+        now[0] = 59.0
+        self.assertEqual(cache.run("key", action), 1)
+        now[0] = 61.0
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.run("key", action), 2)
+
+    def test_evicts_oldest_beyond_capacity(self) -> None:
+        cache: IdempotencyCache[str] = IdempotencyCache(capacity=2)
+        for key in ("a", "b", "c"):
+            cache.run(key, lambda: key)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.run("a", lambda: "again"), "again")
+        self.assertEqual(cache.run("c", lambda: "again"), "c")
+
+    def test_concurrent_duplicates_wait_for_the_first(self) -> None:
+        cache: IdempotencyCache[int] = IdempotencyCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls: list[int] = []
+
+        def slow() -> int:
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 7
+
+        results: list[int] = []
+        first = threading.Thread(target=lambda: results.append(cache.run("key", slow)))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(cache.run("key", slow)))
+        second.start()
+        release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(results, [7, 7])
+        self.assertEqual(calls, [1])
+
+    def test_failures_are_not_remembered(self) -> None:
+        cache: IdempotencyCache[int] = IdempotencyCache()
+
+        def failing() -> int:
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            cache.run("key", failing)
+        self.assertEqual(cache.run("key", lambda: 3), 3)
+
+
+class IdempotentFormTest(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temporary_stores(self)
+        self.addCleanup(close_audit_logs)
+        UserStore().save(StoredUser(username="alice", password="alice123", role="admin"))
+        self.client = app.test_client()
+        self.client.post("/login", data={"username": "alice", "password": "alice123"})
+
+    def test_replayed_create_user_returns_original_page(self) -> None:
+        page = self.client.get("/dashboard").get_data(as_text=True)
+        match = re.search(rf'name="{FIELD_NAME}" value="([^"]+)"', page)
+        assert match is not None
+        form = {
+            FIELD_NAME: match.group(1),
+            "username": "bob",
+            "password": "bob123",
+            "role": "regular",
+            "category": "student",
+        }
+
+        first = self.client.post("/admin/users", data=form)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b"User &#39;bob&#39; created", first.data)
+        version = UserStore().version()
+        with patch.object(UserStore, "save") as save, patch.object(UserStore, "get") as get:
+            replay = self.client.post("/admin/users", data=form)
+        self.assertEqual(replay.status_code, first.status_code)
+        self.assertEqual(replay.data, first.data)
+        save.assert_not_called()
+        get.assert_not_called()
+        self.assertEqual(UserStore().version(), version)
+
+        with patch.object(UserStore, "save") as save:
+            duplicate = self.client.post("/admin/users", data={**form, FIELD_NAME: "another"})
+        self.assertEqual(duplicate.status_code, 400)
+        self.assertIn(b"already exists", duplicate.data)
+        save.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
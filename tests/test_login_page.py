@@ -3,6 +3,7 @@ import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
+from supervisions.audit import close_audit_logs
 from supervisions.supervision_requests import SupervisionRequestStore
 from supervisions.user_store import StoredUser, UserStore
 from supervisions.web import app
@@ -26,6 +27,7 @@ class LoginPageTest(unittest.TestCase):
         self.addCleanup(self._users_patch.stop)
         self.addCleanup(self._requests_patch.stop)
         self.addCleanup(self._temp_dir.cleanup)
+        self.addCleanup(close_audit_logs)
 
         store = UserStore(file_path=users_file)
         store.save(StoredUser(username="alice", password="alice123", role="admin", category=None))
@@ -233,6 +235,21 @@ class LoginPageTest(unittest.TestCase):
         self.assertEqual(login.status_code, 401)
         self.assertIn(b"Invalid username or password", login.data)
 
+    def test_admin_can_search_users(self) -> None:
+        self.client.post(
+            "/login",
+            data={"username": "alice", "password": "alice123"},
+            follow_redirects=True,
+        )
+        response = self.client.get("/dashboard?q=BO")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Search results", response.data)
+        self.assertIn(b"bob (regular - student)", response.data)
+        self.assertNotIn(b"prof (regular", response.data)
+
+        empty = self.client.get("/dashboard?q=nobody")
+        self.assertIn(b"No users match", empty.data)
+
     def test_admin_delete_unknown_user_returns_not_found(self) -> None:
         self.client.post(
             "/login",
@@ -291,6 +308,41 @@ class LoginPageTest(unittest.TestCase):
         self.assertEqual(saved.email, "prof.silva@example.com")
         self.assertEqual(saved.sipap_number, "SIPAP-2026-001")
 
+    def test_resaving_unchanged_profile_skips_write(self) -> None:
+        self.client.post(
+            "/login",
+            data={"username": "prof", "password": "prof123"},
+            follow_redirects=True,
+        )
+        form = {
+            "full_name": "Professor Silva",
+            "lattes_link": "",
+            "email": "prof.silva@example.com",
+            "sipap_number": "",
+        }
+        self.client.post("/profile", data=form)
+        version = UserStore().version()
+
+        response = self.client.post("/profile", data=form)
+        self.assertIn(b"Profile unchanged", response.data)
+        self.assertEqual(UserStore().version(), version)
+
+    def test_profile_rejects_email_already_in_use(self) -> None:
+        UserStore().update_fields("bob", email="Shared@Example.com")
+        self.client.post(
+            "/login",
+            data={"username": "prof", "password": "prof123"},
+            follow_redirects=True,
+        )
+
+        response = self.client.post(
+            "/profile",
+            data={"full_name": "Professor Silva", "email": "shared@example.com"},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"Email &#39;shared@example.com&#39; is already in use", response.data)
+        self.assertEqual(UserStore().get("prof").email, "")
+
     def test_student_cannot_edit_profile(self) -> None:
         self.client.post(
             "/login",
@@ -497,6 +549,37 @@ class LoginPageTest(unittest.TestCase):
         assert saved is not None
         self.assertIsNone(saved.advisor_1)
 
+    def test_student_receives_decision_events(self) -> None:
+        request_store = SupervisionRequestStore()
+        created = request_store.create_pending(
+            student_username="bob",
+            student_name="Bob",
+            professor_name="Professor Silva",
+            slot="advisor_1",
+        )
+        request_store.decide(created.id, "Professor Silva", "accepted")
+
+        self.client.post(
+            "/login",
+            data={"username": "bob", "password": "bob123"},
+            follow_redirects=True,
+        )
+        response = self.client.get(
+            "/dashboard/events",
+            headers={"Last-Event-ID": "0"},
+            buffered=False,
+        )
+        self.addCleanup(response.close)
+        self.assertEqual(response.mimetype, "text/event-stream")
+
+        received = b""
+        for chunk in response.response:
+            received += chunk if isinstance(chunk, bytes) else chunk.encode()
+            if b"event: decision" in received:
+                break
+        self.assertIn(b'"status": "accepted"', received)
+        self.assertNotIn(b"pending-request", received)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from supervisions.offset_index import IndexedMapping, IndexUnavailable, read_indexed_record
+from supervisions.storage import dump_json, write_data_files
+from supervisions.user_store import StoredUser, UserStore, _snapshots
+
+
+class OffsetIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.users_file = self.directory / "users.json"
+        self.addCleanup(_snapshots.clear)
+
+    def test_encoding_matches_pretty_printed_json(self) -> None:
+        data = {
+            "zoë": {"full_name": "Zoë\nSilva", "role": "regular", "advisor_1": None},
+            "alice": {"role": "admin", "tags": {"nested": [1, 2]}},
+        }
+        self.assertEqual(IndexedMapping(data).encode().decode("ascii"), dump_json(data))
+        self.assertEqual(IndexedMapping({}).encode().decode("ascii"), dump_json({}))
+
+    def test_lookup_reads_single_record(self) -> None:
+        data = {f"user{index:03d}": {"role": "regular", "n": index} for index in range(100)}
+        write_data_files({self.users_file: IndexedMapping(data)})
+
+        self.assertEqual(read_indexed_record(self.users_file, "user042"), data["user042"])
+        self.assertIsNone(read_indexed_record(self.users_file, "ghost"))
+
+        self.users_file.write_text(dump_json({"user042": {"role": "admin"}}), encoding="utf-8")
+        with self.assertRaises(IndexUnavailable):
+            read_indexed_record(self.users_file, "user042")
+
+    def test_store_get_skips_full_parse(self) -> None:
+        store = UserStore(file_path=self.users_file)
+        store.save(StoredUser(username="bob", password="bob123", role="regular"))
+        store.save(StoredUser(username="carol", password="carol123", role="admin"))
+        _snapshots.clear()
+
+        self.assertEqual(store.get("carol").role, "admin")
+        self.assertIsNone(store.get("ghost"))
+        self.assertIsNone(_snapshots.peek(self.users_file))
+
+        self.users_file.write_text(
+            dump_json({"dave": {"password": "x", "role": "regular"}}), encoding="utf-8"
+        )
+        self.assertIsNone(store.get("carol"))
+        self.assertEqual(store.get("dave").password, "x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import json
+import smtplib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.change_feed import REQUEST_CREATED, REQUEST_DECIDED
+from supervisions.outbox import (
+    DEAD,
+    JsonlSink,
+    Message,
+    NotificationWorker,
+    SmtpSink,
+    new_notification,
+    outbox_for,
+)
+from supervisions.supervision_requests import SupervisionRequest, SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore
+
+
+class _FailingSink:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def send(self, messages: list[Message]) -> list[str | None]:
+        self.calls += 1
+        raise ConnectionRefusedError("connection refused")
+
+
+class OutboxTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.user_store = UserStore(file_path=self.directory / "users.json")
+        self.request_store = SupervisionRequestStore(
+            file_path=self.directory / "supervision_requests.json"
+        )
+        self.outbox = outbox_for(self.directory)
+        self.user_store.save(
+            StoredUser(
+                username="prof",
+                password="prof123",
+                role="regular",
+                category="professor",
+                full_name="Professor Silva",
+                email="silva@example.com",
+            )
+        )
+        self.user_store.save(
+            StoredUser(
+                username="bob",
+                password="bob123",
+                role="regular",
+                category="student",
+                email="bob@example.com",
+            )
+        )
+
+    def _unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(user_store=self.user_store, request_store=self.request_store)
+
+    def _submit(self) -> None:
+        with self._unit_of_work() as unit_of_work:
+            student = unit_of_work.users.get("bob")
+            assert student is not None
+            unit_of_work.update_profile(student, {"advisor_1": "Professor Silva"})
+
+    def test_notifications_commit_with_the_state_change(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self._unit_of_work() as unit_of_work:
+                student = unit_of_work.users.get("bob")
+                assert student is not None
+                unit_of_work.update_profile(student, {"advisor_1": "Professor Silva"})
+                raise RuntimeError("boom")
+        self.assertEqual(self.outbox.all(), [])
+        self.assertEqual(self.request_store.all(), [])
+
+        self._submit()
+        pending = self.request_store.pending_for_student("bob")
+        with self._unit_of_work() as unit_of_work:
+            unit_of_work.decide_supervision_request(pending[0].id, "Professor Silva", "accepted")
+
+        notifications = self.outbox.all()
+        self.assertEqual([item.kind for item in notifications], [REQUEST_CREATED, REQUEST_DECIDED])
+        self.assertEqual(notifications[1].request["status"], "accepted")
+
+    def test_worker_delivers_batch_to_jsonl(self) -> None:
+        self._submit()
+        sink_path = self.directory / "notifications.jsonl"
+        worker = NotificationWorker(self.outbox, JsonlSink(sink_path), users=self.user_store)
+
+        report = worker.run_once()
+
+        self.assertEqual((report.delivered, report.retried), (1, 0))
+        self.assertEqual(self.outbox.all(), [])
+        lines = sink_path.read_text(encoding="utf-8").splitlines()
+        message = json.loads(lines[0])
+        self.assertEqual(message["to"], "silva@example.com")
+        self.assertIn("bob", message["body"])
+        self.assertEqual(worker.run_once().attempted, 0)
+
+    def test_failures_back_off_then_go_dead(self) -> None:
+        self._submit()
+        now = [100.0]
+        sink = _FailingSink()
+        worker = NotificationWorker(
+            self.outbox,
+            sink,
+            users=self.user_store,
+            max_attempts=3,
+            base_delay=10.0,
+            clock=lambda: now[0],
+        )
+
+        self.assertEqual(worker.run_once().retried, 1)
+        [notification] = self.outbox.all()
+        self.assertEqual((notification.attempts, notification.next_attempt_at), (1, 110.0))
+        self.assertIn("refused", notification.last_error)
+
+        now[0] = 105.0
+        self.assertEqual(worker.run_once().attempted, 0)
+        now[0] = 110.0
+        worker.run_once()
+        self.assertEqual(self.outbox.all()[0].next_attempt_at, 130.0)
+        now[0] = 130.0
+        self.assertEqual(worker.run_once().dead, 1)
+        self.assertEqual(self.outbox.all()[0].status, DEAD)
+        now[0] = 10_000.0
+        self.assertEqual(worker.run_once().attempted, 0)
+        self.assertEqual(sink.calls, 3)
+
+    def test_notifications_without_an_address_are_skipped(self) -> None:
+        request = SupervisionRequest(1, "bob", "Bob", "Professor Nobody", "advisor_1", "pending")
+        self.outbox.add([new_notification(REQUEST_CREATED, request)])
+        worker = NotificationWorker(self.outbox, _FailingSink(), users=self.user_store)
+        self.assertEqual(worker.run_once().skipped, 1)
+        self.assertEqual(self.outbox.all(), [])
+
+
+class SmtpSinkTest(unittest.TestCase):
+    def test_sends_each_message_over_one_connection(self) -> None:
+        messages = [
+            Message(to="a@example.com", subject="One", body="first"),
+            Message(to="b@example.com", subject="Two", body="second"),
+        ]
+        with patch("smtplib.SMTP") as smtp_class:
+            smtp = smtp_class.return_value.__enter__.return_value
+            smtp.send_message.side_effect = [None, smtplib.SMTPRecipientsRefused({})]
+            errors = SmtpSink(host="localhost", port=1025).send(messages)
+
+        smtp_class.assert_called_once_with("localhost", 1025, timeout=30.0)
+        self.assertIsNone(errors[0])
+        self.assertIsNotNone(errors[1])
+        sent = smtp.send_message.call_args_list[0].args[0]
+        self.assertEqual((sent["To"], sent["Subject"]), ("a@example.com", "One"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import gc
+import os
+import unittest
+
+from store_fixtures import use_temporary_stores
+
+from supervisions import sqlite_request_store
+from supervisions.audit import USER_CREATE, audit_log_for, close_audit_logs
+from supervisions.preload import preload
+from supervisions.sqlite_request_store import close_connections, migrate_to_sqlite
+from supervisions.supervision_requests import SupervisionRequestStore, open_request_store
+from supervisions.user_store import StoredUser, UserStore
+from supervisions.web import app
+
+
+class PreloadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = use_temporary_stores(self)
+        self.addCleanup(close_audit_logs)
+        self.addCleanup(close_connections)
+        UserStore().save(
+            StoredUser(username="bob", password="bob123", role="regular", category="student")
+        )
+        SupervisionRequestStore().create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        migrate_to_sqlite(self.directory / "supervision_requests.json")
+
+    def test_warms_stores_and_freezes_the_heap(self) -> None:
+        self.addCleanup(gc.unfreeze)
+        open_request_store().all()
+
+        report = preload(app)
+
+        self.assertEqual((report.users, report.requests), (1, 1))
+        self.assertEqual(report.templates, len(app.jinja_env.list_templates(extensions=["html"])))
+        self.assertGreater(report.frozen, 0)
+        self.assertEqual(getattr(sqlite_request_store._pool, "connections", {}), {})
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_child_gets_its_own_handles(self) -> None:
+        log = audit_log_for(self.directory)
+        log.record("alice", USER_CREATE, "bob")
+        log.flush()
+        inherited = open_request_store()._connection()
+
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                log.record("alice", USER_CREATE, "carol")
+                log.flush()
+                if open_request_store()._connection() is not inherited:
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual([record.target for record in log.query()], ["bob", "carol"])
+        self.assertEqual(open_request_store().all()[0].student_username, "bob")
+
+
+if __name__ == "__main__":
+    unittest.main()
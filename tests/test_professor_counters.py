@@ -0,0 +1,112 @@
+import json
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+
+from supervisions.professor_counters import ProfessorCount, ProfessorCounters
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore
+
+
+class ProfessorCountersTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        directory = Path(self._temp_dir.name)
+        self.user_store = UserStore(file_path=directory / "users.json")
+        self.request_store = SupervisionRequestStore(
+            file_path=directory / "supervision_requests.json"
+        )
+        self.user_store.save(
+            StoredUser(
+                username="silva",
+                password="silva123",
+                role="regular",
+                category="professor",
+                full_name="Professor Silva",
+            )
+        )
+        for student in ("bob", "carol"):
+            self.user_store.save(
+                StoredUser(
+                    username=student, password="secret", role="regular", category="student"
+                )
+            )
+        self.counters = ProfessorCounters(self.user_store, self.request_store)
+
+    def _unit_of_work(self, capacity: int | None = None) -> UnitOfWork:
+        return UnitOfWork(
+            user_store=self.user_store,
+            request_store=self.request_store,
+            advisor_capacity=capacity,
+        )
+
+    def test_counters_follow_store_writes(self) -> None:
+        self.assertEqual(self.counters.get("Professor Silva"), ProfessorCount(0, 0))
+        bob = self.request_store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        self.request_store.create_pending("carol", "Carol", "Professor Silva", "advisor_1")
+        self.assertEqual(self.counters.get("Professor Silva"), ProfessorCount(0, 2))
+
+        with self._unit_of_work() as unit_of_work:
+            unit_of_work.decide_supervision_request(bob.id, "Professor Silva", "accepted")
+        self.assertEqual(self.counters.get("Professor Silva"), ProfessorCount(1, 1))
+
+        student = self.user_store.get("bob")
+        self.user_store.save(replace(student, advisor_2="Professor Silva"))
+        self.assertEqual(self.counters.get("Professor Silva").advisees, 1)
+        self.user_store.delete("bob")
+        self.assertEqual(self.counters.get("Professor Silva"), ProfessorCount(0, 1))
+        self.assertEqual(self.counters.repair(), [])
+
+    def test_capacity_blocks_acceptance(self) -> None:
+        bob = self.request_store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        carol = self.request_store.create_pending("carol", "Carol", "Professor Silva", "advisor_1")
+
+        with self.assertRaises(ValueError):
+            with self._unit_of_work(capacity=1) as unit_of_work:
+                unit_of_work.decide_supervision_request(bob.id, "Professor Silva", "accepted")
+                unit_of_work.decide_supervision_request(carol.id, "Professor Silva", "accepted")
+        self.assertEqual(len(self.request_store.pending_for_professor("Professor Silva")), 2)
+
+        with self._unit_of_work(capacity=1) as unit_of_work:
+            unit_of_work.decide_supervision_request(bob.id, "Professor Silva", "accepted")
+        with self.assertRaises(ValueError):
+            with self._unit_of_work(capacity=1) as unit_of_work:
+                unit_of_work.decide_supervision_request(carol.id, "Professor Silva", "accepted")
+        with self._unit_of_work(capacity=1) as unit_of_work:
+            rejected = unit_of_work.decide_supervision_request(
+                carol.id, "Professor Silva", "rejected"
+            )
+        self.assertEqual(rejected.status, "rejected")
+
+    def test_capacity_is_checked_again_at_commit(self) -> None:
+        carol = self.request_store.create_pending("carol", "Carol", "Professor Silva", "advisor_1")
+
+        with self.assertRaises(ValueError):
+            with self._unit_of_work(capacity=1) as unit_of_work:
+                unit_of_work.decide_supervision_request(carol.id, "Professor Silva", "accepted")
+                student = self.user_store.get("bob")
+                self.user_store.save(replace(student, advisor_1="Professor Silva"))
+
+        self.assertEqual(self.request_store.get(carol.id).status, "pending")
+        self.assertIsNone(self.user_store.get("carol").advisor_1)
+        self.assertEqual(self.counters.get("Professor Silva"), ProfessorCount(1, 1))
+
+    def test_repair_reports_drift(self) -> None:
+        self.request_store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        self.counters.refresh()
+        data = json.loads(self.counters.file_path.read_text(encoding="utf-8"))
+        data["professors"]["Professor Silva"] = {"advisees": 5, "pending": 0}
+        self.counters.file_path.write_text(json.dumps(data), encoding="utf-8")
+
+        (drift,) = self.counters.repair()
+        self.assertEqual(drift.professor_name, "Professor Silva")
+        self.assertEqual(drift.stored, ProfessorCount(5, 0))
+        self.assertEqual(drift.actual, ProfessorCount(0, 1))
+        self.assertEqual(self.counters.get("Professor Silva"), ProfessorCount(0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import pstats
+import time
+import unittest
+from unittest.mock import patch
+
+from store_fixtures import use_temporary_stores
+
+from supervisions.audit import close_audit_logs
+from supervisions.profiling import (
+    HEADER_NAME,
+    CProfileProfiler,
+    ProfileBuffer,
+    SamplingProfiler,
+    diff,
+)
+from supervisions.user_store import StoredUser, UserStore
+from supervisions.web import app
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfileBufferTest(unittest.TestCase):
+    def _add(self, buffer: ProfileBuffer, path: str) -> None:
+        buffer.add(
+            mode="cprofile",
+            method="GET",
+            path=path,
+            route=path,
+            status=200,
+            started_at=0.0,
+            wall_ms=1.0,
+            cpu_ms=1.0,
+            reads={},
+            functions=(),
+            data=b"",
+        )
+
+    def test_keeps_the_newest_captures(self) -> None:
+        buffer = ProfileBuffer(capacity=2)
+        for path in ("/a", "/b", "/c"):
+            self._add(buffer, path)
+        self.assertEqual([capture.path for capture in buffer.all()], ["/c", "/b"])
+        self.assertIsNone(buffer.get(1))
+        self.assertEqual(buffer.get(3).path, "/c")
+
+    def test_sampling_profiler_attributes_time_to_the_busy_function(self) -> None:
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        _busy(0.05)
+        functions, folded = profiler.stop()
+        hottest = max(functions, key=lambda cost: cost.self_ms)
+        self.assertTrue(hottest.name.endswith("(_busy)"))
+        self.assertIn(b"(_busy) ", folded)
+
+
+class ProfiledRequestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = use_temporary_stores(self)
+        self.addCleanup(close_audit_logs)
+        store = UserStore()
+        store.save(StoredUser(username="alice", password="alice123", role="admin", category=None))
+        store.save(
+            StoredUser(username="bob", password="bob123", role="regular", category="student")
+        )
+        self.buffer = app.extensions["profiles"]
+        self.buffer.clear()
+        self.addCleanup(self.buffer.clear)
+        self.client = app.test_client()
+
+    def _login(self, username: str, password: str) -> None:
+        self.client.post("/login", data={"username": username, "password": password})
+
+    def test_admin_captures_and_downloads_a_profile(self) -> None:
+        self._login("alice", "alice123")
+        first = self.client.get("/dashboard?profile=1")
+        second = self.client.get("/dashboard", headers={HEADER_NAME: "cprofile"})
+        self.assertEqual(self.client.get("/dashboard").headers.get("X-Profile-Id"), None)
+
+        captures = self.buffer.all()
+        self.assertEqual([capture.id for capture in captures], [2, 1])
+        self.assertEqual(first.headers["X-Profile-Id"], "1")
+        self.assertEqual(second.headers["X-Profile-Id"], "2")
+        capture = captures[1]
+        self.assertEqual(
+            (capture.route, capture.status, capture.mode), ("/dashboard", 200, "cprofile")
+        )
+        self.assertGreater(capture.reads.get("cached users.json", 0), 0)
+        self.assertGreater(capture.wall_ms, 0)
+
+        download = self.client.get("/admin/profiles/1/download")
+        self.assertIn('filename="profile-1.pstats"', download.headers["Content-Disposition"])
+        self.assertEqual(download.data, capture.data)
+        dump = self.directory / "profile-1.pstats"
+        dump.write_bytes(download.data)
+        self.assertGreater(pstats.Stats(str(dump)).total_calls, 0)
+
+        page = self.client.get("/admin/profiles?id=1&before=1&after=2")
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b"#1 &rarr; #2", page.data)
+        self.assertEqual(len(self.buffer), 2)
+        self.assertEqual(
+            {delta.name for delta in diff(captures[1], captures[0], limit=10_000)},
+            {cost.name for cost in captures[0].functions + captures[1].functions},
+        )
+
+    def test_concurrent_cprofile_requests_fall_back_to_sampling(self) -> None:
+        self._login("alice", "alice123")
+        running = CProfileProfiler()
+        running.start()
+        try:
+            response = self.client.get("/dashboard?profile=cprofile")
+        finally:
+            running.stop()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.buffer.all()[0].mode, "sample")
+
+        with patch("cProfile.Profile.enable", side_effect=ValueError("already active")):
+            response = self.client.get("/dashboard?profile=cprofile")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.buffer.all()[0].mode, "sample")
+
+        self.client.get("/dashboard?profile=cprofile")
+        self.assertEqual(self.buffer.all()[0].mode, "cprofile")
+
+    def test_regular_users_cannot_profile(self) -> None:
+        self._login("bob", "bob123")
+        response = self.client.get("/dashboard?profile=sample")
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.client.get("/admin/profiles").status_code, 403)
+        self.assertEqual(self.client.get("/admin/profiles/1/download").status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.reports import _executor, clear_report_cache, supervision_report
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore
+from supervisions.web import app
+
+
+class SupervisionReportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.addCleanup(clear_report_cache)
+        directory = Path(self._temp_dir.name)
+        self.user_store = UserStore(file_path=directory / "users.json")
+        self.request_store = SupervisionRequestStore(
+            file_path=directory / "supervision_requests.json"
+        )
+        for username, password, role, category, full_name in (
+            ("alice", "alice123", "admin", None, None),
+            ("silva", "silva123", "regular", "professor", "Professor Silva"),
+            ("costa", "costa123", "regular", "professor", "Professor Costa"),
+            ("bob", "bob123", "regular", "student", "Bob"),
+            ("carol", "carol123", "regular", "student", "Carol"),
+            ("dave", "dave123", "regular", "student", "Dave"),
+        ):
+            self.user_store.save(
+                StoredUser(
+                    username=username,
+                    password=password,
+                    role=role,
+                    category=category,
+                    full_name=full_name,
+                )
+            )
+        for student in ("bob", "carol", "dave"):
+            self.request_store.create_pending(
+                student, student.title(), "Professor Silva", "advisor_1"
+            )
+        unit_of_work = UnitOfWork(user_store=self.user_store, request_store=self.request_store)
+        with unit_of_work:
+            unit_of_work.decide_supervision_request(1, "Professor Silva", "accepted")
+            unit_of_work.decide_supervision_request(2, "Professor Silva", "rejected")
+
+    def _report(self, **options):
+        return supervision_report(
+            user_store=self.user_store, request_store=self.request_store, **options
+        )
+
+    def test_aggregates(self) -> None:
+        report = self._report(chunk_size=2)
+
+        loads = {load.professor_name: (load.advisees, load.pending) for load in report.advisor_load}
+        self.assertEqual(loads, {"Professor Silva": (1, 1), "Professor Costa": (0, 0)})
+        self.assertEqual(len(report.requests_per_period), 1)
+        counts = report.requests_per_period[0]
+        self.assertEqual((counts.created, counts.accepted, counts.rejected), (3, 1, 1))
+        (rate,) = report.acceptance_rates
+        self.assertEqual((rate.professor_name, rate.rate), ("Professor Silva", 0.5))
+        self.assertEqual(report.students_without_advisors, ["carol", "dave"])
+
+    def test_periods_come_from_request_timestamps(self) -> None:
+        january = 1_704_110_400
+        march = 1_709_294_400
+        self.request_store._write_raw(
+            [
+                {**item, "created_at": january, "decided_at": march if item["id"] == 1 else None}
+                for item in self.request_store._read_raw()
+            ]
+            + [
+                {
+                    "id": 9,
+                    "student_username": "erin",
+                    "student_name": "Erin",
+                    "professor_name": "Professor Costa",
+                    "slot": "advisor_1",
+                    "status": "rejected",
+                }
+            ]
+        )
+
+        report = self._report()
+
+        counts = [
+            (counts.period, counts.created, counts.accepted, counts.rejected)
+            for counts in report.requests_per_period
+        ]
+        self.assertEqual(counts, [("2024-01", 3, 0, 0), ("2024-03", 0, 1, 0)])
+
+    def test_process_pool_matches_in_process(self) -> None:
+        in_process = self._report(chunk_size=2, period="day")
+        clear_report_cache()
+        fanned_out = self._report(chunk_size=2, period="day", workers=2)
+        self.assertEqual(fanned_out, in_process)
+
+    def test_process_pool_is_shared_and_not_forked(self) -> None:
+        executor = _executor(2)
+        self.assertIs(_executor(2), executor)
+        self.assertNotEqual(executor._mp_context.get_start_method(), "fork")
+
+    def test_cached_until_data_changes(self) -> None:
+        first = self._report()
+        self.assertIs(self._report(), first)
+
+        self.user_store.delete("dave")
+        second = self._report()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.students_without_advisors, ["carol"])
+
+    def test_admin_route(self) -> None:
+        client = app.test_client()
+        with patch(
+            "supervisions.user_store.UserStore.default_file_path",
+            return_value=self.user_store.file_path,
+        ), patch(
+            "supervisions.supervision_requests.SupervisionRequestStore.default_file_path",
+            return_value=self.request_store.file_path,
+        ):
+            client.post("/login", data={"username": "bob", "password": "bob123"})
+            self.assertEqual(client.get("/admin/reports").status_code, 403)
+
+            client.post("/logout")
+            client.post("/login", data={"username": "alice", "password": "alice123"})
+            response = client.get("/admin/reports?period=week")
+            page = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Requests per week", page)
+        self.assertIn("<td>Professor Silva</td>", page)
+        self.assertIn("<li>dave</li>", page)
+
+
+if __name__ == "__main__":
+    unittest.main()
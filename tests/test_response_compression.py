@@ -0,0 +1,107 @@
+import gzip
+import unittest
+import zlib
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from supervisions.response_compression import CompressionMiddleware, negotiate
+from supervisions.web import app
+
+PAGE = "<ul>" + "".join(f"<li>user{index:05d}</li>" for index in range(500)) + "</ul>"
+
+
+def _page_app(environ, start_response):
+    response = Response(PAGE, mimetype="text/html")
+    response.set_etag("page-v1")
+    return response(environ, start_response)
+
+
+def _streamed_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return (f'{{"row": {index}}}\n'.encode("ascii") for index in range(200))
+
+
+class NegotiateTest(unittest.TestCase):
+    def test_prefers_client_weights_then_offer_order(self) -> None:
+        self.assertEqual(negotiate("gzip, deflate", ["br", "gzip"]), "gzip")
+        self.assertEqual(negotiate("gzip, br", ["br", "gzip"]), "br")
+        self.assertEqual(negotiate("br;q=0.5, gzip;q=0.8", ["br", "gzip"]), "gzip")
+        self.assertEqual(negotiate("*", ["gzip"]), "gzip")
+        self.assertIsNone(negotiate("gzip;q=0", ["gzip"]))
+        self.assertIsNone(negotiate("identity", ["gzip"]))
+        self.assertIsNone(negotiate("", ["gzip"]))
+
+
+class CompressionMiddlewareTest(unittest.TestCase):
+    def _get(self, wsgi_app, encoding: str = "gzip", **options) -> Response:
+        client = Client(CompressionMiddleware(wsgi_app, **options), Response)
+        return client.get("/", headers={"Accept-Encoding": encoding})
+
+    def test_compresses_large_html(self) -> None:
+        response = self._get(_page_app)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["ETag"], 'W/"page-v1"')
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(gzip.decompress(response.data).decode("utf-8"), PAGE)
+        self.assertLess(len(response.data), len(PAGE) // 4)
+
+    def test_streams_responses_without_content_length(self) -> None:
+        response = self._get(_streamed_app)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.data).decode("ascii").count("\n"), 200)
+
+    def test_flushes_each_streamed_chunk(self) -> None:
+        middleware = CompressionMiddleware(_streamed_app)
+        body = middleware(
+            {"HTTP_ACCEPT_ENCODING": "gzip", "REQUEST_METHOD": "GET"}, lambda *args: None
+        )
+        decompressor = zlib.decompressobj(31)
+        pieces = [decompressor.decompress(piece) for piece in body]
+        self.assertEqual(
+            pieces[:200], [f'{{"row": {index}}}\n'.encode("ascii") for index in range(200)]
+        )
+
+    def test_invalid_content_length_is_not_compressed(self) -> None:
+        def invalid_length_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/html"), ("Content-Length", "n/a")])
+            return [PAGE.encode("utf-8")]
+
+        response = self._get(invalid_length_app)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.get_data(as_text=True), PAGE)
+
+    def test_leaves_small_or_unlisted_responses_alone(self) -> None:
+        small = self._get(_page_app, minimum_size=len(PAGE) + 1)
+        self.assertNotIn("Content-Encoding", small.headers)
+        self.assertEqual(small.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(small.get_data(as_text=True), PAGE)
+
+        unlisted = self._get(_page_app, content_types=frozenset({"application/json"}))
+        self.assertNotIn("Content-Encoding", unlisted.headers)
+        self.assertEqual(self._get(_page_app, encoding="identity").get_data(as_text=True), PAGE)
+
+    def test_skips_already_encoded_responses(self) -> None:
+        def encoded_app(environ, start_response):
+            body = gzip.compress(PAGE.encode("utf-8"))
+            start_response(
+                "200 OK",
+                [
+                    ("Content-Type", "text/css"),
+                    ("Content-Encoding", "gzip"),
+                    ("Content-Length", str(len(body))),
+                ],
+            )
+            return [body]
+
+        response = self._get(encoded_app)
+        self.assertEqual(gzip.decompress(response.data).decode("utf-8"), PAGE)
+
+    def test_web_app_is_wrapped(self) -> None:
+        self.assertIsInstance(app.wsgi_app, CompressionMiddleware)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.sharded_user_store import ShardedUserStore, migrate_to_json, migrate_to_shards
+from supervisions.storage import write_data_files
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore, open_user_store
+
+
+class ShardedUserStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.users_file = self.directory / "users.json"
+        store = UserStore(file_path=self.users_file)
+        for index in range(20):
+            store.save(
+                StoredUser(
+                    username=f"user{index:02d}",
+                    password="secret",
+                    role="regular",
+                    category="student",
+                )
+            )
+
+    def test_migration_round_trip(self) -> None:
+        self.assertEqual(migrate_to_shards(self.users_file, shard_count=4), 20)
+        self.assertFalse(self.users_file.exists())
+        store = open_user_store(self.users_file)
+        self.assertIsInstance(store, ShardedUserStore)
+        self.assertEqual(store.shard_count, 4)
+        self.assertEqual([user.username for user in store.all()][:2], ["user00", "user01"])
+        self.assertEqual(store.get("user07").category, "student")
+
+        self.assertEqual(migrate_to_json(self.users_file), 20)
+        self.assertFalse((self.directory / "users.d").exists())
+        store = open_user_store(self.users_file)
+        self.assertNotIsInstance(store, ShardedUserStore)
+        self.assertEqual(len(store.all()), 20)
+
+    def test_save_touches_only_its_shard(self) -> None:
+        migrate_to_shards(self.users_file, shard_count=8)
+        store = open_user_store(self.users_file)
+        before = {path: path.stat().st_mtime_ns for path in store.shard_paths()}
+
+        store.save(StoredUser(username="user03", password="secret", role="regular", full_name="Ana"))
+
+        changed = [path for path in store.shard_paths() if path.stat().st_mtime_ns != before[path]]
+        self.assertEqual(changed, [store.shard_path("user03")])
+        with store.shard_path("user03").open("r", encoding="utf-8") as file_handle:
+            self.assertEqual(json.load(file_handle)["user03"]["full_name"], "Ana")
+        self.assertEqual(store.get("user03").full_name, "Ana")
+        self.assertTrue(store.delete("user03"))
+        self.assertIsNone(store.get("user03"))
+        self.assertEqual(len(store.all()), 19)
+
+    def test_update_fields_writes_only_changed_users(self) -> None:
+        migrate_to_shards(self.users_file, shard_count=8)
+        store = open_user_store(self.users_file)
+        self.assertEqual(store.update_fields("user04", email="a@b.c"), {"email": "a@b.c"})
+        before = {path: path.stat().st_mtime_ns for path in store.shard_paths()}
+
+        self.assertEqual(store.update_fields("user04", email="a@b.c", category="student"), {})
+        self.assertEqual(store.update_fields("user09", full_name="Caio"), {"full_name": "Caio"})
+
+        changed = [path for path in store.shard_paths() if path.stat().st_mtime_ns != before[path]]
+        self.assertEqual(changed, [store.shard_path("user09")])
+        self.assertEqual(store.get("user04").email, "a@b.c")
+        with self.assertRaises(ValueError):
+            store.update_fields("user09", username="other")
+        with self.assertRaises(ValueError):
+            store.update_fields("nobody", email="x@y.z")
+
+    def test_unit_of_work_commits_touched_shards(self) -> None:
+        migrate_to_shards(self.users_file, shard_count=8)
+        store = open_user_store(self.users_file)
+        request_store = SupervisionRequestStore(file_path=self.directory / "supervision_requests.json")
+        with UnitOfWork(user_store=store, request_store=request_store) as unit_of_work:
+            unit_of_work.users.save(
+                StoredUser(username="user05", password="secret", role="regular", full_name="Bia")
+            )
+            unit_of_work.users.delete("user06")
+            store.save(StoredUser(username="user07", password="changed", role="regular"))
+
+        self.assertEqual(store.get("user05").full_name, "Bia")
+        self.assertIsNone(store.get("user06"))
+        self.assertEqual(store.get("user07").password, "changed")
+        self.assertFalse(self.users_file.exists())
+
+    def test_unit_of_work_locks_and_loads_only_touched_shards(self) -> None:
+        migrate_to_shards(self.users_file, shard_count=8)
+        store = open_user_store(self.users_file)
+        request_store = SupervisionRequestStore(file_path=self.directory / "supervision_requests.json")
+        locked: list[Path] = []
+        shard_lock = ShardedUserStore._shard_lock
+
+        def record_lock(self: ShardedUserStore, shard_path: Path):
+            locked.append(shard_path)
+            return shard_lock(self, shard_path)
+
+        with patch.object(ShardedUserStore, "_shard_lock", record_lock), patch.object(
+            ShardedUserStore, "_load", side_effect=AssertionError("merged every shard")
+        ):
+            with UnitOfWork(user_store=store, request_store=request_store) as unit_of_work:
+                unit_of_work.update_profile(store.get("user05"), {"full_name": "Bia"})
+                unit_of_work.update_profile(store.get("user06"), {"full_name": "Caio"})
+
+        self.assertEqual(
+            locked, sorted({store.shard_path("user05"), store.shard_path("user06")})
+        )
+        self.assertEqual(store.get("user05").full_name, "Bia")
+        self.assertEqual(store.get("user06").full_name, "Caio")
+
+    def test_unconstrained_writes_do_not_recache_the_unique_index(self) -> None:
+        migrate_to_shards(self.users_file, shard_count=8)
+        store = open_user_store(self.users_file)
+        writer, other = "user01", next(
+            f"user{index:02d}"
+            for index in range(20)
+            if store.shard_path(f"user{index:02d}") != store.shard_path("user01")
+        )
+        store.unique_index()
+
+        def write_from_another_process(files: dict[Path, object]) -> dict[Path, object]:
+            other_shard = store.shard_path(other)
+            shard = json.loads(other_shard.read_text(encoding="utf-8"))
+            shard[other]["email"] = "taken@example.com"
+            write_data_files({other_shard: shard})
+            return write_data_files(files)
+
+        with patch(
+            "supervisions.sharded_user_store.write_data_files",
+            side_effect=write_from_another_process,
+        ):
+            store.update_fields(writer, full_name="Ana")
+
+        with self.assertRaises(ValueError):
+            store.update_fields(writer, email="taken@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
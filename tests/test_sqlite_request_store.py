@@ -0,0 +1,191 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.change_feed import REQUEST_CREATED, REQUEST_DECIDED, feed_for
+from supervisions.sqlite_request_store import (
+    SqliteSupervisionRequestStore,
+    migrate_to_json,
+    migrate_to_sqlite,
+)
+from supervisions.supervision_requests import SupervisionRequestStore, open_request_store
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore
+
+
+class SqliteRequestStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.json_file = self.directory / "supervision_requests.json"
+        self.store = SqliteSupervisionRequestStore(self.directory / "supervision_requests.sqlite3")
+
+    def _populate(self, store: SupervisionRequestStore) -> None:
+        store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        store.create_pending("carol", "Carol", "Professor Silva", "advisor_1")
+        store.create_pending("carol", "Carol", "Professor Lima", "advisor_2")
+        store.create_pending("bob", "Bob", "Professor Lima", "advisor_1")
+        store.decide(2, "Professor Silva", "accepted")
+
+    def test_matches_the_json_backend(self) -> None:
+        json_store = SupervisionRequestStore(self.json_file)
+        with patch("time.time", return_value=1_700_000_000.5):
+            self._populate(json_store)
+            self._populate(self.store)
+
+        self.assertEqual(self.store.all(), json_store.all())
+        self.assertEqual(self.store.get(4), json_store.get(4))
+        self.assertIsNone(self.store.get(1))
+        for name in ("Professor Silva", "Professor Lima"):
+            self.assertEqual(
+                self.store.pending_for_professor(name), json_store.pending_for_professor(name)
+            )
+        for username in ("bob", "carol"):
+            self.assertEqual(
+                self.store.pending_for_student(username), json_store.pending_for_student(username)
+            )
+        for filters in (
+            {"after": 2, "limit": 1},
+            {"status": "pending", "professor_name": "Professor Lima"},
+            {"status": "accepted", "student_username": "carol"},
+            {"limit": None, "status": "pending"},
+        ):
+            self.assertEqual(self.store.page(**filters), json_store.page(**filters))
+
+    def test_decide_only_changes_pending_requests_of_the_professor(self) -> None:
+        created = self.store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        version = self.store.version()
+        self.assertIsNone(self.store.decide(created.id, "Professor Lima", "accepted"))
+        self.assertEqual(self.store.version(), version)
+
+        decided = self.store.decide(created.id, "Professor Silva", "rejected")
+        assert decided is not None
+        self.assertEqual(decided.status, "rejected")
+        self.assertNotEqual(self.store.version(), version)
+        self.assertIsNone(self.store.decide(created.id, "Professor Silva", "accepted"))
+
+        events = feed_for(self.directory).events_since(0)
+        self.assertEqual([event.kind for event in events], [REQUEST_CREATED, REQUEST_DECIDED])
+
+    def test_threads_share_the_database(self) -> None:
+        def create(index: int) -> None:
+            for slot in ("advisor_1", "advisor_2"):
+                self.store.create_pending(f"student{index}", "Student", "Professor Silva", slot)
+
+        threads = [threading.Thread(target=create, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.store.pending_for_professor("Professor Silva")), 16)
+        self.assertEqual(sorted(request.id for request in self.store.all()), list(range(1, 17)))
+
+    def test_unit_of_work_commits_and_rolls_back(self) -> None:
+        user_store = UserStore(self.directory / "users.json")
+        user_store.save(
+            StoredUser(username="bob", password="secret", role="regular", category="student")
+        )
+        created = self.store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork(user_store=user_store, request_store=self.store) as unit_of_work:
+                unit_of_work.decide_supervision_request(created.id, "Professor Silva", "accepted")
+                raise RuntimeError("abort")
+        self.assertEqual(self.store.get(created.id).status, "pending")
+
+        with UnitOfWork(user_store=user_store, request_store=self.store) as unit_of_work:
+            unit_of_work.decide_supervision_request(created.id, "Professor Silva", "accepted")
+        self.assertEqual(self.store.get(created.id).status, "accepted")
+        self.assertEqual(user_store.get("bob").advisor_1, "Professor Silva")
+        events = feed_for(self.directory).events_since(0)
+        self.assertEqual(events[-1].kind, REQUEST_DECIDED)
+
+    def test_unit_of_work_stages_rows_without_holding_the_write_lock(self) -> None:
+        user_store = UserStore(self.directory / "users.json")
+        created = self.store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+
+        with UnitOfWork(user_store=user_store, request_store=self.store) as unit_of_work:
+            replaced = unit_of_work.requests.create_pending(
+                "bob", "Bob", "Professor Lima", "advisor_1"
+            )
+            self.assertEqual(unit_of_work.requests.pending_for_student("bob"), [replaced])
+            self.assertIsNone(unit_of_work.requests.get(created.id))
+            self.assertIs(unit_of_work.requests._connection(), self.store._connection())
+            other = sqlite3.connect(self.store.file_path, timeout=0, isolation_level=None)
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("ROLLBACK")
+            other.close()
+
+        self.assertEqual(self.store.all(), [replaced])
+
+    def test_unit_of_work_keeps_both_stores_when_a_write_fails(self) -> None:
+        user_store = UserStore(self.directory / "users.json")
+        user_store.save(
+            StoredUser(username="bob", password="secret", role="regular", category="student")
+        )
+        created = self.store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        version = self.store.version()
+
+        for target, error in (
+            ("supervisions.storage.encode_data", OSError("disk full")),
+            (
+                "supervisions.unit_of_work._StagedSqliteRequestStore.commit_database",
+                sqlite3.OperationalError("database is locked"),
+            ),
+        ):
+            with self.subTest(target=target):
+                with patch(target, side_effect=error), self.assertRaises(type(error)):
+                    with UnitOfWork(user_store=user_store, request_store=self.store) as work:
+                        work.decide_supervision_request(created.id, "Professor Silva", "accepted")
+                self.assertEqual(self.store.get(created.id).status, "pending")
+                self.assertEqual(self.store.version(), version)
+                self.assertIsNone(UserStore(user_store.file_path).get("bob").advisor_1)
+                self.assertEqual(list(self.directory.glob(".*.tmp")), [])
+
+    def test_migration_round_trip(self) -> None:
+        json_store = SupervisionRequestStore(self.json_file)
+        self._populate(json_store)
+        expected = json_store.all()
+
+        self.assertEqual(migrate_to_sqlite(self.json_file), 3)
+        migrated = open_request_store(self.json_file)
+        self.assertIsInstance(migrated, SqliteSupervisionRequestStore)
+        self.assertEqual(migrated.all(), expected)
+        self.assertFalse(self.json_file.exists())
+        with self.assertRaises(ValueError):
+            migrate_to_sqlite(self.json_file)
+
+        self.assertEqual(migrate_to_json(self.json_file), 3)
+        restored = open_request_store(self.json_file)
+        self.assertNotIsInstance(restored, SqliteSupervisionRequestStore)
+        self.assertEqual(restored.all(), expected)
+
+    def test_adds_timestamps_to_existing_databases(self) -> None:
+        connection = sqlite3.connect(self.store.file_path)
+        connection.execute(
+            "CREATE TABLE supervision_requests (id INTEGER PRIMARY KEY, "
+            "student_username TEXT NOT NULL, student_name TEXT NOT NULL, "
+            "professor_name TEXT NOT NULL, slot TEXT NOT NULL, status TEXT NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO supervision_requests VALUES "
+            "(1, 'bob', 'Bob', 'Professor Silva', 'advisor_1', 'pending')"
+        )
+        connection.commit()
+        connection.close()
+
+        with patch("time.time", return_value=1_700_000_000.5):
+            decided = self.store.decide(1, "Professor Silva", "accepted")
+            created = self.store.create_pending("carol", "Carol", "Professor Silva", "advisor_1")
+
+        self.assertEqual((decided.created_at, decided.decided_at), (None, 1_700_000_000))
+        self.assertEqual((created.created_at, created.decided_at), (1_700_000_000, None))
+        self.assertEqual(self.store.all(), [decided, created])
+
+
+if __name__ == "__main__":
+    unittest.main()
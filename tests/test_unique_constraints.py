@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions.sharded_user_store import migrate_to_shards
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.unique_constraints import UniqueIndex
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore, open_user_store
+
+
+def _student(username: str, **fields: str) -> StoredUser:
+    return StoredUser(
+        username=username, password="secret", role="regular", category="student", **fields
+    )
+
+
+class UniqueConstraintTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.users_file = self.directory / "users.json"
+        store = UserStore(file_path=self.users_file)
+        store.save(_student("ana", email="Ana@Example.com", enroll_number="2026001"))
+        store.save(_student("bia", email="bia@example.com"))
+
+    def _assert_constraints(self, store: UserStore) -> None:
+        with self.assertRaisesRegex(ValueError, "User 'ana' already exists"):
+            store.create(_student("ana"))
+        with self.assertRaisesRegex(ValueError, "Email 'ana@example.COM' is already in use"):
+            store.create(_student("caio", email="ana@example.COM"))
+        with self.assertRaisesRegex(ValueError, "Enroll number ' 2026001' is already in use"):
+            store.update_fields("bia", enroll_number=" 2026001")
+        self.assertIsNone(store.get("caio"))
+        self.assertIsNone(store.get("bia").enroll_number)
+
+        store.update_fields("ana", email="ana@new.example.com")
+        store.create(_student("caio", email="ANA@example.com"))
+        self.assertTrue(store.delete("ana"))
+        store.update_fields("bia", enroll_number="2026001")
+        self.assertEqual(store.get("bia").enroll_number, "2026001")
+        self.assertEqual(store.get("caio").email, "ANA@example.com")
+
+    def test_json_store_enforces_constraints(self) -> None:
+        self._assert_constraints(UserStore(file_path=self.users_file))
+
+    def test_sharded_store_enforces_constraints(self) -> None:
+        migrate_to_shards(self.users_file, shard_count=4)
+        self._assert_constraints(open_user_store(self.users_file))
+
+    def test_unit_of_work_enforces_constraints(self) -> None:
+        unit_of_work = UnitOfWork(
+            user_store=UserStore(file_path=self.users_file),
+            request_store=SupervisionRequestStore(
+                file_path=self.directory / "supervision_requests.json"
+            ),
+        )
+        with unit_of_work:
+            self._assert_constraints(unit_of_work.users)
+        self.assertEqual(UserStore(file_path=self.users_file).get("bia").enroll_number, "2026001")
+
+    def _unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(
+            user_store=UserStore(file_path=self.users_file),
+            request_store=SupervisionRequestStore(
+                file_path=self.directory / "supervision_requests.json"
+            ),
+        )
+
+    def test_units_of_work_reuse_the_store_index(self) -> None:
+        UserStore(file_path=self.users_file).unique_index()
+        with patch.object(UniqueIndex, "build", wraps=UniqueIndex.build) as build:
+            for index in range(3):
+                with self._unit_of_work() as unit_of_work:
+                    unit_of_work.users.update_fields("bia", email=f"bia{index}@example.com")
+        build.assert_not_called()
+        with self.assertRaisesRegex(ValueError, "Email 'BIA2@example.com' is already in use"):
+            UserStore(file_path=self.users_file).update_fields("ana", email="BIA2@example.com")
+
+    def test_concurrent_units_of_work_cannot_claim_the_same_value(self) -> None:
+        first = self._unit_of_work()
+        second = self._unit_of_work()
+        first.users.update_fields("ana", email="shared@example.com")
+        second.users.update_fields("bia", email="shared@example.com")
+
+        first.commit()
+        with self.assertRaisesRegex(ValueError, "Email 'shared@example.com' is already in use"):
+            second.commit()
+        self.assertEqual(UserStore(file_path=self.users_file).get("bia").email, "bia@example.com")
+
+    def test_index_is_reused_between_writes(self) -> None:
+        store = UserStore(file_path=self.users_file)
+        store.save(_student("caio", email="caio@example.com"))
+        with patch.object(UniqueIndex, "build", wraps=UniqueIndex.build) as build:
+            store.save(_student("dora", email="dora@example.com"))
+            store.update_fields("dora", sipap_number="SIPAP-1")
+            store.delete("caio")
+            store.update_fields("ana", full_name="Ana Souza")
+        build.assert_not_called()
+
+        UserStore(file_path=self.users_file).save(_student("edu"))
+        with self.assertRaisesRegex(ValueError, "SIPAP number 'SIPAP-1' is already in use"):
+            store.update_fields("edu", sipap_number="SIPAP-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
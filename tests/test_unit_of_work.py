@@ -0,0 +1,151 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from supervisions.change_feed import USER_CREATED, USER_UPDATED, feed_for
+from supervisions.storage import file_lock, recover_interrupted_commit
+from supervisions.supervision_requests import SupervisionRequestStore
+from supervisions.unit_of_work import UnitOfWork
+from supervisions.user_store import StoredUser, UserStore
+
+
+class UnitOfWorkTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.directory = Path(self._temp_dir.name)
+        self.user_store = UserStore(file_path=self.directory / "users.json")
+        self.request_store = SupervisionRequestStore(
+            file_path=self.directory / "supervision_requests.json"
+        )
+        self.user_store.save(
+            StoredUser(username="bob", password="bob123", role="regular", category="student")
+        )
+
+    def _unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(user_store=self.user_store, request_store=self.request_store)
+
+    def test_commit_writes_both_stores(self) -> None:
+        with self._unit_of_work() as unit_of_work:
+            unit_of_work.requests.create_pending(
+                student_username="bob",
+                student_name="Bob",
+                professor_name="Professor Silva",
+                slot="advisor_1",
+            )
+            student = unit_of_work.users.get("bob")
+            assert student is not None
+            unit_of_work.users.save(
+                StoredUser(
+                    username=student.username,
+                    password=student.password,
+                    role=student.role,
+                    category=student.category,
+                    full_name="Bob",
+                )
+            )
+            self.assertEqual(self.request_store.all(), [])
+            self.assertIsNone(self.user_store.get("bob").full_name)
+
+        self.assertEqual(len(self.request_store.pending_for_student("bob")), 1)
+        self.assertEqual(self.user_store.get("bob").full_name, "Bob")
+        self.assertEqual(list((self.directory / ".journal").iterdir()), [])
+
+    def test_failure_rolls_back_staged_changes(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self._unit_of_work() as unit_of_work:
+                unit_of_work.users.delete("bob")
+                unit_of_work.requests.create_pending(
+                    student_username="bob",
+                    student_name="Bob",
+                    professor_name="Professor Silva",
+                    slot="advisor_1",
+                )
+                raise RuntimeError("boom")
+
+        self.assertIsNotNone(self.user_store.get("bob"))
+        self.assertFalse(self.request_store.file_path.exists())
+
+    def test_commit_keeps_concurrent_writes_to_other_users(self) -> None:
+        events = []
+        feed_for(self.directory).subscribe(events.append)
+        with self._unit_of_work() as unit_of_work:
+            unit_of_work.users.update_fields("bob", full_name="Bob")
+            self.user_store.create(StoredUser(username="admin2", password="x", role="admin"))
+
+        self.assertEqual(self.user_store.get("bob").full_name, "Bob")
+        self.assertIsNotNone(self.user_store.get("admin2"))
+        self.assertEqual(
+            [(event.kind, event.key) for event in events],
+            [(USER_CREATED, "admin2"), (USER_UPDATED, "bob")],
+        )
+
+    def test_commit_rejects_concurrent_write_to_the_same_user(self) -> None:
+        with self.assertRaisesRegex(ValueError, "User 'bob' was changed by another request"):
+            with self._unit_of_work() as unit_of_work:
+                unit_of_work.users.update_fields("bob", full_name="Bob")
+                self.user_store.update_fields("bob", email="bob@example.com")
+        stored = self.user_store.get("bob")
+        self.assertEqual((stored.full_name, stored.email), (None, "bob@example.com"))
+
+    def test_commit_rejects_stale_request_file(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Supervision requests were changed"):
+            with self._unit_of_work() as unit_of_work:
+                unit_of_work.requests.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+                self.request_store.create_pending("bob", "Bob", "Professor Souza", "advisor_2")
+        self.assertEqual([request.slot for request in self.request_store.all()], ["advisor_2"])
+
+    def _interrupted_commit(self) -> Path:
+        temporary = self.directory / ".supervision_requests.json.crash.tmp"
+        temporary.write_text(json.dumps([]), encoding="utf-8")
+        journal_dir = self.directory / ".journal"
+        journal_dir.mkdir(exist_ok=True)
+        (journal_dir / "crash.json").write_text(
+            json.dumps([[temporary.name, "supervision_requests.json"]]),
+            encoding="utf-8",
+        )
+        return temporary
+
+    def test_interrupted_commit_is_rolled_forward(self) -> None:
+        temporary = self._interrupted_commit()
+
+        recover_interrupted_commit(self.directory)
+
+        self.assertEqual(self.request_store.all(), [])
+        self.assertFalse(temporary.exists())
+        self.assertEqual(list((self.directory / ".journal").iterdir()), [])
+
+    def test_interrupted_commit_is_recovered_on_open_not_on_reads(self) -> None:
+        self.request_store.create_pending("bob", "Bob", "Professor Silva", "advisor_1")
+        self._interrupted_commit()
+
+        self.assertEqual(len(self.request_store.all()), 1)
+        self.assertIsNotNone(self.user_store.get("bob"))
+        self.assertTrue((self.directory / ".journal" / "crash.json").exists())
+
+        self.assertEqual(SupervisionRequestStore(self.request_store.file_path).all(), [])
+        self.assertEqual(list((self.directory / ".journal").iterdir()), [])
+
+    def test_interrupted_commit_is_recovered_after_waiting_for_a_lock(self) -> None:
+        lock_path = self.directory / "supervision_requests.json.lock"
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold_lock() -> None:
+            with file_lock(lock_path):
+                held.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        held.wait(5)
+        self._interrupted_commit()
+        threading.Timer(0.05, release.set).start()
+        with file_lock(lock_path):
+            self.assertEqual(list((self.directory / ".journal").iterdir()), [])
+        holder.join()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import patch
+
+from supervisions import user_search
+from supervisions.change_feed import feed_for
+from supervisions.user_search import UserSearchIndex, fold, tokenize
+from supervisions.user_store import StoredUser, UserStore
+
+
+class UserSearchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.store = UserStore(file_path=Path(self._temp_dir.name) / "users.json")
+        self.store.save(
+            StoredUser(
+                username="silva",
+                password="silva123",
+                role="regular",
+                category="professor",
+                full_name="José Conceição Silva",
+                email="jose.silva@example.edu",
+            )
+        )
+        self.store.save(
+            StoredUser(
+                username="bob",
+                password="bob123",
+                role="regular",
+                category="student",
+                full_name="Bob Souza",
+                enroll_number="2024001",
+            )
+        )
+        self.index = UserSearchIndex(self.store)
+
+    def test_tokenize_folds_accents_and_case(self) -> None:
+        self.assertEqual(fold("Conceição"), "conceicao")
+        self.assertEqual(
+            tokenize("José_Silva, jose.silva@x.edu"),
+            ["jose", "silva", "jose", "silva", "x", "edu"],
+        )
+
+    def test_search_matches_prefixes_of_every_term(self) -> None:
+        self.assertEqual(self.index.search("concei"), ["silva"])
+        self.assertEqual(self.index.search("JOSÉ sil"), ["silva"])
+        self.assertEqual(self.index.search("2024"), ["bob"])
+        self.assertEqual(self.index.search("bo"), ["bob"])
+        self.assertEqual(self.index.search("jose bob"), [])
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_search_follows_saves_and_deletes(self) -> None:
+        self.assertEqual(self.index.search("souza"), ["bob"])
+        self.store.save(replace(self.store.get("bob"), full_name="Bob Pereira"))
+        self.assertEqual(self.index.search("souza"), [])
+        self.assertEqual(self.index.search("perei"), ["bob"])
+        self.store.save(
+            StoredUser(username="carol", password="secret", role="regular", full_name="Carol Souza")
+        )
+        self.store.delete("bob")
+        self.assertEqual(self.index.search("pereira"), [])
+        self.assertEqual(self.index.search("souza"), ["carol"])
+
+    def test_limit_returns_first_usernames(self) -> None:
+        for username in ("ana", "amanda", "alberto"):
+            self.store.save(
+                StoredUser(username=username, password="secret", role="regular", full_name="Santos")
+            )
+        self.assertEqual(self.index.search("santos", limit=2), ["alberto", "amanda"])
+
+    def test_index_is_restored_from_disk_without_rebuilding(self) -> None:
+        self.index.search("silva")
+        self.store.save(
+            StoredUser(username="carol", password="secret", role="regular", full_name="Carol Lima")
+        )
+        persisted = json.loads(self.index.file_path.read_text(encoding="utf-8"))
+        self.assertIn("silva", persisted["documents"])
+
+        user_search._indexes.clear()
+        with patch.object(UserStore, "iter_all", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(UserSearchIndex(self.store).search("lima"), ["carol"])
+            self.assertEqual(UserSearchIndex(self.store).search("conceicao"), ["silva"])
+
+    def test_missing_index_file_is_rebuilt(self) -> None:
+        self.index.search("silva")
+        user_search._indexes.clear()
+        self.index.file_path.unlink()
+        self.assertEqual(UserSearchIndex(self.store).search("souza"), ["bob"])
+        self.assertTrue(self.index.file_path.exists())
+
+    def test_index_behind_the_retained_log_is_rebuilt(self) -> None:
+        self.index.search("silva")
+        user_search._indexes.clear()
+        feed = feed_for(self.store.file_path.parent)
+        feed.segment_bytes = 1
+        feed.retained_segments = 1
+        for username, full_name in (("carol", "Carol Lima"), ("dave", "Dave Lima")):
+            self.store.save(
+                StoredUser(
+                    username=username, password="secret", role="regular", full_name=full_name
+                )
+            )
+
+        self.assertEqual(len(feed.segments()), 1)
+        self.assertEqual(UserSearchIndex(self.store).search("lima"), ["carol", "dave"])
+
+
+if __name__ == "__main__":
+    unittest.main()